@@ -8,6 +8,86 @@ from decouple import config
 import dj_database_url
 
 DEEPSEEK_API_KEY = config("DEEPSEEK_API_KEY")
+
+DEEPSEEK_BASE_URL = config("DEEPSEEK_BASE_URL", default="https://api.deepseek.com")
+LLM_MODEL = config("LLM_MODEL", default="deepseek-v4-flash")
+
+# Pooled LLM HTTP client (see worksheet.services.llm_client)
+LLM_TIMEOUT = config("LLM_TIMEOUT", default=300.0, cast=float)
+LLM_CONNECT_TIMEOUT = config("LLM_CONNECT_TIMEOUT", default=10.0, cast=float)
+LLM_MAX_CONNECTIONS = config("LLM_MAX_CONNECTIONS", default=10, cast=int)
+LLM_MAX_KEEPALIVE_CONNECTIONS = config(
+    "LLM_MAX_KEEPALIVE_CONNECTIONS", default=5, cast=int
+)
+LLM_KEEPALIVE_EXPIRY = config("LLM_KEEPALIVE_EXPIRY", default=60.0, cast=float)
+# Stream generation replies and cancel as soon as one exercise fails validation.
+LLM_STREAMING = config("LLM_STREAMING", default=True, cast=bool)
+# Generate each worksheet section in its own concurrent request.
+WORKSHEET_PARALLEL_SECTIONS = config(
+    "WORKSHEET_PARALLEL_SECTIONS", default=False, cast=bool
+)
+# Keep enough pre-generated worksheets for deliveries due this many days ahead.
+WORKSHEET_STOCK_HORIZON_DAYS = config(
+    "WORKSHEET_STOCK_HORIZON_DAYS", default=2, cast=int
+)
+# Custom exercise result cache and single-flight lock (seconds).
+CUSTOM_EXERCISE_CACHE_TTL = config(
+    "CUSTOM_EXERCISE_CACHE_TTL", default=7 * 24 * 60 * 60, cast=int
+)
+CUSTOM_EXERCISE_LOCK_TIMEOUT = config(
+    "CUSTOM_EXERCISE_LOCK_TIMEOUT", default=600, cast=int
+)
+# Synchronous /custom/ requests wait this long for an identical in-flight
+# generation before getting a 409 with Retry-After (gunicorn kills workers
+# after 30s by default).
+CUSTOM_EXERCISE_SYNC_WAIT = config("CUSTOM_EXERCISE_SYNC_WAIT", default=10, cast=int)
+# Each user's latest worksheet is cached for the API; creates invalidate it.
+LATEST_WORKSHEET_CACHE_TTL = config(
+    "LATEST_WORKSHEET_CACHE_TTL", default=60 * 60, cast=int
+)
+# API token lookups are cached this long (0 queries the database every time).
+AUTH_TOKEN_CACHE_TTL = config("AUTH_TOKEN_CACHE_TTL", default=60, cast=int)
+# Share of cache hits counted by the per-request auth and latest-worksheet
+# metrics (each sampled hit adds 1/rate); 1 counts every hit.
+METRICS_HIT_SAMPLE_RATE = config("METRICS_HIT_SAMPLE_RATE", default=0.01, cast=float)
+# How long finished RQ job results stay fetchable from the status endpoint.
+JOB_RESULT_TTL = config("JOB_RESULT_TTL", default=60 * 60, cast=int)
+# Shared token-bucket limits per provider (0 disables a bucket). Tokens are
+# LLM tokens for DeepSeek (estimated from the prompt plus
+# LLM_OUTPUT_TOKENS_ESTIMATE, corrected from the reply's usage) and messages
+# (recipients) for Mailgun.
+RATE_LIMITS = {
+    "deepseek": {
+        "requests_per_second": config(
+            "DEEPSEEK_REQUESTS_PER_SECOND", default=0, cast=float
+        ),
+        "tokens_per_minute": config("DEEPSEEK_TOKENS_PER_MINUTE", default=0, cast=int),
+    },
+    "mailgun": {
+        "requests_per_second": config(
+            "MAILGUN_REQUESTS_PER_SECOND", default=0, cast=float
+        ),
+        "tokens_per_minute": config("MAILGUN_MESSAGES_PER_MINUTE", default=0, cast=int),
+    },
+}
+LLM_OUTPUT_TOKENS_ESTIMATE = config(
+    "LLM_OUTPUT_TOKENS_ESTIMATE", default=2000, cast=int
+)
+
+# Email outbox: rows leased per dispatch pass and for how long, the delays
+# between failed attempts, and after how many failures a row is dead-lettered.
+OUTBOX_BATCH_SIZE = config("OUTBOX_BATCH_SIZE", default=500, cast=int)
+# A dispatch job may run this long; leases always outlast it, so rows leased
+# by a job that is still sending are never handed to another dispatcher.
+OUTBOX_DISPATCH_TIMEOUT = config("OUTBOX_DISPATCH_TIMEOUT", default=600, cast=int)
+OUTBOX_LEASE_SECONDS = max(
+    config("OUTBOX_LEASE_SECONDS", default=900, cast=int),
+    OUTBOX_DISPATCH_TIMEOUT + 60,
+)
+OUTBOX_MAX_ATTEMPTS = config("OUTBOX_MAX_ATTEMPTS", default=6, cast=int)
+OUTBOX_RETRY_INTERVALS = [60, 300, 900, 3600, 3 * 3600]
+# At most one queued dispatch job per this many seconds of new emails.
+OUTBOX_NUDGE_TIMEOUT = config("OUTBOX_NUDGE_TIMEOUT", default=60, cast=int)
 REDIS_URL = config("REDIS_URL")
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,16 +127,57 @@ INSTALLED_APPS = [
     "recipients",
 ]
 
+# Workers mirror their heartbeats into one Redis hash read by /health/.
+RQ = {"WORKER_CLASS": "worksheet.workers.HeartbeatWorker"}
+# A worker counts as live while its last heartbeat is this recent; RQ beats at
+# least every worker_ttl (420s) while idle.
+HEALTH_WORKER_TIMEOUT = config("HEALTH_WORKER_TIMEOUT", default=480, cast=int)
+# Each web process reuses its health snapshot for this many seconds.
+HEALTH_SNAPSHOT_TTL = config("HEALTH_SNAPSHOT_TTL", default=5.0, cast=float)
+
+# One worker pool per queue. WORKERS is the expected worker count per queue
+# (start them with `rqworker-pool <queue> --num-workers N`); rq_status and
+# /health/ compare it with the workers actually listening.
+#   interactive: user-triggered generation (async /custom/, /regenerate/, delivery)
+#   llm: scheduled generation and stocking
+#   email: sending already-generated worksheets
+#   default: batch orchestration and summaries
 RQ_QUEUES = {
     "default": {
         "URL": REDIS_URL,
         "DEFAULT_TIMEOUT": 600,
+        "WORKERS": config("RQ_DEFAULT_WORKERS", default=1, cast=int),
+    },
+    "interactive": {
+        "URL": REDIS_URL,
+        "DEFAULT_TIMEOUT": 600,
+        "WORKERS": config("RQ_INTERACTIVE_WORKERS", default=1, cast=int),
+    },
+    "llm": {
+        "URL": REDIS_URL,
+        "DEFAULT_TIMEOUT": 900,
+        "WORKERS": config("RQ_LLM_WORKERS", default=2, cast=int),
+    },
+    "email": {
+        "URL": REDIS_URL,
+        "DEFAULT_TIMEOUT": 60,
+        "WORKERS": config("RQ_EMAIL_WORKERS", default=1, cast=int),
+    },
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
     }
 }
 
+if "test" in sys.argv:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "users.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -160,6 +281,20 @@ DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL", default="noreply@michaelsavage
 MAILGUN_API_KEY = config("MAILGUN_API_KEY", default=None)
 MAILGUN_DOMAIN = config("MAILGUN_DOMAIN", default=None)
 MAILGUN_BASE_URL = config("MAILGUN_BASE_URL", default="https://api.eu.mailgun.net")
+# Rendered worksheet emails are cached by content_hash for resends.
+EMAIL_RENDER_CACHE_TTL = config("EMAIL_RENDER_CACHE_TTL", default=86400, cast=int)
+MAILGUN_TIMEOUT = config("MAILGUN_TIMEOUT", default=10.0, cast=float)
+MAILGUN_POOL_MAXSIZE = config("MAILGUN_POOL_MAXSIZE", default=10, cast=int)
+# Retries of 429/5xx/connect failures within one send, with full-jitter
+# backoff between MAILGUN_BACKOFF_BASE * 2**n and a MAILGUN_BACKOFF_MAX cap.
+# Attempts and waits of one send never exceed MAILGUN_RETRY_BUDGET seconds.
+# Sends run inside outbox drains, which stop at OUTBOX_DISPATCH_TIMEOUT with
+# their leases still held, so 45s leaves a stalled Mailgun room for about a
+# dozen requests per drain before the rest wait for the next one.
+MAILGUN_MAX_RETRIES = config("MAILGUN_MAX_RETRIES", default=3, cast=int)
+MAILGUN_BACKOFF_BASE = config("MAILGUN_BACKOFF_BASE", default=1.0, cast=float)
+MAILGUN_BACKOFF_MAX = config("MAILGUN_BACKOFF_MAX", default=30.0, cast=float)
+MAILGUN_RETRY_BUDGET = config("MAILGUN_RETRY_BUDGET", default=45.0, cast=float)
 
 # Logging configuration
 LOGGING = {
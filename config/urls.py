@@ -4,12 +4,14 @@ from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularSwaggerView,
 )
-from .views import home, health
+from .views import home, health, health_live, health_ready
 from users.views import TokenObtainView
 
 urlpatterns = [
     path("", home, name="home"),
     path("health/", health, name="health"),
+    path("health/live/", health_live, name="health-live"),
+    path("health/ready/", health_ready, name="health-ready"),
     path("admin/", admin.site.urls),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path(
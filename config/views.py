@@ -1,28 +1,32 @@
-import django_rq
 from django.http import HttpResponse, JsonResponse
-from rq import Worker
+
+from worksheet.services.health import get_snapshot, is_ready
+
+
+def health_live(request):
+    """Liveness: the web process answers. Touches neither Redis nor the database."""
+    return JsonResponse({"status": "ok"})
 
 
 def health(request):
-    """200 only when Redis is up and at least one RQ worker listens on ``default``."""
-    try:
-        conn = django_rq.get_connection("default")
-        conn.ping()
-    except Exception:
-        return JsonResponse({"redis": "error", "workers_on_default": 0}, status=503)
+    """
+    200 when Redis is up and at least one worker listens on ``default``, the
+    meaning deploy checks (the delivery workflow) rely on. The payload is the
+    same snapshot ``health_ready`` reports.
+    """
+    snapshot = get_snapshot()
+    healthy = is_ready(snapshot, queue_names=["default"])
+    return JsonResponse(snapshot, status=200 if healthy else 503)
 
-    try:
-        workers = Worker.all(connection=conn)
-    except Exception:
-        return JsonResponse({"redis": "ok", "workers_on_default": 0}, status=503)
 
-    on_default = [w for w in workers if "default" in w.queue_names()]
-    payload = {
-        "redis": "ok",
-        "workers_total": len(workers),
-        "workers_on_default": len(on_default),
-    }
-    return JsonResponse(payload, status=200 if on_default else 503)
+def health_ready(request):
+    """
+    Readiness: 200 only when Redis is up and every queue in ``RQ_QUEUES`` has
+    at least one live worker; the payload reports depth and workers per queue.
+    Answered from a snapshot cached for ``HEALTH_SNAPSHOT_TTL`` seconds.
+    """
+    snapshot = get_snapshot()
+    return JsonResponse(snapshot, status=200 if is_ready(snapshot) else 503)
 
 
 # flake8: noqa: E501
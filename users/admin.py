@@ -1,12 +1,9 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from django.utils import timezone
-from datetime import timedelta
 from django.contrib import messages
+from django_rq import enqueue
 from .models import User
-from worksheet.services.generate import generate_worksheet_for
-from worksheet.services.email import send_worksheet_email
-from worksheet.models import Worksheet
+from worksheet.batch import delivery_batch_job
 
 
 @admin.register(User)
@@ -56,53 +53,18 @@ class UserAdmin(BaseUserAdmin):
 
     @admin.action(description="Generate worksheet and send email for selected users")
     def generate_and_send_worksheet(self, request, queryset):
-        """Admin action to generate worksheet and send email for selected users."""
-        success_count = 0
-        error_count = 0
-
-        for user in queryset:
-            try:
-                content = generate_worksheet_for(user)
-                if content:
-                    # Get the worksheet to retrieve themes
-                    worksheet = (
-                        Worksheet.objects.filter(user=user)
-                        .order_by("-created_at")
-                        .first()
-                    )
-                    themes = (
-                        worksheet.themes if worksheet and worksheet.themes else None
-                    )
-                    send_worksheet_email(user, content, theme=themes)
-                    # Update next_delivery date
-                    today = timezone.now().date()
-                    user.next_delivery = today + timedelta(days=2)
-                    user.save()
-                    success_count += 1
-                else:
-                    self.message_user(
-                        request,
-                        f"Duplicate worksheet detected for {user.email}, skipping.",
-                        messages.WARNING,
-                    )
-                    error_count += 1
-            except Exception as e:
-                self.message_user(
-                    request,
-                    f"Error processing {user.email}: {str(e)}",
-                    messages.ERROR,
-                )
-                error_count += 1
-
-        if success_count > 0:
-            self.message_user(
-                request,
-                f"Successfully generated and sent worksheets to {success_count} user(s).",
-                messages.SUCCESS,
-            )
-        if error_count > 0:
-            self.message_user(
-                request,
-                f"Failed to process {error_count} user(s).",
-                messages.ERROR,
-            )
+        """
+        Enqueue a delivery batch on the RQ workers for the selected users.
+        Each gets a stocked worksheet (generated live when the stock is empty)
+        and, once it is delivered, next_delivery moves DELIVERY_INTERVAL_DAYS
+        ahead as the scheduled run would. Per-user outcomes are counted by the
+        batch's summary job rather than reported here.
+        """
+        user_ids = list(queryset.values_list("id", flat=True))
+        job = enqueue(delivery_batch_job, user_ids, reschedule=True)
+        self.message_user(
+            request,
+            f"Enqueued worksheet delivery for {len(user_ids)} user(s) (job {job.id}). "
+            "Its result names the summary job that counts successes and failures.",
+            messages.SUCCESS,
+        )
@@ -0,0 +1,53 @@
+"""DRF token authentication with the token lookup cached.
+
+``TokenAuthentication`` reads ``authtoken_token`` joined to ``users_user`` on
+every request. For the API's small polling calls that query is most of the
+work, so ``CachedTokenAuthentication`` keeps the token (with its user) in the
+default cache for ``AUTH_TOKEN_CACHE_TTL`` seconds.
+
+Entries are keyed by a digest of the token, never the token itself. They are
+dropped when the token is deleted (rotation) or its user is saved, so a
+deactivated user is refused on their next request. Bulk ``update()`` calls
+skip those signals and are only picked up when the TTL runs out.
+"""
+
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+
+from worksheet.services import metrics
+
+logger = logging.getLogger(__name__)
+
+CACHE_OUTCOMES = ("hit", "miss")
+CACHE_PREFIX = "auth_token"
+
+
+def token_cache_key(key: str) -> str:
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return f"{CACHE_PREFIX}:{digest}"
+
+
+def invalidate_token(key: str) -> None:
+    cache.delete(token_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        if settings.AUTH_TOKEN_CACHE_TTL <= 0:
+            return super().authenticate_credentials(key)
+
+        cache_key = token_cache_key(key)
+        token = cache.get(cache_key)
+        if token is not None:
+            metrics.sample("auth_token.hit")
+            return token.user, token
+
+        metrics.incr("auth_token.miss")
+        # Unknown keys and inactive users raise here and are never cached.
+        user, token = super().authenticate_credentials(key)
+        cache.set(cache_key, token, timeout=settings.AUTH_TOKEN_CACHE_TTL)
+        return user, token
@@ -1,9 +1,16 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
 from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
 
+from users.authentication import CachedTokenAuthentication
 from users.views import TokenObtainSerializer
 
 User = get_user_model()
@@ -107,3 +114,121 @@ class TokenObtainViewTest(TestCase):
         response = self.client.post(self.url, {"username": "test@example.com"})
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("password", response.data)
+
+
+class CachedTokenAuthenticationTest(TestCase):
+    """Tests for CachedTokenAuthentication"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="cached@example.com")
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_second_lookup_skips_the_database(self):
+        """Test the token is read from the cache after the first request"""
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(token.key, self.token.key)
+
+    def test_deleted_token_is_rejected(self):
+        """Test rotating (deleting) a token drops its cached lookup"""
+        key = self.token.key
+        self.auth.authenticate_credentials(key)
+
+        self.token.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(key)
+
+    def test_deactivated_user_is_rejected(self):
+        """Test saving a user with active=False drops their cached tokens"""
+        self.auth.authenticate_credentials(self.token.key)
+
+        self.user.active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_unknown_token_is_not_cached(self):
+        """Test failed lookups are retried against the database"""
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials("missing")
+
+        with self.assertNumQueries(1), self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials("missing")
+
+    @override_settings(AUTH_TOKEN_CACHE_TTL=0)
+    def test_zero_ttl_disables_the_cache(self):
+        """Test AUTH_TOKEN_CACHE_TTL=0 queries every time"""
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(1):
+            self.auth.authenticate_credentials(self.token.key)
+
+
+def _inline_queue():
+    """Fake RQ queue whose enqueue_many runs the prepared user jobs inline."""
+    queue = MagicMock()
+    queue.prepare_data.side_effect = lambda func, args, kwargs, **_: (
+        func,
+        args,
+        kwargs,
+    )
+    queue.enqueue_many.side_effect = lambda datas: [
+        MagicMock(id=str(func(*args, **kwargs))) for func, args, kwargs in datas
+    ]
+    queue.enqueue.return_value = MagicMock(id="summary")
+    return queue
+
+
+class GenerateAndSendWorksheetActionTest(TestCase):
+    """Tests for the admin action that delivers worksheets to selected users"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com", password="adminpass123"
+        )
+        self.client.force_login(self.admin)
+        self.today = timezone.now().date()
+        self.sent = User.objects.create_user(
+            email="sent@example.com", next_delivery=self.today
+        )
+        self.duplicate = User.objects.create_user(
+            email="duplicate@example.com", next_delivery=self.today
+        )
+
+    @patch("worksheet.jobs.nudge_outbox_dispatcher")
+    @patch("worksheet.jobs.claim_or_generate_worksheet_for")
+    @patch("worksheet.batch.get_queue")
+    @patch("users.admin.enqueue")
+    def test_delivered_users_move_to_the_next_delivery_date(
+        self, mock_enqueue, mock_get_queue, mock_claim, mock_nudge
+    ):
+        """Test only users whose delivery succeeded are rescheduled"""
+        mock_enqueue.side_effect = lambda func, *args, **kwargs: MagicMock(
+            id=func(*args, **kwargs)["summary_job_id"]
+        )
+        mock_get_queue.return_value = _inline_queue()
+        mock_claim.side_effect = lambda user, deliver: (
+            None if user == self.duplicate else "{}"
+        )
+
+        response = self.client.post(
+            "/admin/users/user/",
+            {
+                "action": "generate_and_send_worksheet",
+                "_selected_action": [self.sent.id, self.duplicate.id],
+            },
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.sent.refresh_from_db()
+        self.duplicate.refresh_from_db()
+        self.assertEqual(self.sent.next_delivery, self.today + timedelta(days=2))
+        self.assertEqual(self.duplicate.next_delivery, self.today)
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Worksheet, Config
+from .models import Worksheet, Config, EmailOutbox, StockedWorksheet
+from .services.latest_worksheet import invalidate_latest_worksheet
+from .services.outbox import requeue_dead
 
 
 @admin.register(Worksheet)
@@ -21,6 +23,42 @@ class WorksheetAdmin(admin.ModelAdmin):
 
     content_hash_short.short_description = "Content Hash"
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_latest_worksheet(obj.user_id)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_latest_worksheet(obj.user_id)
+
+    def delete_queryset(self, request, queryset):
+        user_ids = set(queryset.values_list("user_id", flat=True))
+        super().delete_queryset(request, queryset)
+        for user_id in user_ids:
+            invalidate_latest_worksheet(user_id)
+
+
+@admin.register(StockedWorksheet)
+class StockedWorksheetAdmin(admin.ModelAdmin):
+    list_display = ("id", "created_at", "topics", "themes")
+    readonly_fields = ("created_at", "content_hash", "topics", "themes")
+    ordering = ("created_at",)
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("id", "worksheet", "status", "attempts", "available_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("worksheet__user__email",)
+    readonly_fields = ("worksheet", "created_at", "sent_at", "last_error")
+    ordering = ("-created_at",)
+    actions = ["requeue"]
+
+    @admin.action(description="Requeue dead-lettered emails")
+    def requeue(self, request, queryset):
+        count = requeue_dead(queryset)
+        self.message_user(request, f"Requeued {count} emails")
+
 
 @admin.register(Config)
 class ConfigAdmin(admin.ModelAdmin):
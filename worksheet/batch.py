@@ -0,0 +1,157 @@
+"""Fan-out/fan-in delivery batches on RQ.
+
+The orchestrator shards the due users into chunks and enqueues one
+``generate_worksheet_job`` per user, so every worker in the fleet picks up
+deliveries. Each chunk gets a summary job that depends on that chunk's user
+jobs (failures allowed), and a final summary job depends on the chunk
+summaries. Two levels keep dependency checks per job small on large days.
+"""
+
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from django_rq import get_queue, job
+from rq.job import Dependency, Job
+
+from users.models import User
+from worksheet.jobs import GENERATE_JOB_TIMEOUT, generate_worksheet_job
+from worksheet.services.stock import DELIVERY_INTERVAL_DAYS
+
+logger = logging.getLogger(__name__)
+
+BATCH_CHUNK_SIZE = 100
+SUMMARY_KEYS = ("success", "duplicate", "failed", "unfinished")
+
+
+def enqueue_delivery_batch(
+    user_ids=None, chunk_size=BATCH_CHUNK_SIZE, reschedule=False
+) -> Job:
+    """
+    Enqueue delivery jobs for ``user_ids`` (default: active users due today)
+    and return the final summary job. Scheduled runs advance next_delivery as
+    each chunk is enqueued, so a re-run does not deliver twice. Ad-hoc sends
+    to explicit ``user_ids`` leave it alone unless ``reschedule`` is set, in
+    which case each user job advances it once that user's delivery succeeds.
+    """
+    today = timezone.now().date()
+    scheduled = user_ids is None
+    if scheduled:
+        # Listed up front: chunks advance next_delivery while we loop, which
+        # must not happen under an open cursor filtering on it.
+        user_ids = list(
+            User.objects.filter(active=True, next_delivery=today)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+
+    job_kwargs = {"from_stock": True}
+    if reschedule and not scheduled:
+        job_kwargs["reschedule"] = True
+
+    queue = get_queue("default")
+    llm_queue = get_queue("llm")
+    chunk_summaries = []
+    chunk = []
+    for user_id in user_ids:
+        chunk.append(user_id)
+        if len(chunk) >= chunk_size:
+            chunk_summaries.append(
+                _enqueue_chunk(queue, llm_queue, chunk, job_kwargs, today, scheduled)
+            )
+            chunk = []
+    if chunk:
+        chunk_summaries.append(
+            _enqueue_chunk(queue, llm_queue, chunk, job_kwargs, today, scheduled)
+        )
+
+    summary_ids = [summary.id for summary in chunk_summaries]
+    summary = queue.enqueue(
+        summarize_delivery_batch,
+        summary_ids,
+        depends_on=(
+            Dependency(jobs=summary_ids, allow_failure=True) if summary_ids else None
+        ),
+        result_ttl=settings.JOB_RESULT_TTL,
+    )
+    logger.info(
+        "Enqueued delivery batch: %s chunk(s), summary job %s",
+        len(chunk_summaries),
+        summary.id,
+    )
+    return summary
+
+
+def _enqueue_chunk(
+    queue,
+    llm_queue,
+    user_ids: list[int],
+    job_kwargs: dict,
+    today,
+    advance_next_delivery: bool,
+) -> Job:
+    user_jobs = llm_queue.enqueue_many(
+        [
+            llm_queue.prepare_data(
+                generate_worksheet_job,
+                args=(user_id,),
+                kwargs=job_kwargs,
+                timeout=GENERATE_JOB_TIMEOUT,
+                result_ttl=settings.JOB_RESULT_TTL,
+            )
+            for user_id in user_ids
+        ]
+    )
+    if advance_next_delivery:
+        User.objects.filter(id__in=user_ids).update(
+            next_delivery=today + timedelta(days=DELIVERY_INTERVAL_DAYS)
+        )
+    job_ids = [user_job.id for user_job in user_jobs]
+    return queue.enqueue(
+        summarize_delivery_jobs,
+        job_ids,
+        depends_on=Dependency(jobs=job_ids, allow_failure=True),
+        result_ttl=settings.JOB_RESULT_TTL,
+    )
+
+
+@job("default", timeout=600)
+def delivery_batch_job(user_ids=None, reschedule=False):
+    """Orchestrator entry point, so scheduling itself also runs on a worker."""
+    close_old_connections()
+    try:
+        summary = enqueue_delivery_batch(user_ids, reschedule=reschedule)
+        return {"summary_job_id": summary.id}
+    finally:
+        close_old_connections()
+
+
+def summarize_delivery_jobs(job_ids: list[str]) -> dict[str, int]:
+    """Count the outcomes of one chunk's generate_worksheet_job runs."""
+    counts = Counter({key: 0 for key in SUMMARY_KEYS})
+    connection = get_queue("default").connection
+    for user_job in Job.fetch_many(job_ids, connection=connection):
+        if user_job is not None and user_job.is_failed:
+            outcome = "failed"
+        elif user_job is None or not user_job.is_finished:
+            outcome = "unfinished"
+        elif (user_job.return_value() or {}).get("status") == "duplicate":
+            outcome = "duplicate"
+        else:
+            outcome = "success"
+        counts[outcome] += 1
+    return dict(counts)
+
+
+def summarize_delivery_batch(chunk_summary_ids: list[str]) -> dict[str, int]:
+    """Add up the chunk summaries into the batch result."""
+    totals = Counter({key: 0 for key in SUMMARY_KEYS})
+    connection = get_queue("default").connection
+    for chunk in Job.fetch_many(chunk_summary_ids, connection=connection):
+        totals.update((chunk and chunk.return_value()) or {})
+    totals = dict(totals)
+    logger.info("Delivery batch finished: %s", totals)
+    return totals
@@ -0,0 +1,245 @@
+"""Local OpenAI-compatible chat-completions server for benchmarks.
+
+Replies are built from the JSON schema embedded in the prompt (the block the
+prompt builders ask the model to fill in), so worksheet, section and custom
+prompts all get a valid answer with the right keys and item counts. Latency is
+modelled as a time-to-first-token drawn from a distribution plus output length
+divided by a token rate, and streamed replies are paced the same way.
+
+A seeded share of requests can instead get malformed JSON, a reply with an
+exercise missing its blank, or an HTTP error, so retry, repair and
+regeneration paths can be load tested. The same seed gives the same sequence.
+"""
+
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from worksheet.services.prompts import TRANSLATION_KEY
+
+CHARS_PER_TOKEN = 4
+STREAM_CHUNK_CHARS = 16
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+OUTCOMES = ("valid", "malformed", "missing_blank", "error")
+
+
+def _schema_from_messages(messages: list[dict]) -> dict | None:
+    for message in messages:
+        if message.get("role") != "user":
+            continue
+        text = message.get("content") or ""
+        if "{" not in text:
+            continue
+        start, end = text.index("{"), text.rindex("}") + 1
+        try:
+            schema = json.loads(text[start:end])
+        except json.JSONDecodeError:
+            continue
+        if isinstance(schema, dict):
+            return schema
+    return None
+
+
+def fill_schema(schema: dict) -> dict:
+    """Fill every empty exercise slot with a prompt that passes validation."""
+    filled = {}
+    for key, items in schema.items():
+        filled[key] = [
+            (
+                {"prompt": f"We finished task {i}", "answer": [f"Terminamos {i}"]}
+                if key == TRANSLATION_KEY
+                else {"prompt": f"Ellos ___ (hacer) {key} {i}.", "answer": ["hicieron"]}
+            )
+            for i in range(len(items))
+        ]
+    return filled
+
+
+def malform(text: str, rng: random.Random) -> str:
+    """Break valid reply JSON the way models do."""
+    breakages = (
+        lambda t: t.replace('"]}', '"],}', 1),  # trailing comma
+        lambda t: t[: len(t) * 2 // 3],  # truncated
+        lambda t: t.replace('"prompt"', "“prompt”", 1),  # smart quotes
+        lambda t: f"Here is your worksheet:\n```json\n{t}\n```\nEnjoy!",
+    )
+    return rng.choice(breakages)(text)
+
+
+def drop_blank(filled: dict, rng: random.Random) -> dict:
+    """Remove the blank from one exercise prompt."""
+    sections = [key for key, items in filled.items() if items]
+    if not sections:
+        return filled
+    items = filled[rng.choice(sections)]
+    item = items[rng.randrange(len(items))]
+    item["prompt"] = item["prompt"].replace("___", "hicieron")
+    return filled
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        port=0,
+        latency=0.2,
+        tokens_per_second=200.0,
+        latency_distribution="fixed",
+        malformed_rate=0.0,
+        missing_blank_rate=0.0,
+        error_rate=0.0,
+        error_status=500,
+        seed=0,
+    ):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency_distribution}")
+        super().__init__(("127.0.0.1", port), _FakeLLMHandler)
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.latency_distribution = latency_distribution
+        self.malformed_rate = malformed_rate
+        self.missing_blank_rate = missing_blank_rate
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.served = Counter()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def start(self) -> str:
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def plan(self) -> tuple[str, float, random.Random]:
+        """Pick the outcome and time to first token for the next request."""
+        with self._rng_lock:
+            roll = self._rng.random()
+            ttft = self._draw_latency()
+            rng = random.Random(self._rng.random())
+        outcome = "valid"
+        for name, rate in (
+            ("error", self.error_rate),
+            ("malformed", self.malformed_rate),
+            ("missing_blank", self.missing_blank_rate),
+        ):
+            if roll < rate:
+                outcome = name
+                break
+            roll -= rate
+        with self._rng_lock:
+            self.served[outcome] += 1
+        return outcome, ttft, rng
+
+    def _draw_latency(self) -> float:
+        mean = self.latency
+        if self.latency_distribution == "uniform":
+            return self._rng.uniform(0, 2 * mean)
+        if self.latency_distribution == "exponential":
+            return self._rng.expovariate(1 / mean) if mean > 0 else 0.0
+        if self.latency_distribution == "lognormal":
+            # sigma 0.5 gives a realistic long tail around the same mean.
+            return mean * self._rng.lognormvariate(-0.125, 0.5)
+        return mean
+
+    def reply_for(
+        self, body: dict, outcome: str = "valid", rng: random.Random | None = None
+    ) -> str:
+        rng = rng or random.Random(0)
+        schema = _schema_from_messages(body.get("messages", []))
+        filled = fill_schema(schema) if schema else {}
+        if outcome == "missing_blank":
+            filled = drop_blank(filled, rng)
+        text = json.dumps(filled, ensure_ascii=False)
+        if outcome == "malformed":
+            text = malform(text, rng)
+        return text
+
+    def seconds_for(self, text: str) -> float:
+        return len(text) / CHARS_PER_TOKEN / self.tokens_per_second
+
+
+class _FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        server: FakeLLMServer = self.server
+        outcome, ttft, rng = server.plan()
+        time.sleep(ttft)
+        if outcome == "error":
+            self._send_json(
+                {"error": {"message": "Simulated upstream error", "type": "fake"}},
+                status=server.error_status,
+            )
+            return
+        content = server.reply_for(body, outcome, rng)
+
+        if body.get("stream"):
+            self._stream(content, server)
+        else:
+            time.sleep(server.seconds_for(content))
+            self._send_json(
+                {
+                    "id": "fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                }
+            )
+
+    def _send_json(self, payload: dict, status: int = 200):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, content: str, server: FakeLLMServer):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for start in range(0, len(content), STREAM_CHUNK_CHARS):
+                piece = content[start : start + STREAM_CHUNK_CHARS]  # noqa: E203
+                time.sleep(server.seconds_for(piece))
+                chunk = {
+                    "id": "fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": "fake",
+                    "choices": [
+                        {"index": 0, "delta": {"content": piece}, "finish_reason": None}
+                    ],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client cancelled the stream (early abort).
+            pass
@@ -0,0 +1,156 @@
+"""Local stand-in for the Mailgun messages API, for delivery benchmarks.
+
+Speaks ``POST /v3/<domain>/messages`` with form data, like the real API, and
+records every accepted message (one per recipient, with its recipient
+variables resolved) so tests and benchmarks can check exactly what would
+have been delivered. Point the app at it with ``MAILGUN_BASE_URL``.
+
+Latency, a seeded share of 429 and 5xx replies, and a per-minute message
+quota (answered with 429 and ``Retry-After``, as Mailgun does) can be set
+to exercise batching, retries and rate limiting. The same seed gives the
+same sequence.
+"""
+
+import json
+import random
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+OUTCOMES = ("accepted", "throttled", "error", "over_quota")
+QUOTA_WINDOW_SECONDS = 60
+
+
+class FakeMailgunServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        port=0,
+        latency=0.05,
+        throttle_rate=0.0,
+        error_rate=0.0,
+        error_status=500,
+        quota_per_minute=None,
+        retry_after=1,
+        seed=0,
+    ):
+        super().__init__(("127.0.0.1", port), _FakeMailgunHandler)
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.quota_per_minute = quota_per_minute
+        self.retry_after = retry_after
+        self.served = Counter()
+        self.messages: list[dict] = []
+        self.requests = 0
+        self._sent_at: deque[float] = deque()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def start(self) -> str:
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def plan(self, recipients: int) -> tuple[str, float | None]:
+        """Outcome of the next request and, for 429s, the Retry-After seconds."""
+        with self._lock:
+            self.requests += 1
+            roll = self._rng.random()
+            if roll < self.error_rate:
+                outcome, retry_after = "error", None
+            elif roll < self.error_rate + self.throttle_rate:
+                outcome, retry_after = "throttled", self.retry_after
+            else:
+                outcome, retry_after = self._check_quota(recipients)
+            self.served[outcome] += 1
+        return outcome, retry_after
+
+    def _check_quota(self, recipients: int) -> tuple[str, float | None]:
+        if self.quota_per_minute is None:
+            return "accepted", None
+        now = time.monotonic()
+        while self._sent_at and now - self._sent_at[0] >= QUOTA_WINDOW_SECONDS:
+            self._sent_at.popleft()
+        if len(self._sent_at) + recipients > self.quota_per_minute:
+            oldest = self._sent_at[0] if self._sent_at else now
+            return "over_quota", max(1, QUOTA_WINDOW_SECONDS - (now - oldest))
+        self._sent_at.extend([now] * recipients)
+        return "accepted", None
+
+    def record(self, domain: str, form: dict[str, list[str]]) -> str:
+        """Store one message per recipient, as Mailgun would deliver them."""
+        variables = json.loads(form.get("recipient-variables", ["{}"])[0])
+        template = {key: values[0] for key, values in form.items() if key != "to"}
+        message_id = f"<{self.requests}@{domain}>"
+        with self._lock:
+            for to in form.get("to", []):
+                message = dict(template, to=to, domain=domain, id=message_id)
+                for field in ("html", "text", "subject"):
+                    message[field] = _substitute(
+                        message.get(field, ""), variables.get(to, {})
+                    )
+                message.pop("recipient-variables", None)
+                self.messages.append(message)
+        return message_id
+
+
+def _substitute(body: str, variables: dict) -> str:
+    for name, value in variables.items():
+        body = body.replace(f"%recipient.{name}%", str(value))
+    return body
+
+
+class _FakeMailgunHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        parts = self.path.strip("/").split("/")
+        if len(parts) != 3 or parts[0] != "v3" or parts[2] != "messages":
+            self._send_json({"message": "Not found"}, status=404)
+            return
+        if not self.headers.get("Authorization", "").startswith("Basic "):
+            self._send_json({"message": "Forbidden"}, status=401)
+            return
+
+        server: FakeMailgunServer = self.server
+        outcome, retry_after = server.plan(len(form.get("to", [])))
+        time.sleep(server.latency)
+        if outcome == "error":
+            self._send_json({"message": "Simulated error"}, server.error_status)
+        elif outcome in ("throttled", "over_quota"):
+            self._send_json(
+                {"message": "Too many requests"},
+                status=429,
+                headers={"Retry-After": str(int(retry_after))},
+            )
+        else:
+            message_id = server.record(parts[1], form)
+            self._send_json({"id": message_id, "message": "Queued. Thank you."})
+
+    def _send_json(self, payload: dict, status: int = 200, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
@@ -1,21 +1,45 @@
 import logging
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db import close_old_connections
-from django_rq import job
+from django.utils import timezone
+from django_rq import get_queue, job
 
-from worksheet.services.email import send_worksheet_email
+from worksheet.services.custom_cache import get_or_generate_custom_exercises
 from worksheet.services.generate import generate_worksheet_for
+from worksheet.services.outbox import drain_outbox
+from worksheet.services.stock import (
+    DELIVERY_INTERVAL_DAYS,
+    claim_or_generate_worksheet_for,
+    stock_worksheets,
+)
 
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+OUTBOX_NUDGE_KEY = "outbox:nudge"
+# Queue.enqueue(job_func) ignores the @job timeout and falls back to the
+# queue's DEFAULT_TIMEOUT; callers that enqueue directly pass these instead.
+GENERATE_JOB_TIMEOUT = 900
+INTERACTIVE_JOB_TIMEOUT = 600
+
 
-@job("default", timeout=600)
-def generate_worksheet_job(user_id):
+@job("llm", timeout=GENERATE_JOB_TIMEOUT)
+def generate_worksheet_job(user_id, from_stock=False, reschedule=False):
     """
     Long-lived RQ workers must reset DB connections so queries survive Postgres
     restarts (common on Railway) instead of hanging on a dead socket.
+
+    Scheduled deliveries pass from_stock=True to claim a pre-generated worksheet.
+    Ad-hoc sends pass reschedule=True to push next_delivery back once the
+    worksheet and its email are saved, so the schedule does not send another.
+    The email is written to the outbox with the worksheet and sent by the
+    dispatcher on the ``email`` queue, so a slow or failing Mailgun never
+    loses a generated worksheet or holds up the LLM workers.
     """
     close_old_connections()
     try:
@@ -23,24 +47,80 @@ def generate_worksheet_job(user_id):
 
         logger.info("RQ job started for user %s", user.email)
 
-        content = generate_worksheet_for(user)
+        if from_stock:
+            content = claim_or_generate_worksheet_for(user, deliver=True)
+        else:
+            content = generate_worksheet_for(user, deliver=True)
 
         if content is None:
             logger.warning("Duplicate worksheet detected in job")
             return {"status": "duplicate"}
 
-        try:
-            from worksheet.models import Worksheet
-
-            worksheet = (
-                Worksheet.objects.filter(user=user).order_by("-created_at").first()
+        if reschedule:
+            User.objects.filter(id=user.id).update(
+                next_delivery=timezone.now().date()
+                + timedelta(days=DELIVERY_INTERVAL_DAYS)
             )
-            themes = worksheet.themes if worksheet and worksheet.themes else None
-            send_worksheet_email(user, content, theme=themes)
-        except Exception as e:
-            logger.error("Email failed: %s", e)
-
+        nudge_outbox_dispatcher()
         logger.info("RQ job finished for user %s", user.email)
         return {"status": "success"}
     finally:
         close_old_connections()
+
+
+def nudge_outbox_dispatcher():
+    """Enqueue a dispatch unless one is already waiting to run."""
+    if cache.add(OUTBOX_NUDGE_KEY, 1, timeout=settings.OUTBOX_NUDGE_TIMEOUT):
+        get_queue("email").enqueue(
+            dispatch_outbox_job,
+            job_timeout=settings.OUTBOX_DISPATCH_TIMEOUT,
+            result_ttl=settings.JOB_RESULT_TTL,
+        )
+
+
+@job("email", timeout=settings.OUTBOX_DISPATCH_TIMEOUT)
+def dispatch_outbox_job():
+    """Send every due outbox email; retries are picked up by later dispatches."""
+    # Cleared first so emails queued while this drains trigger another run.
+    cache.delete(OUTBOX_NUDGE_KEY)
+    close_old_connections()
+    try:
+        return {"status": "success", **drain_outbox()}
+    finally:
+        close_old_connections()
+
+
+@job("interactive", timeout=INTERACTIVE_JOB_TIMEOUT)
+def generate_custom_exercises_job(request_text):
+    """Async path of the /custom/ endpoint; nothing is persisted."""
+    content = get_or_generate_custom_exercises(request_text)
+    if content is None:
+        logger.warning("Custom exercise job failed")
+        return {"status": "failed"}
+    return {"status": "success", "request": request_text, "content": content}
+
+
+@job("interactive", timeout=INTERACTIVE_JOB_TIMEOUT)
+def regenerate_worksheet_job(user_id, themes=None):
+    """Async path of the /regenerate/ endpoint; saves the worksheet, no email."""
+    close_old_connections()
+    try:
+        user = User.objects.get(id=user_id)
+        content = generate_worksheet_for(user, themes=themes)
+        if content is None:
+            logger.warning("Worksheet regeneration job failed for %s", user.email)
+            return {"status": "failed"}
+        return {"status": "success", "content": content}
+    finally:
+        close_old_connections()
+
+
+@job("llm", timeout=3600)
+def stock_worksheets_job(limit=None):
+    """Top up the pre-generated worksheet pool ahead of scheduled deliveries."""
+    close_old_connections()
+    try:
+        added = stock_worksheets(limit=limit)
+        return {"status": "success", "added": added}
+    finally:
+        close_old_connections()
@@ -0,0 +1,100 @@
+"""Email delivery throughput against the local fake Mailgun server.
+
+Creates throwaway users (rolled back afterwards), then drives N worksheet
+deliveries through the real rendering, pooled session and retry code, one
+request per user or with Mailgun batch sending. Faults and quotas on the fake
+server show how retries and throttling affect throughput.
+"""
+
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+
+from users.models import User
+from worksheet.fake_mailgun import OUTCOMES, FakeMailgunServer
+from worksheet.management.commands.bench_email_render import build_worksheet
+from worksheet.services.email import send_worksheet_email, send_worksheet_emails
+from worksheet.services.mailgun import close_mailgun_session
+
+BATCH_USERS = 500
+
+
+class Command(BaseCommand):
+    help = "Benchmark worksheet email delivery against a local fake Mailgun."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--deliveries", type=int, default=1000)
+        parser.add_argument(
+            "--mode", choices=("single", "batch", "both"), default="both"
+        )
+        parser.add_argument(
+            "--latency", type=float, default=0.05, help="Seconds per request."
+        )
+        parser.add_argument("--throttle-rate", type=float, default=0.0)
+        parser.add_argument("--error-rate", type=float, default=0.0)
+        parser.add_argument("--quota-per-minute", type=int, default=None)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        logging.getLogger("worksheet").setLevel(logging.CRITICAL)
+        modes = ("single", "batch") if options["mode"] == "both" else (options["mode"],)
+        content = build_worksheet()
+
+        with transaction.atomic():
+            users = User.objects.bulk_create(
+                User(email=f"bench-{i}@example.com")
+                for i in range(options["deliveries"])
+            )
+            for mode in modes:
+                self._run(mode, users, content, options)
+            transaction.set_rollback(True)
+
+    def _run(self, mode, users, content, options):
+        server = FakeMailgunServer(
+            latency=options["latency"],
+            throttle_rate=options["throttle_rate"],
+            error_rate=options["error_rate"],
+            quota_per_minute=options["quota_per_minute"],
+            seed=options["seed"],
+        )
+        base_url = server.start()
+        failed = 0
+        try:
+            with override_settings(
+                MAILGUN_BASE_URL=base_url,
+                MAILGUN_API_KEY="bench",
+                MAILGUN_DOMAIN="bench.example.com",
+            ):
+                close_mailgun_session()
+                start = time.perf_counter()
+                if mode == "single":
+                    for user in users:
+                        try:
+                            send_worksheet_email(user, content, theme=["Viajes"])
+                        except Exception:
+                            failed += 1
+                else:
+                    for first in range(0, len(users), BATCH_USERS):
+                        chunk = users[first : first + BATCH_USERS]  # noqa: E203
+                        failed += len(
+                            send_worksheet_emails(
+                                [(user, content, ["Viajes"]) for user in chunk]
+                            )
+                        )
+                elapsed = time.perf_counter() - start
+        finally:
+            close_mailgun_session()
+            server.stop()
+
+        served = ", ".join(
+            f"{o}={server.served[o]}" for o in OUTCOMES if server.served[o]
+        )
+        self.stdout.write(
+            f"{mode:>6}: {len(users) - failed}/{len(users)} delivered in "
+            f"{elapsed:.2f}s ({(len(users) - failed) / elapsed:.0f}/s), "
+            f"{server.requests} requests ({served}), "
+            f"{len(server.messages)} messages recorded"
+        )
@@ -0,0 +1,123 @@
+"""Micro-benchmark of worksheet email rendering.
+
+Times three ways of producing the HTML and text bodies for a full worksheet:
+the previous renderer (JSON parsed once per body, HTML built with ``+=``), the
+compiled single-parse renderer, and a resend that hits the content_hash cache.
+"""
+
+import json
+import logging
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.html import escape
+
+from worksheet.fake_llm import fill_schema
+from worksheet.services.email_render import WORKSHEETS_URL, render_worksheet_email
+from worksheet.services.exercise_items import (
+    ITEMS_PER_POOL,
+    exercise_prompt_for_display,
+)
+from worksheet.services.grammar_pools import GRAMMAR_POOLS
+from worksheet.services.grammar_rotator import POOLS_PER_WORKSHEET
+from worksheet.services.prompts import TRANSLATION_ITEMS, TRANSLATION_KEY
+from worksheet.services.worksheet_content import normalize_to_list
+
+
+def _legacy_html(content_json, theme):
+    data = json.loads(content_json)
+    sections = [(key.title(), normalize_to_list(value)) for key, value in data.items()]
+    random.shuffle(sections)
+    theme_display = ", ".join(theme)
+    safe_url = escape(WORKSHEETS_URL)
+    html_content = f"""
+        <html>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+            <h2 style="color: #2c3e50;">{escape(theme_display)}</h2>
+            <p style="margin: 16px 0 24px 0;">Do the worksheets online: <a href="{safe_url}">{safe_url}</a></p>
+        """
+    for section_title, sentences in sections:
+        html_content += f"""
+            <h3 style="color: #34495e; margin-top: 30px;">{escape(section_title)}</h3>
+            <div style="margin-left: 20px;">
+        """
+        for i, sentence in enumerate(sentences, 1):
+            escaped_sentence = escape(exercise_prompt_for_display(sentence))
+            html_content += (
+                f'                <p style="margin: 0 0 10px 0; white-space: pre-wrap;">'
+                f"{i}. {escaped_sentence}</p>\n"
+            )
+        html_content += """            </div>
+        """
+    html_content += """        </body>
+        </html>
+        """
+    return html_content
+
+
+def _legacy_text(content):
+    data = json.loads(content)
+    section_blocks = []
+    for section_num, (key, value) in enumerate(data.items(), 1):
+        lines = [f"{section_num}. {key.title()}:"]
+        for i, sentence in enumerate(normalize_to_list(value), 1):
+            lines.append(f"   {i}. {exercise_prompt_for_display(sentence)}")
+        section_blocks.append("\n".join(lines))
+    plain_text = "Your Spanish Worksheet\n\n"
+    plain_text += f"Do the worksheets online: {WORKSHEETS_URL}\n\n"
+    plain_text += "\n\n".join(section_blocks) + "\n"
+    return plain_text
+
+
+def build_worksheet() -> str:
+    schema = {
+        pool: [{}] * ITEMS_PER_POOL for pool in GRAMMAR_POOLS[:POOLS_PER_WORKSHEET]
+    }
+    schema[TRANSLATION_KEY] = [{}] * TRANSLATION_ITEMS
+    return json.dumps(fill_schema(schema), ensure_ascii=False)
+
+
+class Command(BaseCommand):
+    help = "Time worksheet email rendering: previous, compiled and cached."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--number", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        logging.getLogger("worksheet").setLevel(logging.CRITICAL)
+        number = options["number"]
+        content = build_worksheet()
+        theme = ["Viajes", "Comida"]
+
+        def legacy(i):
+            return _legacy_html(content, theme), _legacy_text(content)
+
+        def compiled(i):
+            return render_worksheet_email(content, theme)
+
+        def cached(i):
+            return render_worksheet_email(content, theme, content_hash="bench")
+
+        results = {}
+        for label, render in (
+            ("previous", legacy),
+            ("compiled", compiled),
+            ("cached", cached),
+        ):
+            start = time.perf_counter()
+            for i in range(number):
+                render(i)
+            results[label] = time.perf_counter() - start
+
+        for label, elapsed in results.items():
+            self.stdout.write(
+                f"{label:>9}: {elapsed:.2f}s for {number} renders "
+                f"({elapsed / number * 1e6:.0f}µs each)"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"compiled speedup: {results['previous'] / results['compiled']:.1f}x, "
+                f"cached: {results['previous'] / results['cached']:.1f}x"
+            )
+        )
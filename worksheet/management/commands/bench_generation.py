@@ -0,0 +1,81 @@
+"""Wall-clock comparison of single-call vs parallel per-section generation.
+
+Both modes run the real generation, parsing and validation code against the
+local fake LLM server, so the difference is the request layout alone.
+"""
+
+import logging
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from worksheet.fake_llm import FakeLLMServer
+from worksheet.services.generate import generate_worksheet_content
+from worksheet.services.grammar_pools import GRAMMAR_POOLS
+from worksheet.services.grammar_rotator import POOLS_PER_WORKSHEET
+from worksheet.services.llm_client import close_llm_clients
+from worksheet.services.prompts import THEME_POOLS
+
+
+class Command(BaseCommand):
+    help = "Benchmark single-call vs parallel per-section worksheet generation."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument(
+            "--latency", type=float, default=0.5, help="Seconds to first token."
+        )
+        parser.add_argument(
+            "--tokens-per-second",
+            type=float,
+            default=60.0,
+            help="Simulated output rate per request.",
+        )
+
+    def handle(self, *args, **options):
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        logging.getLogger("worksheet").setLevel(logging.WARNING)
+
+        server = FakeLLMServer(
+            latency=options["latency"],
+            tokens_per_second=options["tokens_per_second"],
+        )
+        base_url = server.start()
+        themes = THEME_POOLS[0]
+        pools = GRAMMAR_POOLS[:POOLS_PER_WORKSHEET]
+
+        results = {}
+        try:
+            with override_settings(
+                DEEPSEEK_BASE_URL=base_url,
+                DEEPSEEK_API_KEY="bench",
+                LLM_MAX_CONNECTIONS=POOLS_PER_WORKSHEET + 1,
+            ):
+                close_llm_clients()
+                for label, parallel in (("single", False), ("parallel", True)):
+                    timings = []
+                    for _ in range(options["runs"]):
+                        start = time.perf_counter()
+                        content = generate_worksheet_content(
+                            themes, pools, parallel=parallel
+                        )
+                        timings.append(time.perf_counter() - start)
+                        if content is None:
+                            self.stderr.write(f"{label}: generation failed")
+                    results[label] = timings
+        finally:
+            close_llm_clients()
+            server.stop()
+
+        for label, timings in results.items():
+            self.stdout.write(
+                f"{label:>8}: median {statistics.median(timings):.2f}s "
+                f"min {min(timings):.2f}s max {max(timings):.2f}s "
+                f"({len(timings)} runs)"
+            )
+        speedup = statistics.median(results["single"]) / statistics.median(
+            results["parallel"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"parallel speedup: {speedup:.1f}x"))
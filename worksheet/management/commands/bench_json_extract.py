@@ -0,0 +1,100 @@
+"""Micro-benchmark of extract_json_from_response over malformed LLM replies.
+
+The corpus mirrors what the model actually returns: clean JSON, fenced JSON,
+JSON wrapped in prose, trailing commas, truncated replies, smart quotes,
+schema echoes before the answer, and plain refusals. Each case is timed with
+the current extractor and with the previous three-step version
+(parse as-is, fenced-block regex, greedy object regex).
+"""
+
+import json
+import logging
+import re
+import statistics
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from worksheet.fake_llm import fill_schema
+from worksheet.services.exercise_items import ITEMS_PER_POOL
+from worksheet.services.generate import extract_json_from_response
+from worksheet.services.grammar_pools import GRAMMAR_POOLS
+from worksheet.services.grammar_rotator import POOLS_PER_WORKSHEET
+from worksheet.services.prompts import TRANSLATION_ITEMS, TRANSLATION_KEY
+
+
+def _legacy_extract(content: str) -> str | None:
+    try:
+        json.loads(content)
+        return content
+    except json.JSONDecodeError:
+        pass
+    match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", content, re.DOTALL)
+    if match:
+        try:
+            json.loads(match.group(1))
+            return match.group(1)
+        except json.JSONDecodeError:
+            pass
+    match = re.search(r"\{.*\}", content, re.DOTALL)
+    if match:
+        try:
+            json.loads(match.group(0))
+            return match.group(0)
+        except json.JSONDecodeError:
+            pass
+    return None
+
+
+def build_corpus() -> dict[str, str]:
+    schema = {
+        pool: [{}] * ITEMS_PER_POOL for pool in GRAMMAR_POOLS[:POOLS_PER_WORKSHEET]
+    }
+    schema[TRANSLATION_KEY] = [{}] * TRANSLATION_ITEMS
+    text = json.dumps(fill_schema(schema), ensure_ascii=False, indent=2)
+    prose = "Here is the worksheet you asked for, following every rule. " * 20
+    return {
+        "clean": text,
+        "fenced": f"```json\n{text}\n```",
+        "prose around": f"{prose}\n{text}\n\nLet me know if you need changes!",
+        "schema echo": f"Schema: {{prompt, answer}}\n```json\n{text}\n```",
+        "trailing commas": text.replace('"\n      ]', '",\n      ]'),
+        "truncated": text[: len(text) * 2 // 3],
+        "smart quotes": text.replace('"prompt"', "“prompt”"),
+        "placeholders": "Each {prompt} has one ___ and an {answer}. " * 200 + text,
+        "refusal": "I'm sorry, I can't produce that worksheet. " * 50,
+    }
+
+
+class Command(BaseCommand):
+    help = "Time extract_json_from_response against the previous regex extractor."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--number", type=int, default=200)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        logging.getLogger("worksheet").setLevel(logging.CRITICAL)
+        number, repeat = options["number"], options["repeat"]
+
+        self.stdout.write(
+            f"{'case':>16} {'chars':>7} {'legacy µs':>10} {'current µs':>11}  found"
+        )
+        for name, content in build_corpus().items():
+            timings = {}
+            for label, extract in (
+                ("legacy", _legacy_extract),
+                ("current", extract_json_from_response),
+            ):
+                runs = timeit.repeat(
+                    lambda: extract(content), number=number, repeat=repeat
+                )
+                timings[label] = statistics.median(runs) / number * 1e6
+            found = (
+                _legacy_extract(content) is not None,
+                extract_json_from_response(content) is not None,
+            )
+            self.stdout.write(
+                f"{name:>16} {len(content):>7} {timings['legacy']:>10.1f} "
+                f"{timings['current']:>11.1f}  {found[0]!s:>5}/{found[1]!s}"
+            )
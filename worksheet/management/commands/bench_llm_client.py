@@ -0,0 +1,102 @@
+"""Compare per-call overhead of a fresh OpenAI client vs the pooled client.
+
+Runs against a throwaway local chat-completions endpoint so only client
+construction and connection setup are measured, not model latency.
+"""
+
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from openai import OpenAI
+
+from worksheet.services.llm_client import close_llm_clients, get_llm_client
+
+_COMPLETION = json.dumps(
+    {
+        "id": "bench",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "bench",
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": "{}"},
+                "finish_reason": "stop",
+            }
+        ],
+    }
+).encode("utf-8")
+
+
+class _CompletionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(_COMPLETION)))
+        self.end_headers()
+        self.wfile.write(_COMPLETION)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _ms_per_call(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) * 1000 / calls
+
+
+class Command(BaseCommand):
+    help = "Benchmark per-call LLM client overhead (fresh client vs pooled client)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--calls", type=int, default=200)
+
+    def handle(self, *args, **options):
+        calls = options["calls"]
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _CompletionHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        messages = [{"role": "user", "content": "ping"}]
+
+        def fresh_call():
+            client = OpenAI(
+                api_key="bench", base_url=base_url, timeout=settings.LLM_TIMEOUT
+            )
+            client.chat.completions.create(model="bench", messages=messages)
+            client.close()
+
+        def pooled_call():
+            get_llm_client().chat.completions.create(model="bench", messages=messages)
+
+        try:
+            with override_settings(
+                DEEPSEEK_BASE_URL=base_url, DEEPSEEK_API_KEY="bench"
+            ):
+                close_llm_clients()
+                fresh_call()
+                pooled_call()
+                fresh_ms = _ms_per_call(fresh_call, calls)
+                pooled_ms = _ms_per_call(pooled_call, calls)
+        finally:
+            close_llm_clients()
+            server.shutdown()
+
+        self.stdout.write(f"calls per mode: {calls}")
+        self.stdout.write(f"fresh client:  {fresh_ms:.2f} ms/call")
+        self.stdout.write(f"pooled client: {pooled_ms:.2f} ms/call")
+        self.stdout.write(
+            self.style.SUCCESS(f"overhead saved: {fresh_ms - pooled_ms:.2f} ms/call")
+        )
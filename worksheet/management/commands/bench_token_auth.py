@@ -0,0 +1,101 @@
+"""Requests per second on the job status endpoint, with and without token caching.
+
+Creates a throwaway user and token (rolled back afterwards) and a finished
+RQ job owned by that user, then polls ``/api/worksheet/delivery/<job_id>/``
+through the full Django/DRF stack: once with DRF's ``TokenAuthentication``
+and once with ``CachedTokenAuthentication``. ``--path`` polls another
+endpoint instead (e.g. ``/api/worksheet/``), which needs no RQ job.
+"""
+
+import logging
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+from django_rq import get_queue
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.views import APIView
+from rq.job import Job
+
+from users.authentication import CachedTokenAuthentication, invalidate_token
+from users.models import User
+
+AUTH_CLASSES = (
+    ("database", TokenAuthentication),
+    ("cached", CachedTokenAuthentication),
+)
+
+
+class Command(BaseCommand):
+    help = "Benchmark API polling throughput with database vs cached token auth."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument(
+            "--path", default=None, help="Endpoint to poll (default: job status)."
+        )
+
+    def handle(self, *args, **options):
+        logging.getLogger("worksheet").setLevel(logging.CRITICAL)
+        logging.getLogger("django.request").setLevel(logging.ERROR)
+        number = options["requests"]
+
+        with transaction.atomic():
+            user = User.objects.create_user(email="bench-auth@example.com")
+            token = Token.objects.create(user=user)
+            job = None
+            path = options["path"]
+            if path is None:
+                job = self._finished_job(user)
+                path = reverse("delivery-status", args=[job.id])
+            try:
+                results = {
+                    label: self._run(auth_class, path, token.key, number)
+                    for label, auth_class in AUTH_CLASSES
+                }
+            finally:
+                if job is not None:
+                    job.delete()
+                invalidate_token(token.key)
+            transaction.set_rollback(True)
+
+        for label, (elapsed, queries, status_code) in results.items():
+            self.stdout.write(
+                f"{label:>9}: {number / elapsed:.0f} req/s "
+                f"({elapsed / number * 1e6:.0f}µs each, "
+                f"{queries} queries/request, HTTP {status_code})"
+            )
+        speedup = results["database"][0] / results["cached"][0]
+        self.stdout.write(self.style.SUCCESS(f"cached speedup: {speedup:.2f}x"))
+
+    def _finished_job(self, user) -> Job:
+        job = Job.create(
+            func="builtins.len",
+            args=([],),
+            connection=get_queue("default").connection,
+        )
+        job.meta["user_id"] = user.id
+        job.save()
+        return job
+
+    def _run(self, auth_class, path, key, number):
+        client = Client(HTTP_AUTHORIZATION=f"Token {key}")
+        with mock.patch.object(APIView, "authentication_classes", [auth_class]):
+            # Warm up (fills the cache for the cached class) and count queries;
+            # the query log is reset per request, so count with a wrapper.
+            client.get(path)
+            queries = []
+            with connection.execute_wrapper(
+                lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)
+            ):
+                response = client.get(path)
+
+            start = time.perf_counter()
+            for _ in range(number):
+                client.get(path)
+            elapsed = time.perf_counter() - start
+        return elapsed, len(queries), response.status_code
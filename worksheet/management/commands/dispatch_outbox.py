@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from worksheet.models import EmailOutbox
+from worksheet.services.outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    help = "Send due worksheet emails from the outbox (optionally forever)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling, as a dedicated dispatcher process.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=10.0,
+            help="Seconds to wait between polls once the outbox is empty.",
+        )
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            totals = drain_outbox(batch_size=options["batch_size"])
+            if any(totals.values()) or not options["loop"]:
+                self.stdout.write(
+                    f"{totals['sent']} sent, {totals['retrying']} retrying, "
+                    f"{totals['dead']} dead-lettered; "
+                    f"{EmailOutbox.objects.filter(status=EmailOutbox.PENDING).count()} "
+                    f"pending"
+                )
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
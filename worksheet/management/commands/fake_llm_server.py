@@ -0,0 +1,55 @@
+"""Run the local fake LLM server until interrupted.
+
+Point the app at it with DEEPSEEK_BASE_URL=http://127.0.0.1:<port> (any
+DEEPSEEK_API_KEY works) to exercise generation, validation, persistence and
+email end to end without a real provider.
+"""
+
+from django.core.management.base import BaseCommand
+
+from worksheet.fake_llm import LATENCY_DISTRIBUTIONS, OUTCOMES, FakeLLMServer
+
+
+class Command(BaseCommand):
+    help = "Serve an OpenAI-compatible fake LLM with configurable latency and faults."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=8001)
+        parser.add_argument(
+            "--latency", type=float, default=0.5, help="Mean seconds to first token."
+        )
+        parser.add_argument(
+            "--distribution", choices=LATENCY_DISTRIBUTIONS, default="fixed"
+        )
+        parser.add_argument("--tokens-per-second", type=float, default=60.0)
+        parser.add_argument("--malformed-rate", type=float, default=0.0)
+        parser.add_argument("--missing-blank-rate", type=float, default=0.0)
+        parser.add_argument("--error-rate", type=float, default=0.0)
+        parser.add_argument("--error-status", type=int, default=500)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        server = FakeLLMServer(
+            port=options["port"],
+            latency=options["latency"],
+            tokens_per_second=options["tokens_per_second"],
+            latency_distribution=options["distribution"],
+            malformed_rate=options["malformed_rate"],
+            missing_blank_rate=options["missing_blank_rate"],
+            error_rate=options["error_rate"],
+            error_status=options["error_status"],
+            seed=options["seed"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Fake LLM listening: DEEPSEEK_BASE_URL={server.base_url}"
+            )
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            served = ", ".join(f"{o}={server.served[o]}" for o in OUTCOMES)
+            self.stdout.write(f"Served: {served}")
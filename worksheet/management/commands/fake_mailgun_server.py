@@ -0,0 +1,58 @@
+"""Run the local fake Mailgun server until interrupted.
+
+Point the app at it with MAILGUN_BASE_URL=http://127.0.0.1:<port> (any
+MAILGUN_API_KEY and MAILGUN_DOMAIN work) to deliver worksheets end to end
+without sending real email.
+"""
+
+from django.core.management.base import BaseCommand
+
+from worksheet.fake_mailgun import OUTCOMES, FakeMailgunServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve a Mailgun-compatible messages API with configurable latency and faults."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=8002)
+        parser.add_argument(
+            "--latency", type=float, default=0.05, help="Seconds per request."
+        )
+        parser.add_argument("--throttle-rate", type=float, default=0.0)
+        parser.add_argument("--error-rate", type=float, default=0.0)
+        parser.add_argument("--error-status", type=int, default=500)
+        parser.add_argument(
+            "--quota-per-minute",
+            type=int,
+            default=None,
+            help="Messages accepted per rolling minute before 429s.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        server = FakeMailgunServer(
+            port=options["port"],
+            latency=options["latency"],
+            throttle_rate=options["throttle_rate"],
+            error_rate=options["error_rate"],
+            error_status=options["error_status"],
+            quota_per_minute=options["quota_per_minute"],
+            seed=options["seed"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Fake Mailgun listening: MAILGUN_BASE_URL={server.base_url}"
+            )
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            served = ", ".join(f"{o}={server.served[o]}" for o in OUTCOMES)
+            self.stdout.write(
+                f"Served: {served}; {len(server.messages)} messages recorded"
+            )
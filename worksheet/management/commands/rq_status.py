@@ -1,33 +1,42 @@
-"""Inspect RQ default queue (depth, started, failed) for production debugging."""
+"""Inspect every RQ queue (depth, registries, workers) for production debugging."""
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django_rq import get_queue
+from rq import Worker
 
 
 class Command(BaseCommand):
-    help = "Print RQ queue depth and registry counts for the default queue."
+    help = "Print depth, registry counts and workers for each queue in RQ_QUEUES."
 
     def handle(self, *args, **options):
-        q = get_queue("default")
-        self.stdout.write(f"default queue length (waiting): {len(q)}")
+        for name, queue_config in settings.RQ_QUEUES.items():
+            q = get_queue(name)
+            workers = Worker.count(queue=q)
+            expected = queue_config.get("WORKERS")
+            self.stdout.write(
+                f"[{name}] timeout {queue_config.get('DEFAULT_TIMEOUT')}s"
+            )
+            self.stdout.write(f"  queue length (waiting): {len(q)}")
+            self.stdout.write(f"  workers: {workers} (configured: {expected})")
 
-        for name in (
-            "started_job_registry",
-            "deferred_job_registry",
-            "scheduled_job_registry",
-        ):
-            reg = getattr(q, name, None)
-            if reg is not None:
-                self.stdout.write(f"{name}: {reg.count}")
+            for registry in (
+                "started_job_registry",
+                "deferred_job_registry",
+                "scheduled_job_registry",
+            ):
+                reg = getattr(q, registry, None)
+                if reg is not None:
+                    self.stdout.write(f"  {registry}: {reg.count}")
 
-        failed = getattr(q, "failed_job_registry", None)
-        if failed is not None:
-            self.stdout.write(f"failed_job_registry: {failed.count}")
-            try:
-                ids = failed.get_job_ids()
-            except AttributeError:
-                ids = []
-            if ids:
-                self.stdout.write("recent failed job ids (up to 10):")
-                for jid in ids[:10]:
-                    self.stdout.write(f"  {jid}")
+            failed = getattr(q, "failed_job_registry", None)
+            if failed is not None:
+                self.stdout.write(f"  failed_job_registry: {failed.count}")
+                try:
+                    ids = failed.get_job_ids()
+                except AttributeError:
+                    ids = []
+                if ids:
+                    self.stdout.write("  recent failed job ids (up to 10):")
+                    for jid in ids[:10]:
+                        self.stdout.write(f"    {jid}")
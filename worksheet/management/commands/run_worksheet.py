@@ -1,27 +1,184 @@
+import logging
+import time
+from concurrent.futures import (
+    ALL_COMPLETED,
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    wait,
+)
+from datetime import timedelta
+
 from django.core.management.base import BaseCommand
-from users.models import User
-from worksheet.services.generate import generate_worksheet_for
-from worksheet.services.email import send_worksheet_email
-from worksheet.models import Worksheet
+from django.db import connections
 from django.utils import timezone
-from datetime import timedelta
+from django_rq import enqueue
+
+from users.models import User
+from worksheet.batch import delivery_batch_job
+from worksheet.services.outbox import drain_outbox
+from worksheet.services.stock import (
+    DELIVERY_INTERVAL_DAYS,
+    claim_or_generate_worksheet_for,
+)
+
+logger = logging.getLogger(__name__)
+
+# Users whose next_delivery is advanced per UPDATE; also bounds how much work
+# is redone if the run dies part-way.
+NEXT_DELIVERY_BATCH = 500
+# Users prepared between outbox dispatch passes (Mailgun batch sending).
+EMAIL_BATCH_USERS = 500
+
+
+def prepare_worksheet(user) -> bool:
+    """Claim or generate the user's worksheet, queueing its email in the outbox."""
+    return claim_or_generate_worksheet_for(user, deliver=True) is not None
+
+
+def _prepare_in_thread(user):
+    try:
+        return prepare_worksheet(user)
+    finally:
+        # Worker threads open their own connections; don't leak one per thread.
+        connections.close_all()
+
+
+def _load_in_batches(user_ids: list[int]):
+    """Full user rows, NEXT_DELIVERY_BATCH at a time, each batch fetched whole."""
+    for start in range(0, len(user_ids), NEXT_DELIVERY_BATCH):
+        batch = user_ids[start : start + NEXT_DELIVERY_BATCH]  # noqa: E203
+        yield from list(User.objects.filter(id__in=batch).order_by("id"))
 
 
 class Command(BaseCommand):
+    help = "Deliver today's worksheets to every active user due today."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Users delivered at once (LLM and email I/O overlap).",
+        )
+        parser.add_argument(
+            "--rq",
+            action="store_true",
+            help="Fan out one job per user to the RQ workers instead.",
+        )
+        parser.add_argument(
+            "--progress-every",
+            type=int,
+            default=50,
+            help="Report progress after this many users.",
+        )
+
     def handle(self, *args, **options):
+        if options["rq"]:
+            job = enqueue(delivery_batch_job)
+            self.stdout.write(
+                self.style.SUCCESS(f"Enqueued delivery batch job {job.id}")
+            )
+            return
+
         today = timezone.now().date()
-        users = User.objects.filter(active=True, next_delivery=today)
-
-        for u in users:
-            content = generate_worksheet_for(u)
-            if content:
-                # Get the worksheet to retrieve themes
-                worksheet = (
-                    Worksheet.objects.filter(user=u).order_by("-created_at").first()
-                )
-                themes = worksheet.themes if worksheet and worksheet.themes else None
-                send_worksheet_email(u, content, theme=themes)
-            u.next_delivery = today + timedelta(days=2)
-            u.save()
-
-        self.stdout.write(self.style.SUCCESS("Done"))
+        self.next_delivery = today + timedelta(days=DELIVERY_INTERVAL_DAYS)
+        self.progress_every = max(1, options["progress_every"])
+        self.started = time.monotonic()
+        # failed counts users; sent, retrying and dead count outbox emails,
+        # which may include rows left over from earlier runs.
+        self.done = self.failed = 0
+        self.sent = self.retrying = self.dead = 0
+        self.prepared = 0
+        self.pending_ids: list[int] = []
+
+        # Snapshot the due IDs first: next_delivery is updated during the run,
+        # which must not happen under an open cursor filtering on it.
+        user_ids = list(
+            User.objects.filter(active=True, next_delivery=today)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        users = _load_in_batches(user_ids)
+        concurrency = max(1, options["concurrency"])
+        if concurrency == 1:
+            for user in users:
+                self._record(user, self._run(prepare_worksheet, user))
+        else:
+            self._deliver_concurrently(users, concurrency)
+
+        self._flush_emails()
+        self._flush_next_delivery()
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done: {self.done} users ({self.failed} failed); emails: "
+                f"{self.sent} sent, {self.retrying} retrying, {self.dead} dead; "
+                f"in {elapsed:.1f}s, {self._per_minute():.1f} users/min"
+            )
+        )
+
+    def _deliver_concurrently(self, users, concurrency: int):
+        # Keep a bounded number of users in flight so users keep loading in
+        # batches instead of being materialised into futures up front.
+        in_flight = {}
+        with ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="deliver"
+        ) as pool:
+            for user in users:
+                if len(in_flight) >= concurrency * 2:
+                    self._collect(in_flight, FIRST_COMPLETED)
+                future = pool.submit(self._run, _prepare_in_thread, user)
+                in_flight[future] = user
+            self._collect(in_flight, ALL_COMPLETED)
+
+    def _collect(self, in_flight: dict, return_when):
+        finished, _ = wait(in_flight, return_when=return_when)
+        for future in finished:
+            self._record(in_flight.pop(future), future.result())
+
+    def _run(self, prepare, user):
+        """None means the worksheet could not be prepared; the batch carries on."""
+        try:
+            return prepare(user)
+        except Exception:
+            logger.exception("Delivery failed for %s", user.email)
+            return None
+
+    def _record(self, user, prepared):
+        self.done += 1
+        if prepared is None:
+            self.failed += 1
+        elif prepared:
+            self.prepared += 1
+            if self.prepared >= EMAIL_BATCH_USERS:
+                self._flush_emails()
+        # Advanced even when delivery fails (as failed generation always was).
+        self.pending_ids.append(user.id)
+        if len(self.pending_ids) >= NEXT_DELIVERY_BATCH:
+            self._flush_next_delivery()
+        if self.done % self.progress_every == 0:
+            self.stdout.write(
+                f"{self.done} users processed ({self.failed} failed, "
+                f"{self.sent} emails sent), {self._per_minute():.1f} users/min"
+            )
+
+    def _flush_emails(self):
+        # Failed sends stay in the outbox for the dispatcher to retry.
+        if not self.prepared:
+            return
+        totals = drain_outbox()
+        self.sent += totals["sent"]
+        self.retrying += totals["retrying"]
+        self.dead += totals["dead"]
+        self.prepared = 0
+
+    def _flush_next_delivery(self):
+        if self.pending_ids:
+            User.objects.filter(id__in=self.pending_ids).update(
+                next_delivery=self.next_delivery
+            )
+            self.pending_ids = []
+
+    def _per_minute(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.done / elapsed * 60 if elapsed > 0 else 0.0
@@ -0,0 +1,52 @@
+"""Print the shared counters recorded by web and worker processes."""
+
+from django.core.management.base import BaseCommand
+
+from users.authentication import CACHE_OUTCOMES as AUTH_OUTCOMES
+from worksheet.services import mailgun, metrics, rate_limit
+from worksheet.services.custom_cache import CACHE_OUTCOMES
+from worksheet.services.generate import JSON_PATHS
+from worksheet.services.latest_worksheet import CACHE_OUTCOMES as LATEST_OUTCOMES
+from worksheet.services.outbox import DISPATCH_OUTCOMES
+
+
+def _metric_groups() -> dict[str, list[str]]:
+    return {
+        "LLM JSON parsing": [f"json.{path}" for path in JSON_PATHS],
+        "Custom exercise cache": [f"custom_cache.{o}" for o in CACHE_OUTCOMES],
+        "Token auth cache": [f"auth_token.{o}" for o in AUTH_OUTCOMES],
+        "Latest worksheet cache": [f"latest_worksheet.{o}" for o in LATEST_OUTCOMES],
+        "Mailgun responses": [f"mailgun.status.{c}" for c in mailgun.STATUS_CLASSES],
+        "Mailgun latency": [f"mailgun.latency.{b}" for b in mailgun.latency_buckets()],
+        "Mailgun retries": [f"mailgun.{o}" for o in mailgun.RETRY_OUTCOMES],
+        "Email outbox": [f"outbox.{o}" for o in DISPATCH_OUTCOMES],
+        "DeepSeek rate limit waits": [
+            f"rate_limit.deepseek.{b}" for b in rate_limit.wait_buckets()
+        ],
+        "Mailgun rate limit waits": [
+            f"rate_limit.mailgun.{b}" for b in rate_limit.wait_buckets()
+        ],
+        "Rate limit wait (ms)": [
+            f"rate_limit.{p}.wait_ms" for p in ("deepseek", "mailgun")
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = "Print worksheet counters (e.g. which JSON repair path succeeded)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset", action="store_true", help="Zero the counters after printing."
+        )
+
+    def handle(self, *args, **options):
+        for title, names in _metric_groups().items():
+            values = metrics.snapshot(names)
+            total = sum(values.values())
+            self.stdout.write(title)
+            for name in names:
+                share = f" ({values[name] / total:.0%})" if total else ""
+                self.stdout.write(f"  {name}: {values[name]}{share}")
+            if options["reset"]:
+                metrics.reset(names)
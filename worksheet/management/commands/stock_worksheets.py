@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from worksheet.jobs import stock_worksheets_job
+from worksheet.models import StockedWorksheet
+from worksheet.services.stock import deliveries_due, stock_worksheets
+
+
+class Command(BaseCommand):
+    help = "Pre-generate worksheets for deliveries due within the stock horizon."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int, default=None, help="Generate at most this many."
+        )
+        parser.add_argument(
+            "--enqueue",
+            action="store_true",
+            help="Run on the RQ worker instead of in this process.",
+        )
+
+    def handle(self, *args, **options):
+        if options["enqueue"]:
+            job = stock_worksheets_job.delay(options["limit"])
+            self.stdout.write(self.style.SUCCESS(f"Enqueued stocking job {job.id}"))
+            return
+
+        added = stock_worksheets(limit=options["limit"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Added {added}; {StockedWorksheet.objects.count()} stocked "
+                f"for {deliveries_due()} upcoming deliveries"
+            )
+        )
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("worksheet", "0004_worksheet_themes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StockedWorksheet",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("content_hash", models.CharField(max_length=64, unique=True)),
+                ("content", models.TextField()),
+                ("topics", models.JSONField(blank=True, null=True)),
+                ("themes", models.JSONField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,93 @@
+import json
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def _decode(value):
+    try:
+        return json.loads(value)
+    except (TypeError, json.JSONDecodeError):
+        # Keep unreadable legacy content as a JSON string rather than lose it.
+        return value
+
+
+def _encode(value):
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _copy(apps, model_name, source, target, convert):
+    model = apps.get_model("worksheet", model_name)
+    batch = []
+    for row in model.objects.only("id", source).iterator(chunk_size=BATCH_SIZE):
+        value = getattr(row, source)
+        if value is None:
+            continue
+        setattr(row, target, convert(value))
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_update(batch, [target])
+            batch = []
+    if batch:
+        model.objects.bulk_update(batch, [target])
+
+
+def backfill_json(apps, schema_editor):
+    for model_name in ("Worksheet", "StockedWorksheet"):
+        _copy(apps, model_name, "content", "content_json", _decode)
+
+
+def restore_text(apps, schema_editor):
+    for model_name in ("Worksheet", "StockedWorksheet"):
+        _copy(apps, model_name, "content_json", "content", _encode)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("worksheet", "0006_emailoutbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="worksheet",
+            name="content_json",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="stockedworksheet",
+            name="content_json",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="stockedworksheet",
+            name="content",
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_json, restore_text),
+        migrations.RemoveField(
+            model_name="worksheet",
+            name="content",
+        ),
+        migrations.RemoveField(
+            model_name="stockedworksheet",
+            name="content",
+        ),
+        migrations.RenameField(
+            model_name="worksheet",
+            old_name="content_json",
+            new_name="content",
+        ),
+        migrations.RenameField(
+            model_name="stockedworksheet",
+            old_name="content_json",
+            new_name="content",
+        ),
+        migrations.AlterField(
+            model_name="stockedworksheet",
+            name="content",
+            field=models.JSONField(),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("worksheet", "0007_content_jsonfield"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="worksheet",
+            index=models.Index(
+                fields=["user", "-created_at"], name="worksheet_w_user_id_5dc1ea_idx"
+            ),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 from users.models import User
 
@@ -8,15 +9,63 @@ class Worksheet(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     content_hash = models.CharField(max_length=64, unique=True)
-    content = models.TextField(null=True, blank=True)
+    content = models.JSONField(null=True, blank=True)
 
     topics = models.JSONField(null=True, blank=True)
     themes = models.JSONField(null=True, blank=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["user", "-created_at"])]
+
     def __str__(self):
         return f"{self.user.email} - {self.created_at.date()}"
 
 
+class StockedWorksheet(models.Model):
+    """Pre-generated worksheet waiting to be claimed by a delivery."""
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    content_hash = models.CharField(max_length=64, unique=True)
+    content = models.JSONField()
+
+    topics = models.JSONField(null=True, blank=True)
+    themes = models.JSONField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Stocked {self.created_at.date()} - {self.topics}"
+
+
+class EmailOutbox(models.Model):
+    """
+    A worksheet email waiting to be sent, written in the same transaction as
+    its worksheet. Dispatchers lease due rows, send them and mark the outcome.
+    """
+
+    PENDING = "pending"
+    SENT = "sent"
+    DEAD = "dead"
+    STATUS_CHOICES = [(PENDING, "Pending"), (SENT, "Sent"), (DEAD, "Dead")]
+
+    worksheet = models.ForeignKey(
+        Worksheet, on_delete=models.CASCADE, related_name="emails"
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    leased_until = models.DateTimeField(null=True, blank=True)
+    lease_token = models.UUIDField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "available_at"])]
+
+    def __str__(self):
+        return f"Email for worksheet {self.worksheet_id} ({self.status})"
+
+
 class Config(models.Model):
     key = models.CharField(max_length=50, unique=True)
     value = models.CharField(max_length=200)
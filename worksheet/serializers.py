@@ -1,10 +1,16 @@
 from rest_framework import serializers
 
+GENERATION_MODES = ("sync", "async")
+
 
 class GenerateLLMContentRequestSerializer(serializers.Serializer):
     themes = serializers.ListField(
         child=serializers.CharField(), required=False, allow_empty=True
     )
+    # "async" enqueues an RQ job and returns 202 with a job id to poll.
+    mode = serializers.ChoiceField(
+        choices=GENERATION_MODES, required=False, default="sync"
+    )
 
 
 class GenerateLLMContentResponseSerializer(serializers.Serializer):
@@ -13,6 +19,9 @@ class GenerateLLMContentResponseSerializer(serializers.Serializer):
 
 class GenerateCustomWorksheetRequestSerializer(serializers.Serializer):
     request = serializers.CharField(min_length=5, max_length=300)
+    mode = serializers.ChoiceField(
+        choices=GENERATION_MODES, required=False, default="sync"
+    )
 
     def validate_request(self, value):
         value = value.strip()
@@ -28,3 +37,9 @@ class GenerateCustomWorksheetResponseSerializer(serializers.Serializer):
 
 class GenerateWorksheetResponseSerializer(serializers.Serializer):
     content = serializers.CharField()
+
+
+class GenerationJobResponseSerializer(serializers.Serializer):
+    message = serializers.CharField()
+    job_id = serializers.CharField()
+    status_url = serializers.CharField()
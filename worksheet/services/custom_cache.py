@@ -0,0 +1,154 @@
+"""Result cache and single-flight for custom exercise requests.
+
+Results are cached under the normalized request text and a fingerprint of the
+custom prompt, so editing the prompt invalidates old entries. Hits slide the
+TTL forward; with Redis configured as ``maxmemory-policy allkeys-lru`` the
+least recently used entries are evicted first when memory runs out.
+
+Only one process generates a given request at a time: the first caller takes a
+short-lived lock and calls the LLM, concurrent identical callers wait for its
+result instead of making their own call. Web requests wait at most
+``CUSTOM_EXERCISE_SYNC_WAIT`` seconds (well inside the gunicorn timeout) and
+are then told to retry. With Redis the lock is a plain key
+released by a compare-and-delete script, so a holder whose lock expired never
+deletes its successor's.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import time
+import unicodedata
+import uuid
+from functools import lru_cache
+
+import django_rq
+from django.conf import settings
+from django.core.cache import cache
+
+from worksheet.services import metrics
+from worksheet.services.generate import generate_custom_exercises
+from worksheet.services.prompts import build_custom_payload
+
+logger = logging.getLogger(__name__)
+
+CACHE_OUTCOMES = ("hit", "miss", "coalesced")
+
+WAIT_POLL_SECONDS = 0.2
+
+_TRAILING_PUNCTUATION = ".!?¡¿,;: "
+
+# Delete the lock only if it still holds our token.
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_release_script = None
+
+
+class CustomGenerationInProgress(Exception):
+    """An identical request was still generating when the caller's wait ran out."""
+
+
+def normalize_request_text(request_text: str) -> str:
+    """Case, spacing and surrounding punctuation do not change the exercises."""
+    text = unicodedata.normalize("NFKC", request_text).casefold()
+    text = re.sub(r"\s+", " ", text)
+    return text.strip(_TRAILING_PUNCTUATION)
+
+
+@lru_cache(maxsize=1)
+def custom_prompt_version() -> str:
+    payload = json.dumps(build_custom_payload("{request}"), sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def custom_cache_key(request_text: str) -> str:
+    normalized = normalize_request_text(request_text)
+    digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+    return f"custom:{custom_prompt_version()}:{digest}"
+
+
+def get_or_generate_custom_exercises(
+    request_text: str, max_wait: float | None = None
+) -> dict | None:
+    """
+    Return cached exercises for an equivalent request, wait for an identical
+    in-flight generation, or generate (and cache) them.
+
+    With ``max_wait`` set, raise ``CustomGenerationInProgress`` once that many
+    seconds pass without the in-flight result; otherwise wait for up to the
+    lock timeout and then generate anyway.
+    """
+    key = custom_cache_key(request_text)
+    lock_key = f"{key}:lock"
+    ttl = settings.CUSTOM_EXERCISE_CACHE_TTL
+    wait_limit = settings.CUSTOM_EXERCISE_LOCK_TIMEOUT if max_wait is None else max_wait
+    deadline = time.monotonic() + wait_limit
+    waited = False
+
+    token = uuid.uuid4().hex
+    while True:
+        cached = cache.get(key)
+        if cached is not None:
+            cache.touch(key, ttl)
+            metrics.incr("custom_cache.coalesced" if waited else "custom_cache.hit")
+            logger.info("Custom exercises served from cache")
+            return cached
+
+        if _acquire(lock_key, token):
+            # The previous holder may have stored its result since the get above.
+            if cache.get(key) is None:
+                break
+            _release(lock_key, token)
+            continue
+        if time.monotonic() >= deadline:
+            if max_wait is not None:
+                raise CustomGenerationInProgress(request_text)
+            logger.warning("Gave up waiting for in-flight custom generation")
+            break
+        if not waited:
+            logger.info("Waiting for identical in-flight custom generation")
+        waited = True
+        time.sleep(WAIT_POLL_SECONDS)
+
+    metrics.incr("custom_cache.miss")
+    try:
+        content = generate_custom_exercises(request_text)
+        if content is not None:
+            cache.set(key, content, timeout=ttl)
+        return content
+    finally:
+        _release(lock_key, token)
+
+
+def _uses_redis() -> bool:
+    return settings.CACHES["default"]["BACKEND"].endswith("RedisCache")
+
+
+def _acquire(lock_key: str, token: str) -> bool:
+    timeout = settings.CUSTOM_EXERCISE_LOCK_TIMEOUT
+    if _uses_redis():
+        connection = django_rq.get_connection("default")
+        return bool(connection.set(lock_key, token, nx=True, ex=timeout))
+    return cache.add(lock_key, token, timeout=timeout)
+
+
+def _release(lock_key: str, token: str) -> None:
+    global _release_script
+    if _uses_redis():
+        if _release_script is None:
+            connection = django_rq.get_connection("default")
+            _release_script = connection.register_script(_RELEASE_SCRIPT)
+        _release_script(keys=[lock_key], args=[token])
+    elif cache.get(lock_key) == token:
+        # Local caches are per process (tests, local runs); no other host races.
+        cache.delete(lock_key)
+
+
+def custom_cache_stats() -> dict[str, int]:
+    return metrics.snapshot([f"custom_cache.{outcome}" for outcome in CACHE_OUTCOMES])
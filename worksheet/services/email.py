@@ -1,209 +1,162 @@
 import json
 import logging
-import random
-import requests
+
 from django.conf import settings
-from django.utils.html import escape
 
-from worksheet.services.exercise_items import exercise_prompt_for_display
+from worksheet.services import mailgun
+from worksheet.services.email_render import DEFAULT_TITLE, render_worksheet_email
 
 logger = logging.getLogger(__name__)
 
-WORKSHEETS_URL = "https://michaelsavage.ie/worksheets"
-
-
-def _worksheet_link_html() -> str:
-    safe_url = escape(WORKSHEETS_URL)
-    return (
-        f'<p style="margin: 16px 0 24px 0;">'
-        f"Do the worksheets online: "
-        f'<a href="{safe_url}">{safe_url}</a>'
-        f"</p>"
-    )
+SUBJECT = DEFAULT_TITLE
 
+# Mailgun accepts at most this many "to" addresses per batch-sending call.
+MAILGUN_BATCH_RECIPIENT_LIMIT = 1000
 
-def _worksheet_link_plain() -> str:
-    return f"Do the worksheets online: {WORKSHEETS_URL}\n\n"
 
-
-def normalize_to_list(value):
-    """Convert string values to list by splitting on sentence patterns.
-
-    Handles cases where LLM returns a string instead of an array.
-    Supports multiple patterns:
-    - Pattern 1: '", "' for quoted list strings
-    - Pattern 2: '., ' for period-comma-space sentence boundaries
+def batch_recipient_limit() -> int:
     """
-    if isinstance(value, list):
-        return value
-    elif isinstance(value, str):
-        # Pattern 1: Split by '", "' (for quoted list strings)
-        if '", "' in value:
-            return [s.strip().strip('"').strip("'") for s in value.split('", "')]
-
-        # Pattern 2: Split by '., ' (period, comma, space - sentence boundaries)
-        if "., " in value:
-            parts = value.split("., ")
-            return [
-                s.strip() + ("." if i < len(parts) - 1 else "")
-                for i, s in enumerate(parts)
-            ]
-
-        return [value]
-    else:
-        return []
-
-
-def format_worksheet_html(content_json, theme=None):
-    """Parse JSON content and format it as HTML with one numbered list per section."""
-    try:
-        # Parse the JSON content
-        if isinstance(content_json, str):
-            data = json.loads(content_json)
-        else:
-            data = content_json
-
-        # Extract each section and normalize to lists
-        sections = [
-            (key.title(), normalize_to_list(value)) for key, value in data.items()
-        ]
-
-        # Randomize the order of sections
-        random.shuffle(sections)
-
-        # Format theme for display
-        if theme:
-            if isinstance(theme, list):
-                theme_display = ", ".join(theme)
-            else:
-                theme_display = str(theme)
-        else:
-            theme_display = "Your Spanish Worksheet"
-
-        # Build HTML with numbered lists
-        # Use explicit numbering in text for better Notion compatibility when copying
-        html_content = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <h2 style="color: #2c3e50;">{escape(theme_display)}</h2>
-            {_worksheet_link_html()}
-        """
-
-        # Build each section dynamically in randomized order
-        for section_title, sentences in sections:
-            html_content += f"""
-            <h3 style="color: #34495e; margin-top: 30px;">{escape(section_title)}</h3>
-            <div style="margin-left: 20px;">
-        """
-
-            for i, sentence in enumerate(sentences, 1):
-                # Escape HTML special characters to prevent XSS
-                escaped_sentence = escape(exercise_prompt_for_display(sentence))
-                # Include explicit number in text for Notion compatibility
-                html_content += (
-                    f'                <p style="margin: 0 0 10px 0; white-space: pre-wrap;">'
-                    f"{i}. {escaped_sentence}</p>\n"
-                )
-
-            html_content += """            </div>
-        """
-
-        html_content += """        </body>
-        </html>
-        """
-
-        return html_content
-    except (json.JSONDecodeError, KeyError, AttributeError) as e:
-        logger.error(f"Error parsing worksheet content: {e}")
-        # Fallback to plain text if JSON parsing fails
-        return f"<html><body><pre>{content_json}</pre></body></html>"
-
-
-def send_worksheet_email(user, content, theme=None):
-    """Send worksheet email to user and their additional recipients."""
-    logger.info(f"Sending worksheet email to {user.email}")
+    Recipients per batch request: Mailgun's cap, or the Mailgun messages per
+    minute limit if lower, so no request needs more than a full rate bucket.
+    """
+    per_minute = settings.RATE_LIMITS.get("mailgun", {}).get("tokens_per_minute")
+    if per_minute and per_minute > 0:
+        return max(1, min(MAILGUN_BATCH_RECIPIENT_LIMIT, int(per_minute)))
+    return MAILGUN_BATCH_RECIPIENT_LIMIT
+
 
-    # Always include the user, then any additional recipients (deduped)
+def resolve_recipients(user) -> list[str]:
+    """The user, then any additional recipients, without empties or duplicates."""
     additional_recipients = list(user.email_recipients.values_list("email", flat=True))
     all_recipients = [user.email] + additional_recipients
     # Remove empties and duplicates while preserving order
     seen = set()
-    all_recipients = [
+    return [
         email
         for email in all_recipients
         if email and not (email in seen or seen.add(email))
     ]
+
+
+def _mailgun_messages_url() -> str:
+    if not settings.MAILGUN_API_KEY or not settings.MAILGUN_DOMAIN:
+        raise ValueError(
+            "Mailgun settings MAILGUN_API_KEY and MAILGUN_DOMAIN are required."
+        )
+    return (
+        f"{settings.MAILGUN_BASE_URL.rstrip('/')}/v3/{settings.MAILGUN_DOMAIN}/messages"
+    )
+
+
+def _post_to_mailgun(url: str, data: dict, recipient_count: int) -> None:
+    try:
+        response = mailgun.post(url, data)
+
+        if response.ok:
+            logger.info(
+                "Email sent successfully to %s recipients via Mailgun",
+                recipient_count,
+            )
+            return
+
+        logger.error(
+            f"Mailgun send failed (status {response.status_code}): {response.text}"
+        )
+        response.raise_for_status()
+    except Exception as e:
+        logger.error(f"Failed to send email: {type(e).__name__}: {e}")
+        raise
+
+
+def send_worksheet_email(user, content, theme=None, content_hash=None):
+    """
+    Send worksheet email to user and their additional recipients. Pass the
+    worksheet's ``content_hash`` to reuse (and cache) its rendered bodies.
+    """
+    logger.info(f"Sending worksheet email to {user.email}")
+
+    all_recipients = resolve_recipients(user)
     logger.info(
         "Email recipients resolved for %s: %s total",
         user.email,
         len(all_recipients),
     )
 
-    subject = "Your Spanish Worksheet"
-    html_message = format_worksheet_html(content, theme=theme)
+    html_message, plain_text = render_worksheet_email(
+        content, theme=theme, content_hash=content_hash
+    )
     logger.debug(
         "Email content prepared for %s (html length=%s)",
         user.email,
         len(html_message),
     )
 
-    try:
-        if isinstance(content, str):
-            data = json.loads(content)
-        else:
-            data = content
-
-        section_blocks = []
-        for section_num, (key, value) in enumerate(data.items(), 1):
-            lines = [f"{section_num}. {key.title()}:"]
-            for i, sentence in enumerate(normalize_to_list(value), 1):
-                lines.append(f"   {i}. {exercise_prompt_for_display(sentence)}")
-            section_blocks.append("\n".join(lines))
-
-        plain_text = "Your Spanish Worksheet\n\n"
-        plain_text += _worksheet_link_plain()
-        plain_text += "\n\n".join(section_blocks) + "\n"
-    except (json.JSONDecodeError, KeyError, AttributeError):
-        plain_text = f"Your Spanish Worksheet\n\n{_worksheet_link_plain()}{content}"
-
-    if not settings.MAILGUN_API_KEY or not settings.MAILGUN_DOMAIN:
-        raise ValueError(
-            "Mailgun settings MAILGUN_API_KEY and MAILGUN_DOMAIN are required."
-        )
+    url = _mailgun_messages_url()
     if not all_recipients:
         raise ValueError("No recipients found for worksheet email.")
 
-    url = (
-        f"{settings.MAILGUN_BASE_URL.rstrip('/')}/v3/{settings.MAILGUN_DOMAIN}/messages"
-    )
     logger.info("Sending email via Mailgun domain: %s", settings.MAILGUN_DOMAIN)
     data = {
         "from": settings.DEFAULT_FROM_EMAIL,
         "to": all_recipients,
-        "subject": subject,
+        "subject": SUBJECT,
         "text": plain_text,
         "html": html_message,
     }
+    _post_to_mailgun(url, data, len(all_recipients))
 
-    try:
-        response = requests.post(
-            url,
-            auth=("api", settings.MAILGUN_API_KEY),
-            data=data,
-            timeout=10,
-        )
 
-        if response.ok:
-            logger.info(
-                "Email sent successfully to %s recipients via Mailgun",
-                len(all_recipients),
-            )
-            return
+def send_worksheet_emails(deliveries) -> list[int]:
+    """
+    Send many worksheets with Mailgun batch sending.
+
+    ``deliveries`` is an iterable of ``(user, content, theme)``. Each
+    recipient's HTML and text travel as Mailgun recipient-variables, so one
+    request carries up to ``batch_recipient_limit()`` personalised emails; a
+    user with more recipients than that is split across requests. Every
+    recipient gets an individual message. Returns the positions in
+    ``deliveries`` with a failed batch (a user may have several deliveries);
+    other batches are still sent.
+    """
+    url = _mailgun_messages_url()
+    limit = batch_recipient_limit()
+    failed = []
+    batch_indexes, variables = [], {}
 
-        logger.error(
-            f"Mailgun send failed (status {response.status_code}): {response.text}"
-        )
-        response.raise_for_status()
-    except Exception as e:
-        logger.error(f"Failed to send email: {type(e).__name__}: {e}")
-        raise
+    def flush():
+        if not variables:
+            return
+        data = {
+            "from": settings.DEFAULT_FROM_EMAIL,
+            "to": list(variables),
+            "subject": SUBJECT,
+            "text": "%recipient.text%",
+            "html": "%recipient.html%",
+            "recipient-variables": json.dumps(variables, ensure_ascii=False),
+        }
+        try:
+            _post_to_mailgun(url, data, len(variables))
+        except Exception:
+            failed.extend(i for i in batch_indexes if i not in failed)
+        batch_indexes.clear()
+        variables.clear()
+
+    for index, (user, content, theme) in enumerate(deliveries):
+        recipients = resolve_recipients(user)
+        if not recipients:
+            logger.warning("No recipients for %s; worksheet not sent", user.email)
+            failed.append(index)
+            continue
+        html_message, plain_text = render_worksheet_email(content, theme=theme)
+        rendered = {"html": html_message, "text": plain_text}
+        for email in recipients:
+            # Flush a full batch, or one already holding this address (shared
+            # with another user), whose variables would be overwritten.
+            if len(variables) >= limit or email in variables:
+                flush()
+            variables[email] = rendered
+            if not batch_indexes or batch_indexes[-1] != index:
+                batch_indexes.append(index)
+    flush()
+
+    return failed
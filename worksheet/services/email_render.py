@@ -0,0 +1,147 @@
+"""Worksheet email rendering: parse once, render HTML and text from fixed templates.
+
+Worksheet content is read once (see ``WorksheetContent``) into
+``(title, prompts)`` sections.
+Both bodies are then built from precompiled template strings with ``join``
+(escaping each prompt once). The rendered section blocks and text body are
+cached under the worksheet's ``content_hash``, so a resend of the same
+worksheet skips parsing and escaping. The HTML sections are shuffled and
+joined on every call, so each email still gets its own section order.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+from html import escape
+
+from django.conf import settings
+from django.core.cache import cache
+
+from worksheet.services.worksheet_content import WorksheetContent, dump_content
+
+logger = logging.getLogger(__name__)
+
+WORKSHEETS_URL = "https://michaelsavage.ie/worksheets"
+DEFAULT_TITLE = "Your Spanish Worksheet"
+
+# Bump when the templates change so cached renders are not reused.
+RENDER_VERSION = 2
+CACHE_PREFIX = "email_render"
+
+_SAFE_URL = escape(WORKSHEETS_URL)
+# Use explicit numbering in text for better Notion compatibility when copying.
+_HTML_HEAD = (
+    '<html>\n<body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">\n'
+    '<h2 style="color: #2c3e50;">{title}</h2>\n'
+    '<p style="margin: 16px 0 24px 0;">Do the worksheets online: '
+    f'<a href="{_SAFE_URL}">{_SAFE_URL}</a></p>\n'
+)
+_HTML_SECTION_OPEN = (
+    '<h3 style="color: #34495e; margin-top: 30px;">{title}</h3>\n'
+    '<div style="margin-left: 20px;">\n'
+)
+_HTML_ITEM_OPEN = '<p style="margin: 0 0 10px 0; white-space: pre-wrap;">'
+_HTML_ITEM_CLOSE = "</p>\n"
+_HTML_ITEM_SEPARATOR = _HTML_ITEM_CLOSE + _HTML_ITEM_OPEN
+_HTML_SECTION_CLOSE = "</div>\n"
+_HTML_TAIL = "</body>\n</html>\n"
+_HTML_FALLBACK = "<html><body><pre>{content}</pre></body></html>"
+
+_TEXT_HEAD = f"{DEFAULT_TITLE}\n\nDo the worksheets online: {WORKSHEETS_URL}\n\n"
+
+
+def parse_sections(content) -> list[tuple[str, list[str]]] | None:
+    """``[(section title, prompts)]`` from worksheet content; None if unusable."""
+    worksheet = WorksheetContent.from_data(content)
+    if worksheet is None:
+        logger.error("Error parsing worksheet content: not a JSON object")
+        return None
+    return [(section.title, section.prompts) for section in worksheet.sections]
+
+
+def theme_title(theme) -> str:
+    if not theme:
+        return DEFAULT_TITLE
+    return ", ".join(theme) if isinstance(theme, list) else str(theme)
+
+
+def render_html_sections(sections) -> list[str]:
+    """One HTML block (heading and numbered list) per section, in order."""
+    blocks = []
+    for title, prompts in sections:
+        parts = [_HTML_SECTION_OPEN.format(title=escape(title))]
+        if prompts:
+            # One escape per section; NUL never occurs in prompt text.
+            escaped = escape("\0".join(prompts)).split("\0")
+            parts.append(_HTML_ITEM_OPEN)
+            parts.append(
+                _HTML_ITEM_SEPARATOR.join(
+                    f"{number}. {text}" for number, text in enumerate(escaped, 1)
+                )
+            )
+            parts.append(_HTML_ITEM_CLOSE)
+        parts.append(_HTML_SECTION_CLOSE)
+        blocks.append("".join(parts))
+    return blocks
+
+
+def assemble_html(blocks, theme=None) -> str:
+    """HTML body from rendered section blocks, shuffled into a random order."""
+    blocks = list(blocks)
+    random.shuffle(blocks)
+    head = _HTML_HEAD.format(title=escape(theme_title(theme)))
+    return head + "".join(blocks) + _HTML_TAIL
+
+
+def render_html(sections, theme=None) -> str:
+    """HTML body with one numbered list per section, sections in random order."""
+    return assemble_html(render_html_sections(sections), theme)
+
+
+def render_text(sections) -> str:
+    """Plain-text alternative, sections numbered in worksheet order."""
+    blocks = []
+    for section_number, (title, prompts) in enumerate(sections, 1):
+        lines = [f"{section_number}. {title}:"]
+        lines.extend(
+            f"   {number}. {prompt}" for number, prompt in enumerate(prompts, 1)
+        )
+        blocks.append("\n".join(lines))
+    return _TEXT_HEAD + "\n\n".join(blocks) + "\n"
+
+
+def render_fallback(content) -> tuple[str, str]:
+    """Bodies for content that is not worksheet JSON: shown as-is."""
+    content = dump_content(content)
+    return (
+        _HTML_FALLBACK.format(content=escape(content)),
+        f"{_TEXT_HEAD}{content}",
+    )
+
+
+def _cache_key(content_hash: str) -> str:
+    return f"{CACHE_PREFIX}:v{RENDER_VERSION}:{content_hash}"
+
+
+def render_worksheet_email(content, theme=None, content_hash=None) -> tuple[str, str]:
+    """
+    ``(html, text)`` for worksheet content (stored JSON or an already built
+    ``WorksheetContent``). With ``content_hash`` the section blocks and text
+    are read from and stored in the cache, so a resend does no parsing or
+    escaping; only the shuffle, theme heading and join run again.
+    """
+    key = _cache_key(content_hash) if content_hash else None
+    cached = cache.get(key) if key else None
+    if cached is not None:
+        blocks, text = cached
+        return assemble_html(blocks, theme), text
+
+    sections = parse_sections(content)
+    if sections is None:
+        return render_fallback(content)
+    blocks = render_html_sections(sections)
+    text = render_text(sections)
+    if key:
+        cache.set(key, (blocks, text), timeout=settings.EMAIL_RENDER_CACHE_TTL)
+    return assemble_html(blocks, theme), text
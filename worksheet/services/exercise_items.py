@@ -29,6 +29,29 @@ def exercise_prompt_for_display(item: Any) -> str:
     return ""
 
 
+def validate_exercise_item(item: Any, require_blank: bool) -> bool:
+    """
+    True if a single exercise object is well formed and its blanks fit the
+    section: exactly one ___ when require_blank, none otherwise. String
+    answers are accepted since they are normalized to lists afterwards.
+    """
+    if not isinstance(item, dict):
+        return False
+    prompt = item.get("prompt")
+    if not isinstance(prompt, str) or not prompt.strip():
+        return False
+    answer = item.get("answer")
+    if isinstance(answer, str):
+        answer = [answer]
+    if not isinstance(answer, list) or len(answer) < 1:
+        return False
+    if not all(isinstance(s, str) and s.strip() for s in answer):
+        return False
+    if require_blank:
+        return has_exactly_one_blank(prompt)
+    return BLANK_MARKER not in prompt
+
+
 def normalize_worksheet_answers(
     data: dict[str, Any], expected_keys: frozenset[str]
 ) -> None:
@@ -159,6 +182,37 @@ def validate_no_blank_prompts(
     return True
 
 
+def worksheet_blank_prompt_errors(
+    data: dict[str, Any],
+    blank_keys: frozenset[str],
+    translation_keys: frozenset[str],
+) -> dict[str, list[int]]:
+    """
+    Map each section with a blank-rule violation to the indexes of the failing
+    items: blank_keys sections need exactly one ___ per prompt, translation_keys
+    sections none. Empty when everything passes. Call only after
+    validate_worksheet_exercises passes.
+    """
+    errors: dict[str, list[int]] = {}
+    for key in sorted(blank_keys | translation_keys):
+        section = data.get(key)
+        if not isinstance(section, list):
+            errors[key] = []
+            continue
+        bad = []
+        for i, item in enumerate(section):
+            prompt = item.get("prompt") if isinstance(item, dict) else None
+            if key in blank_keys:
+                ok = has_exactly_one_blank(prompt)
+            else:
+                ok = isinstance(prompt, str) and BLANK_MARKER not in prompt
+            if not ok:
+                bad.append(i)
+        if bad:
+            errors[key] = bad
+    return errors
+
+
 def parse_worksheet_content(
     content: str | dict[str, Any] | None,
 ) -> dict[str, Any] | None:
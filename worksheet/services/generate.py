@@ -1,32 +1,52 @@
 from worksheet.models import Worksheet
 from worksheet.services.prompts import (
+    TRANSLATION_ITEMS,
     TRANSLATION_KEY,
     build_custom_payload,
     build_payload,
+    build_section_payload,
 )
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
+from django.db import transaction
 import hashlib
-from openai import OpenAI
 import logging
 import json
 import re
-
+from typing import Any, Callable
+
+from worksheet.services import metrics, rate_limit
+from worksheet.services.json_repair import repair_json_locally
+from worksheet.services.latest_worksheet import invalidate_latest_worksheet
+from worksheet.services.json_stream import ExerciseStreamParser
+from worksheet.services.llm_client import get_llm_client
+from worksheet.services.outbox import add_to_outbox, delete_replaced_worksheets
 from worksheet.services.topic_rotator import get_and_increment_topics
 from worksheet.services.grammar_rotator import get_and_increment_grammar_pools
+from worksheet.services.worksheet_content import dump_content
 from worksheet.services.exercise_items import (
+    CUSTOM_EXERCISES_KEY,
+    ITEMS_PER_POOL,
+    ITEMS_PER_SECTION,
     normalize_custom_exercise_answers,
     normalize_worksheet_answers,
     validate_custom_blank_prompts,
     validate_custom_exercises,
-    validate_no_blank_prompts,
-    validate_worksheet_blank_prompts,
+    validate_exercise_item,
     validate_worksheet_exercises,
+    worksheet_blank_prompt_errors,
 )
 
 logger = logging.getLogger(__name__)
 
+# (section, index within section, parsed item) -> keep streaming?
+ItemCheck = Callable[[str, int, Any], bool]
+
 MAX_BLANK_REGENERATION_ATTEMPTS = 3
 
+# Which step produced parseable JSON, counted in metrics as "json.<path>".
+JSON_PATHS = ("direct", "local_repair", "llm_repair", "unrepairable")
+
 BLANK_PROMPT_CORRECTION_USER = (
     "Some prompts had wrong blanks (missing ___, multiple ___, or a blank in the "
     "translation section). Fix strictly: every grammar-section exercise prompt "
@@ -35,6 +55,24 @@ BLANK_PROMPT_CORRECTION_USER = (
     "Return the full worksheet JSON again with the same keys and shape."
 )
 
+SECTION_REPAIR_USER = (
+    "Only these exercises had wrong blanks: {failures}. Every grammar-section "
+    "prompt must contain exactly one '___'; translation prompts must contain "
+    "no '___' at all. Rewrite only those sections, keeping their correct "
+    "exercises unchanged. Return a JSON object with exactly these keys: "
+    '{keys}, each with {count} exercises. Keep each "answer" as a JSON array '
+    "of strings. Do not return the other sections."
+)
+
+SECTION_CORRECTION_USER = (
+    "Only these exercises had wrong blanks: {failures}. {rule} Keep the "
+    'correct exercises unchanged and each "answer" as a JSON array of strings. '
+    'Return a JSON object with exactly one key, "{section}", holding all '
+    "{count} exercises."
+)
+GRAMMAR_BLANK_RULE = "Every prompt must contain exactly one '___'."
+TRANSLATION_BLANK_RULE = "Translation prompts must contain no '___' at all."
+
 CUSTOM_BLANK_PROMPT_CORRECTION_USER = (
     "Some prompts had wrong blanks (missing ___ or multiple ___). Fix strictly: "
     "each custom exercise prompt must contain exactly one '___'. "
@@ -43,65 +81,176 @@ CUSTOM_BLANK_PROMPT_CORRECTION_USER = (
 )
 
 
+_JSON_DECODER = json.JSONDecoder()
+# A "{" can only start a JSON object if a key or "}" comes next; this skips
+# template placeholders such as "{prompt}" without trying to decode them.
+_OBJECT_START = re.compile(r'\{\s*["}]')
+# The body of a fenced code block that holds an object or array.
+_FENCED_START = re.compile(r"```(?:json)?\s*(?=[{\[])")
+
+
 def extract_json_from_response(content: str) -> str | None:
     """
-    Attempt to extract a valid JSON object from an LLM response.
+    Attempt to extract valid JSON from an LLM response.
     Returns a JSON string if successful, otherwise None.
+
+    A reply that is valid JSON as a whole (object, array or scalar) is returned
+    unchanged; callers check its shape. Otherwise at most two candidates are
+    decoded, once each: the first fenced block and the first ``{`` that can
+    open an object. Each decode stops at the first error, so malformed replies
+    fail fast and are left to the repair step rather than searched further.
     """
-    # 1. Try as-is
     try:
         json.loads(content)
         return content
     except json.JSONDecodeError:
         pass
 
-    # 2. Markdown code block
-    code_block_pattern = r"```(?:json)?\s*(\{.*?\})\s*```"
-    match = re.search(code_block_pattern, content, re.DOTALL)
-
-    if match:
-        extracted = match.group(1)
-        try:
-            json.loads(extracted)
-            logger.info("Extracted valid JSON from markdown code block")
-            return extracted
-        except json.JSONDecodeError:
-            pass
-
-    # 3. Raw object fallback
-    object_pattern = r"\{.*\}"
-    match = re.search(object_pattern, content, re.DOTALL)
+    starts = []
+    for pattern in (_FENCED_START, _OBJECT_START):
+        match = pattern.search(content)
+        if match is not None:
+            start = match.end() if pattern is _FENCED_START else match.start()
+            if start not in starts:
+                starts.append(start)
 
-    if match:
-        extracted = match.group(0)
+    for start in starts:
         try:
-            json.loads(extracted)
-            logger.info("Extracted valid JSON object from raw response")
-            return extracted
+            _, end = _JSON_DECODER.raw_decode(content, start)
         except json.JSONDecodeError:
-            pass
+            continue
+        logger.info("Extracted valid JSON from surrounding text")
+        return content[start:end]
 
     logger.error("Failed to extract valid JSON from LLM response")
     return None
 
 
-def call_llm(messages: list[dict]) -> str:
-    # Bound wall time so a wedged HTTP call cannot stall the single RQ worker forever.
-    client = OpenAI(
-        api_key=settings.DEEPSEEK_API_KEY,
-        base_url="https://api.deepseek.com",
-        timeout=300.0,
-    )
+class LLMStreamAborted(Exception):
+    """A streamed reply was cancelled because one exercise failed validation."""
+
+    def __init__(self, partial: str, section: str, index: int):
+        super().__init__(f"{section!r} item {index + 1} failed validation")
+        self.partial = partial
+        self.section = section
+        self.index = index
+
+
+def call_llm(messages: list[dict], item_check: ItemCheck | None = None) -> str:
+    """
+    Return the model's reply. With item_check (and LLM_STREAMING on) the reply
+    is streamed and every exercise object is checked as soon as it closes; the
+    first failure cancels the stream and raises LLMStreamAborted.
+    """
+    client = get_llm_client()
+    estimate = estimate_llm_tokens(messages)
+    rate_limit.acquire("deepseek", tokens=estimate)
+
+    if item_check is not None and settings.LLM_STREAMING:
+        return _call_llm_streaming(client, messages, item_check, estimate)
 
     response = client.chat.completions.create(
-        model="deepseek-v4-flash",
+        model=settings.LLM_MODEL,
         messages=messages,
         temperature=0.7,
     )
+    _settle_usage(getattr(response, "usage", None), estimate)
 
     return response.choices[0].message.content
 
 
+def _settle_usage(usage, estimate: int) -> None:
+    """Correct the rate limiter's estimate once the reply reports real usage."""
+    if isinstance(getattr(usage, "total_tokens", None), int):
+        rate_limit.settle("deepseek", usage.total_tokens - estimate)
+
+
+def estimate_llm_tokens(messages: list[dict]) -> int:
+    """Prompt tokens (about 4 characters each) plus the expected reply length."""
+    prompt_chars = sum(len(m.get("content") or "") for m in messages)
+    return prompt_chars // 4 + settings.LLM_OUTPUT_TOKENS_ESTIMATE
+
+
+def _call_llm_streaming(
+    client, messages: list[dict], item_check: ItemCheck, estimate: int
+) -> str:
+    parser = ExerciseStreamParser()
+    parts: list[str] = []
+
+    # The final chunk then carries usage (and no choices). A cancelled stream
+    # never reaches it and keeps the estimate charged.
+    stream = client.chat.completions.create(
+        model=settings.LLM_MODEL,
+        messages=messages,
+        temperature=0.7,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                _settle_usage(getattr(chunk, "usage", None), estimate)
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            parts.append(delta)
+            for section, index, item in parser.feed(delta):
+                if not item_check(section, index, item):
+                    logger.warning(
+                        "Cancelling LLM stream: %s item %s failed validation",
+                        section,
+                        index + 1,
+                    )
+                    raise LLMStreamAborted("".join(parts), section, index)
+    finally:
+        # Closing the response stops token generation on our side immediately.
+        stream.close()
+
+    return "".join(parts)
+
+
+def _worksheet_item_check(
+    blank_keys: frozenset[str],
+    translation_keys: frozenset[str],
+    skip_keys: frozenset[str] = frozenset(),
+) -> ItemCheck:
+    """
+    Check streamed items against the sections being generated. Items of
+    skip_keys (sections already accepted, which a repair reply may echo) pass
+    unchecked; they are dropped when the reply is merged.
+    """
+
+    def check(section: str, index: int, item: Any) -> bool:
+        if section in skip_keys:
+            return True
+        if section not in blank_keys and section not in translation_keys:
+            return False
+        if index >= ITEMS_PER_POOL:
+            return False
+        return validate_exercise_item(item, require_blank=section in blank_keys)
+
+    return check
+
+
+def _custom_item_check(section: str, index: int, item: Any) -> bool:
+    if section != CUSTOM_EXERCISES_KEY or index >= ITEMS_PER_SECTION:
+        return False
+    return validate_exercise_item(item, require_blank=True)
+
+
+def _describe_blank_errors(errors: dict[str, list[int]]) -> str:
+    """Human-readable list of failing items, e.g. '"subjunctive" items 1, 4'."""
+    parts = []
+    for key, indexes in errors.items():
+        if not indexes:
+            parts.append(f'"{key}" (missing)')
+            continue
+        label = "item" if len(indexes) == 1 else "items"
+        parts.append(f'"{key}" {label} ' + ", ".join(str(i + 1) for i in indexes))
+    return "; ".join(parts)
+
+
 def fix_json_structure_once(broken_content: str) -> str | None:
     """
     Ask the LLM once to fix JSON structure only.
@@ -128,6 +277,31 @@ def fix_json_structure_once(broken_content: str) -> str | None:
     return extract_json_from_response(repaired)
 
 
+def parse_or_repair_json(raw_content: str) -> str | None:
+    """
+    Return parseable JSON from an LLM reply: as-is, repaired locally, or, as a
+    last resort, repaired by the LLM. Counts which path succeeded.
+    """
+    candidate = extract_json_from_response(raw_content)
+    if candidate is not None:
+        metrics.incr("json.direct")
+        return candidate
+
+    candidate = repair_json_locally(raw_content)
+    if candidate is not None:
+        logger.info("Repaired malformed JSON locally")
+        metrics.incr("json.local_repair")
+        return candidate
+
+    candidate = fix_json_structure_once(raw_content)
+    metrics.incr("json.llm_repair" if candidate is not None else "json.unrepairable")
+    return candidate
+
+
+def json_repair_stats() -> dict[str, int]:
+    return metrics.snapshot([f"json.{path}" for path in JSON_PATHS])
+
+
 def generate_custom_exercises(request_text: str) -> dict | None:
     logger.info("Starting custom exercise generation")
 
@@ -138,12 +312,25 @@ def generate_custom_exercises(request_text: str) -> dict | None:
             "Calling LLM to generate custom exercise content (attempt %s)",
             attempt + 1,
         )
-        raw_content = call_llm(messages)
-
-        candidate = extract_json_from_response(raw_content)
+        try:
+            raw_content = call_llm(messages, item_check=_custom_item_check)
+        except LLMStreamAborted as aborted:
+            logger.warning(
+                "Custom exercise validation failed mid-stream (attempt %s/%s): %s",
+                attempt + 1,
+                MAX_BLANK_REGENERATION_ATTEMPTS,
+                aborted,
+            )
+            if attempt + 1 >= MAX_BLANK_REGENERATION_ATTEMPTS:
+                logger.error("Custom exercise validation failed after all attempts")
+                return None
+            messages = messages + [
+                {"role": "assistant", "content": aborted.partial},
+                {"role": "user", "content": CUSTOM_BLANK_PROMPT_CORRECTION_USER},
+            ]
+            continue
 
-        if candidate is None:
-            candidate = fix_json_structure_once(raw_content)
+        candidate = parse_or_repair_json(raw_content)
 
         if candidate is None:
             logger.error(
@@ -156,6 +343,9 @@ def generate_custom_exercises(request_text: str) -> dict | None:
         except json.JSONDecodeError:
             logger.error("Custom JSON invalid after repair attempt")
             return None
+        if not isinstance(parsed, dict):
+            logger.error("Custom exercise reply is not a JSON object")
+            return None
 
         normalize_custom_exercise_answers(parsed)
 
@@ -190,35 +380,51 @@ def generate_custom_exercises(request_text: str) -> dict | None:
     return None
 
 
-def generate_worksheet_for(user, themes=None, grammar_pools=None):
-    logger.info(
-        "Starting worksheet generation for user: %s (ID: %s)",
-        user.email,
-        user.id,
-    )
-
-    if themes is None:
-        themes = get_and_increment_topics()
-    if grammar_pools is None:
-        grammar_pools = get_and_increment_grammar_pools()
+def _generate_worksheet_single(
+    themes: list[str], grammar_pools: list[str]
+) -> dict[str, Any] | None:
+    """Generate the whole worksheet in one completion (plus section repairs)."""
     blank_keys = frozenset(grammar_pools)
     translation_keys = frozenset({TRANSLATION_KEY})
     expected_keys = blank_keys | translation_keys
     messages = build_payload(themes, grammar_pools)
 
-    content: str | None = None
+    # The first reply is the whole worksheet; later replies only carry the
+    # sections that still break the blank rules and are merged into it.
+    parsed: dict[str, Any] | None = None
+    pending_keys = expected_keys
+    correction = BLANK_PROMPT_CORRECTION_USER
 
     for attempt in range(MAX_BLANK_REGENERATION_ATTEMPTS):
         logger.info(
-            "Calling LLM to generate worksheet content (attempt %s)",
+            "Calling LLM to generate worksheet content (attempt %s, sections %s)",
             attempt + 1,
+            sorted(pending_keys),
         )
-        raw_content = call_llm(messages)
-
-        candidate = extract_json_from_response(raw_content)
+        item_check = _worksheet_item_check(
+            blank_keys & pending_keys,
+            translation_keys & pending_keys,
+            skip_keys=expected_keys - pending_keys,
+        )
+        try:
+            raw_content = call_llm(messages, item_check=item_check)
+        except LLMStreamAborted as aborted:
+            logger.warning(
+                "Worksheet validation failed mid-stream (attempt %s/%s): %s",
+                attempt + 1,
+                MAX_BLANK_REGENERATION_ATTEMPTS,
+                aborted,
+            )
+            if attempt + 1 >= MAX_BLANK_REGENERATION_ATTEMPTS:
+                logger.error("Worksheet validation failed after all attempts")
+                return None
+            messages = messages + [
+                {"role": "assistant", "content": aborted.partial},
+                {"role": "user", "content": correction},
+            ]
+            continue
 
-        if candidate is None:
-            candidate = fix_json_structure_once(raw_content)
+        candidate = parse_or_repair_json(raw_content)
 
         if candidate is None:
             logger.error(
@@ -227,31 +433,42 @@ def generate_worksheet_for(user, themes=None, grammar_pools=None):
             return None
 
         try:
-            parsed = json.loads(candidate)
+            reply = json.loads(candidate)
         except json.JSONDecodeError:
             logger.error("JSON invalid after repair attempt")
             return None
 
-        normalize_worksheet_answers(parsed, expected_keys)
+        if not isinstance(reply, dict):
+            logger.error("Worksheet reply is not a JSON object")
+            return None
+
+        # Keep only the sections asked for; a repair reply may echo the rest.
+        sections = {key: reply.get(key) for key in pending_keys}
+        normalize_worksheet_answers(sections, pending_keys)
 
-        if not validate_worksheet_exercises(parsed, expected_keys):
+        if not validate_worksheet_exercises(sections, pending_keys):
             logger.error(
                 "Invalid worksheet structure. Expected sections %s, each with "
                 'exactly 5 objects {"prompt": "...", "answer": ["..."]}.',
-                sorted(expected_keys),
+                sorted(pending_keys),
             )
             return None
 
-        if validate_worksheet_blank_prompts(
-            parsed, blank_keys
-        ) and validate_no_blank_prompts(parsed, translation_keys):
-            content = json.dumps(parsed, ensure_ascii=False)
-            break
+        if parsed is None:
+            # Preserve the model's section order for a stable content hash.
+            parsed = {key: sections[key] for key in reply if key in sections}
+        else:
+            parsed.update(sections)
+
+        errors = worksheet_blank_prompt_errors(parsed, blank_keys, translation_keys)
+        if not errors:
+            return parsed
 
         logger.warning(
-            "Worksheet blank validation failed (attempt %s/%s)",
+            "Worksheet blank validation failed (attempt %s/%s): %s",
             attempt + 1,
             MAX_BLANK_REGENERATION_ATTEMPTS,
+            _describe_blank_errors(errors),
         )
         if attempt + 1 >= MAX_BLANK_REGENERATION_ATTEMPTS:
             logger.error(
@@ -259,28 +476,172 @@ def generate_worksheet_for(user, themes=None, grammar_pools=None):
             )
             return None
 
+        pending_keys = frozenset(errors)
+        correction = SECTION_REPAIR_USER.format(
+            failures=_describe_blank_errors(errors),
+            keys=", ".join(f'"{key}"' for key in sorted(pending_keys)),
+            count=ITEMS_PER_POOL,
+        )
         messages = messages + [
             {"role": "assistant", "content": candidate},
-            {"role": "user", "content": BLANK_PROMPT_CORRECTION_USER},
+            {"role": "user", "content": correction},
         ]
 
-    if content is None:
+    return None
+
+
+def _section_correction(section: str, errors: dict[str, list[int]]) -> str:
+    """Correction turn for one section, scoped to its failing exercises."""
+    if section == TRANSLATION_KEY:
+        rule, count = TRANSLATION_BLANK_RULE, TRANSLATION_ITEMS
+    else:
+        rule, count = GRAMMAR_BLANK_RULE, ITEMS_PER_POOL
+    return SECTION_CORRECTION_USER.format(
+        failures=_describe_blank_errors(errors),
+        rule=rule,
+        section=section,
+        count=count,
+    )
+
+
+def _generate_section(
+    themes: list[str], section: str, grammar_pools: list[str]
+) -> list | None:
+    """Generate and validate one section on its own, retrying only that section."""
+    keys = frozenset({section})
+    blank_keys = frozenset() if section == TRANSLATION_KEY else keys
+    translation_keys = keys - blank_keys
+    item_check = _worksheet_item_check(blank_keys, translation_keys)
+    messages = build_section_payload(themes, section, grammar_pools)
+
+    for attempt in range(MAX_BLANK_REGENERATION_ATTEMPTS):
+        logger.info("Calling LLM for section %r (attempt %s)", section, attempt + 1)
+        try:
+            raw_content = call_llm(messages, item_check=item_check)
+        except LLMStreamAborted as aborted:
+            logger.warning("Section %r failed mid-stream: %s", section, aborted)
+            correction = _section_correction(section, {section: [aborted.index]})
+            messages = messages + [
+                {"role": "assistant", "content": aborted.partial},
+                {"role": "user", "content": correction},
+            ]
+            continue
+
+        candidate = parse_or_repair_json(raw_content)
+        if candidate is None:
+            logger.error("Section %r JSON could not be repaired", section)
+            return None
+
+        try:
+            reply = json.loads(candidate)
+        except json.JSONDecodeError:
+            logger.error("Section %r JSON invalid after repair attempt", section)
+            return None
+
+        data = {section: reply.get(section) if isinstance(reply, dict) else None}
+        normalize_worksheet_answers(data, keys)
+        if not validate_worksheet_exercises(data, keys):
+            logger.error("Invalid structure for section %r", section)
+            return None
+
+        errors = worksheet_blank_prompt_errors(data, blank_keys, translation_keys)
+        if not errors:
+            return data[section]
+
+        logger.warning(
+            "Section blank validation failed (attempt %s/%s): %s",
+            attempt + 1,
+            MAX_BLANK_REGENERATION_ATTEMPTS,
+            _describe_blank_errors(errors),
+        )
+        messages = messages + [
+            {"role": "assistant", "content": candidate},
+            {"role": "user", "content": _section_correction(section, errors)},
+        ]
+
+    logger.error("Section %r failed validation after all attempts", section)
+    return None
+
+
+def generate_worksheet_sections(
+    themes: list[str], grammar_pools: list[str]
+) -> dict[str, Any] | None:
+    """
+    Generate every section concurrently (one request each) and merge them in
+    worksheet order. Output latency is bounded by the slowest section instead
+    of the whole document. Returns None if any section fails.
+    """
+    sections = list(grammar_pools) + [TRANSLATION_KEY]
+    with ThreadPoolExecutor(max_workers=len(sections)) as executor:
+        results = list(
+            executor.map(
+                lambda section: _generate_section(themes, section, grammar_pools),
+                sections,
+            )
+        )
+
+    failed = [section for section, items in zip(sections, results) if items is None]
+    if failed:
+        logger.error("Parallel generation failed for sections %s", failed)
+        return None
+    return dict(zip(sections, results))
+
+
+def generate_worksheet_content(
+    themes: list[str], grammar_pools: list[str], parallel: bool | None = None
+) -> dict[str, Any] | None:
+    """
+    Validated worksheet sections for the given themes and pools, without
+    saving. parallel defaults to settings.WORKSHEET_PARALLEL_SECTIONS.
+    """
+    if parallel is None:
+        parallel = settings.WORKSHEET_PARALLEL_SECTIONS
+    if parallel:
+        return generate_worksheet_sections(themes, grammar_pools)
+    return _generate_worksheet_single(themes, grammar_pools)
+
+
+def generate_worksheet_for(
+    user, themes=None, grammar_pools=None, parallel=None, deliver=False
+):
+    """
+    Generate and save a worksheet for ``user``, replacing their previous one.
+    With ``deliver`` its email is queued in the outbox in the same transaction.
+    """
+    logger.info(
+        "Starting worksheet generation for user: %s (ID: %s)",
+        user.email,
+        user.id,
+    )
+
+    if themes is None:
+        themes = get_and_increment_topics()
+    if grammar_pools is None:
+        grammar_pools = get_and_increment_grammar_pools()
+
+    parsed = generate_worksheet_content(themes, grammar_pools, parallel=parallel)
+    if parsed is None:
         return None
 
+    content = dump_content(parsed)
     h = hashlib.sha256(content.encode("utf-8")).hexdigest()
 
     if Worksheet.objects.filter(content_hash=h).exists():
         logger.warning("Duplicate worksheet detected, aborting save")
         return None
 
-    Worksheet.objects.filter(user=user).delete()
-    Worksheet.objects.create(
-        user=user,
-        content_hash=h,
-        content=content,
-        topics=grammar_pools,
-        themes=themes,
-    )
+    with transaction.atomic():
+        delete_replaced_worksheets(user)
+        invalidate_latest_worksheet(user.id)
+        worksheet = Worksheet.objects.create(
+            user=user,
+            content_hash=h,
+            content=parsed,
+            topics=grammar_pools,
+            themes=themes,
+        )
+        if deliver:
+            add_to_outbox(worksheet)
 
     logger.info("Worksheet saved successfully for user: %s", user.email)
     return content
@@ -1,5 +1,5 @@
-from worksheet.models import Config
 from worksheet.services.grammar_pools import GRAMMAR_POOLS
+from worksheet.services.rotation import reserve_indices
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,25 +12,26 @@ def get_and_increment_grammar_pools():
     Returns POOLS_PER_WORKSHEET grammar pool names for this generation,
     and advances the index for next time.
     """
-    cfg, created = Config.objects.get_or_create(
-        key="grammar_pool_index", defaults={"value": "0"}
-    )
+    return reserve_grammar_pools(1)[0]
 
-    if created:
-        logger.info("Created new grammar_pool_index config, starting at 0")
-    else:
-        logger.debug(f"Retrieved existing grammar_pool_index: {cfg.value}")
 
-    index = int(cfg.value)
+def reserve_grammar_pools(count):
+    """
+    Returns the grammar pools for the next ``count`` worksheets, advancing the
+    index once for the whole block.
+    """
     pool_count = len(GRAMMAR_POOLS)
-    pools = [
-        GRAMMAR_POOLS[(index + i) % pool_count] for i in range(POOLS_PER_WORKSHEET)
-    ]
-
-    logger.info(f"Selected grammar pools at index {index}: {pools}")
+    index = reserve_indices(
+        "grammar_pool_index", count * POOLS_PER_WORKSHEET, modulo=pool_count
+    )
 
-    cfg.value = str((index + POOLS_PER_WORKSHEET) % pool_count)
-    cfg.save()
-    logger.debug(f"Incremented grammar_pool_index to {cfg.value}")
+    selections = [
+        [
+            GRAMMAR_POOLS[(index + n * POOLS_PER_WORKSHEET + i) % pool_count]
+            for i in range(POOLS_PER_WORKSHEET)
+        ]
+        for n in range(count)
+    ]
 
-    return pools
+    logger.info(f"Selected grammar pools at index {index}: {selections}")
+    return selections
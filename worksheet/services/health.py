@@ -0,0 +1,125 @@
+"""Worker heartbeats and the cached snapshot behind the health endpoints.
+
+Every RQ worker (``worksheet.workers.HeartbeatWorker``) writes its queues and
+a timestamp into one Redis hash on each heartbeat. Health checks then read
+that hash plus every queue's depth in a single pipelined round trip, instead
+of loading each worker's key with ``Worker.all``. Entries older than
+``HEALTH_WORKER_TIMEOUT`` belong to workers that died without unregistering
+and are pruned.
+
+Each web process caches the resulting snapshot for ``HEALTH_SNAPSHOT_TTL``
+seconds, so frequent load-balancer probes cost at most one Redis round trip
+per process per TTL.
+"""
+
+import json
+import logging
+import threading
+import time
+
+import django_rq
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+HEARTBEATS_KEY = "health:workers"
+
+_snapshot: dict | None = None
+_snapshot_at = 0.0
+_lock = threading.Lock()
+
+
+def record_heartbeat(connection, name: str, queue_names: list[str]) -> None:
+    """Store a worker's queues and heartbeat time (``connection`` may be a pipeline)."""
+    entry = json.dumps({"queues": queue_names, "at": time.time()})
+    connection.hset(HEARTBEATS_KEY, name, entry)
+    # The hash outlives any single worker but not a fleet that is gone.
+    connection.expire(HEARTBEATS_KEY, settings.HEALTH_WORKER_TIMEOUT * 2)
+
+
+def forget_worker(connection, name: str) -> None:
+    connection.hdel(HEARTBEATS_KEY, name)
+
+
+def _live_workers(entries: dict, now: float) -> tuple[dict[str, list[str]], list]:
+    """``({worker: queues}, stale names)`` from the raw heartbeat hash."""
+    live, stale = {}, []
+    for name, raw in entries.items():
+        try:
+            entry = json.loads(raw)
+            fresh = now - entry["at"] <= settings.HEALTH_WORKER_TIMEOUT
+        except (ValueError, KeyError, TypeError):
+            fresh = False
+        if fresh:
+            live[name] = entry["queues"]
+        else:
+            stale.append(name)
+    return live, stale
+
+
+def build_snapshot() -> dict:
+    """Check Redis, live workers and queue depths in one pipelined round trip."""
+    try:
+        connection = django_rq.get_connection("default")
+        queues = {name: django_rq.get_queue(name) for name in settings.RQ_QUEUES}
+        with connection.pipeline(transaction=False) as pipeline:
+            pipeline.hgetall(HEARTBEATS_KEY)
+            for queue in queues.values():
+                pipeline.llen(queue.key)
+            entries, *depths = pipeline.execute()
+    except Exception:
+        logger.warning("Health check could not reach Redis", exc_info=True)
+        return {"redis": "error", "workers_total": 0, "workers_on_default": 0}
+
+    live, stale = _live_workers(entries, time.time())
+    if stale:
+        try:
+            connection.hdel(HEARTBEATS_KEY, *stale)
+        except Exception:
+            logger.warning("Could not prune stale worker heartbeats", exc_info=True)
+
+    report = {
+        name: {
+            "workers": sum(name in queue_names for queue_names in live.values()),
+            "queued": depth,
+        }
+        for name, depth in zip(queues, depths)
+    }
+    return {
+        "redis": "ok",
+        "workers_total": len(live),
+        "workers_on_default": report.get("default", {}).get("workers", 0),
+        "queues": report,
+    }
+
+
+def is_ready(snapshot: dict, queue_names=None) -> bool:
+    """
+    Redis answered and each of ``queue_names`` (default: every queue) has at
+    least one live worker.
+    """
+    if snapshot["redis"] != "ok":
+        return False
+    queues = snapshot["queues"]
+    if queue_names is None:
+        queue_names = queues
+    return all(queues.get(name, {}).get("workers") for name in queue_names)
+
+
+def get_snapshot() -> dict:
+    """The process's cached snapshot, rebuilt once it is older than the TTL."""
+    global _snapshot, _snapshot_at
+
+    with _lock:
+        age = time.monotonic() - _snapshot_at
+        if _snapshot is None or age >= settings.HEALTH_SNAPSHOT_TTL:
+            _snapshot = build_snapshot()
+            _snapshot_at = time.monotonic()
+            age = 0.0
+        return {**_snapshot, "age_seconds": round(age, 1)}
+
+
+def reset_snapshot() -> None:
+    global _snapshot
+    with _lock:
+        _snapshot = None
@@ -0,0 +1,160 @@
+"""Deterministic local repair for the usual ways LLM JSON output breaks.
+
+One pass over the reply rebuilds it while fixing:
+
+- prose or markdown fences before or after the top-level value,
+- smart double quotes used as string delimiters (kept as-is inside strings),
+- raw newlines and other control characters inside strings, or, when that
+  does not parse, a newline taken as the missing closing quote,
+- trailing commas before ``}`` / ``]``,
+- missing commas between adjacent objects, arrays or array strings,
+- truncated output: the reply is cut back to the last complete array element
+  or top-level member (a half-written exercise object is dropped) and the
+  open containers are closed.
+
+The LLM round trip in ``fix_json_structure_once`` only runs when this fails.
+"""
+
+from __future__ import annotations
+
+import json
+
+_OPEN_QUOTES = {'"': '"', "“": "”", "”": "”", "„": "“"}
+_CLOSERS = {"{": "}", "[": "]"}
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+
+def repair_json_locally(content: str) -> str | None:
+    """Return repaired JSON text that parses, or None if it cannot be fixed locally."""
+    if not isinstance(content, str):
+        return None
+    start = _first_container(content)
+    if start is None:
+        return None
+
+    for newline_closes_string in (False, True):
+        repaired = _rebuild(content[start:], newline_closes_string)
+        if repaired is None:
+            continue
+        try:
+            json.loads(repaired)
+        except json.JSONDecodeError:
+            continue
+        return repaired
+    return None
+
+
+def _rebuild(text: str, newline_closes_string: bool) -> str | None:
+    out: list[str] = []
+    stack: list[str] = []
+    # (len(out), stack copy) just after the last complete value.
+    safe_point: tuple[int, list[str]] | None = None
+    closing_quote: str | None = None
+    escape = False
+    complete = False
+
+    for ch in text:
+        if closing_quote is not None:
+            if escape:
+                escape = False
+                out.append(ch)
+            elif ch == "\\":
+                escape = True
+                out.append(ch)
+            elif ch == closing_quote or ch == '"':
+                closing_quote = None
+                out.append('"')
+                if stack and stack[-1] == "[":
+                    safe_point = (len(out), stack.copy())
+            elif ch == "\n" and newline_closes_string:
+                closing_quote = None
+                _close_string_at_newline(out)
+            elif ch < " ":
+                out.append(_CONTROL_ESCAPES.get(ch, f"\\u{ord(ch):04x}"))
+            else:
+                out.append(ch)
+            continue
+
+        if ch in _OPEN_QUOTES:
+            _insert_missing_comma(out, stack, ch)
+            closing_quote = _OPEN_QUOTES[ch]
+            out.append('"')
+        elif ch in "{[":
+            _insert_missing_comma(out, stack, ch)
+            stack.append(ch)
+            out.append(ch)
+        elif ch in "}]":
+            if not stack:
+                break
+            _drop_trailing_comma(out)
+            out.append(_CLOSERS[stack.pop()])
+            if not stack:
+                complete = True
+                break
+            if _keeps_partial(stack):
+                safe_point = (len(out), stack.copy())
+        elif ch == ",":
+            # Everything before a separator is a complete member or element.
+            if _keeps_partial(stack):
+                safe_point = (len(out), stack.copy())
+            out.append(ch)
+        else:
+            out.append(ch)
+
+    if not complete:
+        # Truncated: a half-written string is never trusted, so cut back to the
+        # last complete value and close whatever is still open.
+        if safe_point is None:
+            return None
+        length, stack = safe_point
+        del out[length:]
+        _drop_trailing_comma(out)
+        out.extend(_CLOSERS[opener] for opener in reversed(stack))
+
+    return "".join(out)
+
+
+def _keeps_partial(stack: list[str]) -> bool:
+    """
+    Truncation may cut back to here: between array elements or top-level
+    members, but never inside a nested object (a half-built exercise).
+    """
+    return len(stack) == 1 or stack[-1] == "["
+
+
+def _first_container(content: str) -> int | None:
+    positions = [i for i in (content.find("{"), content.find("[")) if i != -1]
+    return min(positions) if positions else None
+
+
+def _last_significant(out: list[str]) -> str | None:
+    for piece in reversed(out):
+        stripped = piece.strip()
+        if stripped:
+            return stripped[-1]
+    return None
+
+
+def _insert_missing_comma(out: list[str], stack: list[str], next_char: str) -> None:
+    last = _last_significant(out)
+    if last in ("}", "]") or (last == '"' and stack and stack[-1] == "["):
+        if next_char in "{[" or next_char in _OPEN_QUOTES:
+            out.append(",")
+
+
+def _close_string_at_newline(out: list[str]) -> None:
+    """
+    End the open string before any trailing spaces/comma and put the comma
+    outside it; a comma left before a closing bracket is dropped later.
+    """
+    while out and out[-1] in (" ", "\t", "\r", ","):
+        out.pop()
+    out.extend(('"', ","))
+
+
+def _drop_trailing_comma(out: list[str]) -> None:
+    i = len(out) - 1
+    while i >= 0 and not out[i].strip():
+        i -= 1
+    if i >= 0 and out[i] == ",":
+        del out[i:]
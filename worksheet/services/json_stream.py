@@ -0,0 +1,97 @@
+"""Incremental parser that yields exercise objects from a streamed LLM reply.
+
+The worksheet reply is one JSON object of sections, each a list of exercise
+objects: ``{"section": [{"prompt": ..., "answer": [...]}, ...], ...}``.
+Feeding text chunks as they arrive yields every exercise object as soon as its
+closing brace is seen, so callers can validate it before the rest of the reply
+has been generated. Anything before the first ``{`` (prose, a markdown fence)
+is skipped.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+SECTION_DEPTH = 1
+ITEM_DEPTH = 3
+
+
+class ExerciseStreamParser:
+    """Single-pass, string-aware scanner over a streamed worksheet object."""
+
+    def __init__(self):
+        self.depth = 0
+        self.done = False
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._string_chars: list[str] = []
+        self._section: str | None = None
+        self._counts: dict[str, int] = {}
+        self._item_chars: list[str] = []
+
+    def feed(self, chunk: str) -> list[tuple[str, int, Any]]:
+        """Consume a chunk; return ``(section, index, item)`` for each closed item."""
+        closed: list[tuple[str, int, Any]] = []
+        if self.done:
+            return closed
+
+        for ch in chunk:
+            if self.depth >= ITEM_DEPTH:
+                self._item_chars.append(ch)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self.depth == SECTION_DEPTH and self._expect_key:
+                        self._section = "".join(self._string_chars)
+                        self._expect_key = False
+                elif self.depth == SECTION_DEPTH and self._expect_key:
+                    self._string_chars.append(ch)
+                continue
+
+            if self.depth == 0 and ch != "{":
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_chars = []
+            elif ch in "{[":
+                self.depth += 1
+                if self.depth == SECTION_DEPTH:
+                    self._expect_key = True
+                elif self.depth == ITEM_DEPTH and ch == "{":
+                    self._item_chars = [ch]
+            elif ch in "}]":
+                self.depth -= 1
+                if self.depth == ITEM_DEPTH - 1 and ch == "}":
+                    item = self._close_item()
+                    if item is not None:
+                        closed.append(item)
+                elif self.depth == 0:
+                    self.done = True
+                    break
+            elif ch == "," and self.depth == SECTION_DEPTH:
+                self._expect_key = True
+
+        return closed
+
+    def _close_item(self) -> tuple[str, int, Any] | None:
+        section = self._section
+        text = "".join(self._item_chars)
+        self._item_chars = []
+        if section is None:
+            return None
+        index = self._counts.get(section, 0)
+        self._counts[section] = index + 1
+        try:
+            item = json.loads(text)
+        except json.JSONDecodeError:
+            # Leave malformed items to the full-response extractor and repair.
+            return None
+        return section, index, item
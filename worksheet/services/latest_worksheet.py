@@ -0,0 +1,92 @@
+"""Read-through cache of each user's most recent worksheet.
+
+The worksheet API reads a user's latest worksheet on every request. Misses
+load it with one query on the ``(user, created_at)`` index and cache the row
+(or the fact that there is none). Everything that creates a worksheet calls
+``invalidate_latest_worksheet``, both straight away and again once the
+transaction commits, so a reader can never cache the replaced worksheet for
+longer than the write takes.
+
+The worksheet's validators, ``(content_hash, created_at)``, are cached under
+their own small key so conditional requests can be answered without loading
+(or unpickling) the content.
+"""
+
+import logging
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from worksheet.models import Worksheet
+from worksheet.services import metrics
+
+logger = logging.getLogger(__name__)
+
+CACHE_OUTCOMES = ("hit", "miss")
+CACHE_PREFIX = "latest_worksheet"
+VALIDATORS_PREFIX = "latest_worksheet_validators"
+# Cached in place of a worksheet for users who have none yet.
+_NO_WORKSHEET = "none"
+
+
+def latest_worksheet_key(user_id: int) -> str:
+    return f"{CACHE_PREFIX}:{user_id}"
+
+
+def latest_validators_key(user_id: int) -> str:
+    return f"{VALIDATORS_PREFIX}:{user_id}"
+
+
+def _latest_queryset(user):
+    return Worksheet.objects.filter(user=user).order_by("-created_at")
+
+
+def get_latest_worksheet_validators(user) -> tuple[str, datetime] | None:
+    """``(content_hash, created_at)`` of the user's latest worksheet, content unread."""
+    key = latest_validators_key(user.id)
+    cached = cache.get(key)
+    if cached is not None:
+        return None if cached == _NO_WORKSHEET else cached
+
+    validators = (
+        _latest_queryset(user).values_list("content_hash", "created_at").first()
+    )
+    cache.set(
+        key,
+        _NO_WORKSHEET if validators is None else validators,
+        timeout=settings.LATEST_WORKSHEET_CACHE_TTL,
+    )
+    return validators
+
+
+def get_latest_worksheet(user) -> Worksheet | None:
+    """The user's most recent worksheet, from the cache when possible."""
+    key = latest_worksheet_key(user.id)
+    cached = cache.get(key)
+    if cached is not None:
+        metrics.sample("latest_worksheet.hit")
+        return None if cached == _NO_WORKSHEET else cached
+
+    metrics.incr("latest_worksheet.miss")
+    worksheet = _latest_queryset(user).first()
+    if worksheet is None:
+        entries = {key: _NO_WORKSHEET, latest_validators_key(user.id): _NO_WORKSHEET}
+    else:
+        entries = {
+            key: worksheet,
+            latest_validators_key(user.id): (
+                worksheet.content_hash,
+                worksheet.created_at,
+            ),
+        }
+    cache.set_many(entries, timeout=settings.LATEST_WORKSHEET_CACHE_TTL)
+    return worksheet
+
+
+def invalidate_latest_worksheet(user_id: int) -> None:
+    keys = [latest_worksheet_key(user_id), latest_validators_key(user_id)]
+    cache.delete_many(keys)
+    # A read between the delete and the commit re-caches the old row.
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,98 @@
+"""Process-wide, pooled OpenAI client for the DeepSeek API.
+
+Building ``OpenAI(...)`` per call creates a new httpx pool, so every attempt
+(including blank-correction retries and JSON repairs) paid a fresh TCP + TLS
+handshake. Clients are cached per process and per (base_url, api_key) so
+keep-alive connections are reused between calls.
+
+RQ forks a work horse per job: a pool inherited across ``fork()`` shares
+sockets with the parent, so the registry is dropped in the child and rebuilt
+on first use there.
+"""
+
+import atexit
+import logging
+import os
+import threading
+
+import httpx
+from django.conf import settings
+from openai import DefaultHttpxClient, OpenAI
+
+logger = logging.getLogger(__name__)
+
+_clients: dict[tuple[str, str], OpenAI] = {}
+# Clients inherited from a parent process. Kept referenced so their finalizers
+# never run (and close shared sockets) in the child.
+_inherited: list[OpenAI] = []
+_clients_pid = os.getpid()
+_lock = threading.Lock()
+
+
+def _build_timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        settings.LLM_TIMEOUT,
+        connect=settings.LLM_CONNECT_TIMEOUT,
+    )
+
+
+def _build_client(base_url: str, api_key: str) -> OpenAI:
+    # Bound wall time so a wedged HTTP call cannot stall the single RQ worker forever.
+    timeout = _build_timeout()
+    http_client = DefaultHttpxClient(
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+        ),
+    )
+    return OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        timeout=timeout,
+        http_client=http_client,
+    )
+
+
+def get_llm_client() -> OpenAI:
+    """Return the shared client for the current process, creating it on first use."""
+    global _clients_pid
+
+    key = (settings.DEEPSEEK_BASE_URL, settings.DEEPSEEK_API_KEY)
+    with _lock:
+        if _clients_pid != os.getpid():
+            # Forked without the at-fork hook (e.g. os.fork wrappers): never
+            # touch the parent's sockets, just forget them.
+            _inherited.extend(_clients.values())
+            _clients.clear()
+            _clients_pid = os.getpid()
+
+        client = _clients.get(key)
+        if client is None:
+            logger.info("Creating pooled LLM client for %s", key[0])
+            client = _build_client(*key)
+            _clients[key] = client
+        return client
+
+
+def close_llm_clients() -> None:
+    """Close every pooled client owned by this process."""
+    with _lock:
+        if _clients_pid == os.getpid():
+            for client in _clients.values():
+                client.close()
+        _clients.clear()
+
+
+def _forget_clients_after_fork() -> None:
+    global _clients_pid, _lock
+    # The lock may have been held by another thread at fork time.
+    _lock = threading.Lock()
+    _inherited.extend(_clients.values())
+    _clients.clear()
+    _clients_pid = os.getpid()
+
+
+os.register_at_fork(after_in_child=_forget_clients_after_fork)
+atexit.register(close_llm_clients)
@@ -0,0 +1,209 @@
+"""Process-wide, pooled HTTP session for the Mailgun API.
+
+A bare ``requests.post`` opens a new connection (TCP + TLS) per email and gives
+up on the first 429 or 5xx. The session here keeps connections alive between
+sends and retries throttled or failing calls with jittered exponential backoff,
+waiting at least as long as Mailgun's ``Retry-After`` asks.
+
+Only failures where Mailgun cannot have accepted the message are retried:
+429, 5xx and errors while connecting (refused, DNS, connect timeout). Errors
+after the request went out (a dropped connection, a read timeout) are raised
+straight away so a slow but successful send is not duplicated. All attempts
+and waits of one send fit in ``MAILGUN_RETRY_BUDGET`` seconds, a small share
+of an outbox drain (``OUTBOX_DISPATCH_TIMEOUT``, which its leases outlast).
+
+Like the LLM client, the session is rebuilt after ``fork()`` so an RQ work
+horse never shares sockets with its parent.
+"""
+
+import atexit
+import logging
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from worksheet.services import metrics, rate_limit
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+STATUS_CLASSES = ("2xx", "429", "4xx", "5xx", "error")
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500)
+RETRY_OUTCOMES = ("retried", "gave_up")
+
+_session: requests.Session | None = None
+_session_pid = os.getpid()
+_lock = threading.Lock()
+
+
+def latency_buckets() -> list[str]:
+    return [f"le_{ms}ms" for ms in LATENCY_BUCKETS_MS] + [
+        f"gt_{LATENCY_BUCKETS_MS[-1]}ms"
+    ]
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    # Retries are ours (below) so every attempt is timed and counted.
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.MAILGUN_POOL_MAXSIZE,
+        max_retries=0,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_mailgun_session() -> requests.Session:
+    """Return the shared session for the current process, creating it on first use."""
+    global _session, _session_pid
+
+    with _lock:
+        if _session_pid != os.getpid():
+            # Inherited from the parent: never close its sockets, just forget it.
+            _session = None
+            _session_pid = os.getpid()
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+
+def close_mailgun_session() -> None:
+    global _session
+
+    with _lock:
+        if _session is not None and _session_pid == os.getpid():
+            _session.close()
+        _session = None
+
+
+def retry_after_seconds(response) -> float | None:
+    """Seconds asked for by a ``Retry-After`` header (delta or HTTP date)."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - timezone.now()).total_seconds())
+
+
+def backoff_seconds(attempt: int) -> float:
+    """Full-jitter exponential backoff for retry number ``attempt`` (from 0)."""
+    ceiling = min(
+        settings.MAILGUN_BACKOFF_MAX, settings.MAILGUN_BACKOFF_BASE * 2**attempt
+    )
+    return random.uniform(0, ceiling)
+
+
+def _record(started: float, status_class: str) -> None:
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    bucket = next(
+        (f"le_{ms}ms" for ms in LATENCY_BUCKETS_MS if elapsed_ms <= ms),
+        f"gt_{LATENCY_BUCKETS_MS[-1]}ms",
+    )
+    metrics.incr(f"mailgun.latency.{bucket}")
+    metrics.incr(f"mailgun.status.{status_class}")
+
+
+def _failed_to_connect(exc: requests.exceptions.ConnectionError) -> bool:
+    """True if the request never reached Mailgun, so retrying cannot duplicate it."""
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    # Refused connections and DNS failures: MaxRetryError(reason=NewConnectionError).
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def _status_class(response) -> str:
+    if response.ok:
+        return "2xx"
+    if response.status_code == 429:
+        return "429"
+    return "5xx" if response.status_code >= 500 else "4xx"
+
+
+def post(url: str, data: dict):
+    """
+    POST to Mailgun through the pooled session, retrying 429/5xx and
+    connect failures. Returns the last response; connect failures left after
+    the final attempt (or once the retry budget is spent) are raised.
+    """
+    session = get_mailgun_session()
+    max_retries = settings.MAILGUN_MAX_RETRIES
+    deadline = time.monotonic() + settings.MAILGUN_RETRY_BUDGET
+    recipients = data.get("to")
+    messages = len(recipients) if isinstance(recipients, list) else 1
+    attempt = 0
+    while True:
+        # Raises RateLimited rather than sleeping past the retry budget.
+        remaining = deadline - time.monotonic() - settings.MAILGUN_TIMEOUT
+        rate_limit.acquire("mailgun", tokens=messages, max_wait=remaining)
+        started = time.perf_counter()
+        try:
+            response = session.post(
+                url,
+                auth=("api", settings.MAILGUN_API_KEY),
+                data=data,
+                timeout=settings.MAILGUN_TIMEOUT,
+            )
+        except requests.exceptions.ConnectionError as exc:
+            _record(started, "error")
+            if not _failed_to_connect(exc):
+                raise
+            wait = backoff_seconds(attempt)
+            if attempt >= max_retries or not _fits_budget(deadline, wait):
+                metrics.incr("mailgun.gave_up")
+                raise
+            logger.warning("Mailgun connection failed; retrying in %.1fs", wait)
+        except requests.exceptions.RequestException:
+            _record(started, "error")
+            raise
+        else:
+            _record(started, _status_class(response))
+            if response.status_code not in RETRY_STATUSES:
+                return response
+            wait = backoff_seconds(attempt)
+            retry_after = retry_after_seconds(response)
+            if retry_after is not None:
+                wait = max(wait, retry_after)
+            # Waiting past the budget would stall the drain; the outbox retries later.
+            if attempt >= max_retries or not _fits_budget(deadline, wait):
+                metrics.incr("mailgun.gave_up")
+                return response
+            logger.warning(
+                "Mailgun returned %s; retrying in %.1fs", response.status_code, wait
+            )
+        metrics.incr("mailgun.retried")
+        time.sleep(wait)
+        attempt += 1
+
+
+def _fits_budget(deadline: float, wait: float) -> bool:
+    """Whether a wait plus one more full attempt still ends before ``deadline``."""
+    return time.monotonic() + wait + settings.MAILGUN_TIMEOUT <= deadline
+
+
+def _forget_session_after_fork() -> None:
+    global _session, _session_pid, _lock
+    _lock = threading.Lock()
+    _session = None
+    _session_pid = os.getpid()
+
+
+os.register_at_fork(after_in_child=_forget_session_after_fork)
+atexit.register(close_mailgun_session)
@@ -0,0 +1,66 @@
+"""Counters shared by web and worker processes, kept in the Django cache.
+
+With the Redis cache a bump is one ``INCRBY`` on the cache's own key, which
+creates missing counters, so counting costs a single round trip. Counters
+bumped on every API request use ``sample`` to write only a share of the time.
+"""
+
+import logging
+import random
+
+import django_rq
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "metrics:"
+
+
+def _uses_redis() -> bool:
+    return settings.CACHES["default"]["BACKEND"].endswith("RedisCache")
+
+
+def incr(name: str, amount: int = 1) -> int | None:
+    """Add ``amount`` to counter ``name``; metrics never break the caller."""
+    key = KEY_PREFIX + name
+    try:
+        if _uses_redis():
+            # The cache reads integers back as stored, so snapshot() sees this.
+            connection = django_rq.get_connection("default")
+            return connection.incrby(cache.make_key(key), amount)
+        try:
+            return cache.incr(key, amount)
+        except ValueError:
+            if cache.add(key, amount, timeout=None):
+                return amount
+            return cache.incr(key, amount)
+    except Exception:
+        logger.warning("Could not record metric %s", name, exc_info=True)
+        return None
+
+
+def sample(name: str, rate: float | None = None) -> int | None:
+    """
+    Count one event on a hot path: with probability ``rate`` (default
+    ``METRICS_HIT_SAMPLE_RATE``) add ``1 / rate``, so the counter estimates
+    the true total at a fraction of the writes.
+    """
+    if rate is None:
+        rate = settings.METRICS_HIT_SAMPLE_RATE
+    if rate <= 0:
+        return None
+    if rate >= 1:
+        return incr(name)
+    if random.random() >= rate:
+        return None
+    return incr(name, round(1 / rate))
+
+
+def snapshot(names: list[str]) -> dict[str, int]:
+    values = cache.get_many([KEY_PREFIX + name for name in names])
+    return {name: values.get(KEY_PREFIX + name, 0) for name in names}
+
+
+def reset(names: list[str]) -> None:
+    cache.delete_many([KEY_PREFIX + name for name in names])
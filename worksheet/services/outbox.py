@@ -0,0 +1,183 @@
+"""Transactional email outbox for worksheet deliveries.
+
+``add_to_outbox`` runs inside the transaction that saves the worksheet, so a
+worksheet that was generated is never without its pending email, however
+Mailgun is doing. Dispatchers (``dispatch_outbox`` command or the RQ job on
+the ``email`` queue) lease due rows with ``SKIP LOCKED``, send them with
+Mailgun batch sending and record the outcome:
+
+- sent rows are marked ``sent``,
+- failed rows are retried after ``OUTBOX_RETRY_INTERVALS``,
+- after ``OUTBOX_MAX_ATTEMPTS`` failures a row is dead-lettered (``dead``)
+  and stays in the table for inspection and requeueing from the admin.
+
+A lease that runs out (the dispatcher died mid-send) makes the row due again,
+so delivery is at-least-once.
+"""
+
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from worksheet.models import EmailOutbox, Worksheet
+from worksheet.services import metrics
+from worksheet.services.email import send_worksheet_emails
+from worksheet.services.worksheet_content import WorksheetContent
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_OUTCOMES = ("sent", "retrying", "dead")
+
+
+def add_to_outbox(worksheet) -> EmailOutbox:
+    """Queue the worksheet's email; call inside the transaction that saved it."""
+    return EmailOutbox.objects.create(worksheet=worksheet)
+
+
+def delete_replaced_worksheets(user) -> None:
+    """
+    Delete the user's worksheets before a new one is saved, keeping any whose
+    email is still owed (pending, retrying or dead): deleting the worksheet
+    would cascade to its outbox row and silently drop the email.
+    """
+    Worksheet.objects.filter(user=user).exclude(
+        emails__status__in=(EmailOutbox.PENDING, EmailOutbox.DEAD)
+    ).delete()
+
+
+def _due(now):
+    return EmailOutbox.objects.filter(
+        status=EmailOutbox.PENDING, available_at__lte=now
+    ).filter(Q(leased_until__isnull=True) | Q(leased_until__lt=now))
+
+
+def claim_batch(limit: int, lease_seconds: int | None = None) -> list[EmailOutbox]:
+    """Lease up to ``limit`` due rows to this dispatcher."""
+    now = timezone.now()
+    lease_seconds = lease_seconds or settings.OUTBOX_LEASE_SECONDS
+    token = uuid.uuid4()
+    with transaction.atomic():
+        ids = list(
+            _due(now)
+            .select_for_update(skip_locked=True)
+            .order_by("available_at", "id")
+            .values_list("id", flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        EmailOutbox.objects.filter(id__in=ids).update(
+            leased_until=now + timedelta(seconds=lease_seconds), lease_token=token
+        )
+    return list(
+        EmailOutbox.objects.filter(lease_token=token).select_related("worksheet__user")
+    )
+
+
+def retry_delay(attempts: int) -> timedelta:
+    intervals = settings.OUTBOX_RETRY_INTERVALS
+    return timedelta(seconds=intervals[min(attempts, len(intervals)) - 1])
+
+
+def _record_failure(row: EmailOutbox, error: str, now) -> str:
+    row.attempts += 1
+    row.last_error = error
+    row.leased_until = None
+    row.lease_token = None
+    if row.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        row.status = EmailOutbox.DEAD
+        logger.error(
+            "Worksheet email %s dead-lettered after %s attempts: %s",
+            row.id,
+            row.attempts,
+            error,
+        )
+    else:
+        row.available_at = now + retry_delay(row.attempts)
+    row.save(
+        update_fields=[
+            "attempts",
+            "last_error",
+            "leased_until",
+            "lease_token",
+            "status",
+            "available_at",
+        ]
+    )
+    return "dead" if row.status == EmailOutbox.DEAD else "retrying"
+
+
+def dispatch_batch(rows: list[EmailOutbox]) -> dict[str, int]:
+    """Send leased rows in one Mailgun batch pass and record each outcome."""
+    counts = dict.fromkeys(DISPATCH_OUTCOMES, 0)
+    if not rows:
+        return counts
+
+    deliveries = [
+        (
+            row.worksheet.user,
+            WorksheetContent.from_data(row.worksheet.content) or row.worksheet.content,
+            row.worksheet.themes or None,
+        )
+        for row in rows
+    ]
+    try:
+        # By position, not user: a user can have several rows in one batch.
+        failed = set(send_worksheet_emails(deliveries))
+        error = "Mailgun send failed"
+    except Exception as e:
+        logger.exception("Outbox dispatch failed")
+        failed = set(range(len(rows)))
+        error = f"{type(e).__name__}: {e}"
+
+    now = timezone.now()
+    sent_ids = []
+    for index, row in enumerate(rows):
+        if index in failed:
+            counts[_record_failure(row, error, now)] += 1
+        else:
+            sent_ids.append(row.id)
+    if sent_ids:
+        EmailOutbox.objects.filter(id__in=sent_ids).update(
+            status=EmailOutbox.SENT,
+            sent_at=now,
+            leased_until=None,
+            lease_token=None,
+            last_error="",
+        )
+    counts["sent"] = len(sent_ids)
+    return counts
+
+
+def drain_outbox(batch_size: int | None = None, max_batches=None) -> dict[str, int]:
+    """Dispatch due emails batch by batch until none are left (or max_batches)."""
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    totals = dict.fromkeys(DISPATCH_OUTCOMES, 0)
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        rows = claim_batch(batch_size)
+        if not rows:
+            break
+        for outcome, count in dispatch_batch(rows).items():
+            totals[outcome] += count
+            if count:
+                metrics.incr(f"outbox.{outcome}", count)
+        batches += 1
+    if any(totals.values()):
+        logger.info("Outbox dispatch: %s", totals)
+    return totals
+
+
+def requeue_dead(queryset) -> int:
+    """Give dead-lettered emails a fresh set of attempts."""
+    return queryset.filter(status=EmailOutbox.DEAD).update(
+        status=EmailOutbox.PENDING,
+        attempts=0,
+        available_at=timezone.now(),
+        leased_until=None,
+        lease_token=None,
+    )
@@ -109,6 +109,31 @@ def _schema_section(key: str, item_count: int) -> str:
     return f'"{key}": [\n    {items}\n  ]'
 
 
+GRAMMAR_SECTION_RULES = """
+- Spanish only in prompts and answers.
+- Do NOT use obvious mistakes like "yo sabo" or "yo cabo".
+- Each \"answer\" is a JSON array of non-empty strings (one or more).
+- Each \"prompt\" contains exactly ONE blank, written as: ___ (with a parenthetical infinitive
+  hint when the blank is a verb, e.g. ___ (hacer); no parenthetical when it isn't). No more, no
+  fewer than one blank.
+- The blank replaces only the missing word(s) described above for that section; each string in
+  \"answer\" is ONLY those word(s), not the full sentence. If multiple answers are acceptable, use
+  multiple strings in \"answer\" (never one string with \" | \").
+- Intentional ambiguity only when grammatical (e.g. acceptable tense/aspect alternates or
+  synonymous connectors); then list every acceptable answer in \"answer\".
+""".strip()
+
+TRANSLATION_SECTION_RULES = f"""
+- "{TRANSLATION_KEY}" prompts are short English clauses — a subject with a conjugated verb (e.g.
+  "He arrived"), or a subject with a conjugated verb plus one other word or short complement (e.g.
+  "We left the card", "He began to feel tired") — contain NO blank, and are unrelated to the
+  grammar points above. Never a longer, multi-clause sentence.
+- "{TRANSLATION_KEY}" answers are Spanish only, each a short clause translation matching the same
+  length as the prompt.
+- Each \"answer\" is a JSON array of non-empty strings (one or more).
+""".strip()
+
+
 def build_user_prompt(themes: list[str], grammar_pools: list[str]) -> str:
     theme_block = ", ".join(themes)
     pool_instructions = "\n\n".join(
@@ -131,26 +156,10 @@ Translation section — "{TRANSLATION_KEY}" ({TRANSLATION_ITEMS} exercises):
 - {TRANSLATION_GUIDANCE}
 
 Worksheet rules (grammar-point sections above, NOT "{TRANSLATION_KEY}"):
-- Spanish only in prompts and answers.
-- Do NOT use obvious mistakes like "yo sabo" or "yo cabo".
-- Each \"answer\" is a JSON array of non-empty strings (one or more).
-- Each \"prompt\" contains exactly ONE blank, written as: ___ (with a parenthetical infinitive
-  hint when the blank is a verb, e.g. ___ (hacer); no parenthetical when it isn't). No more, no
-  fewer than one blank.
-- The blank replaces only the missing word(s) described above for that section; each string in
-  \"answer\" is ONLY those word(s), not the full sentence. If multiple answers are acceptable, use
-  multiple strings in \"answer\" (never one string with \" | \").
-- Intentional ambiguity only when grammatical (e.g. acceptable tense/aspect alternates or
-  synonymous connectors); then list every acceptable answer in \"answer\".
+{GRAMMAR_SECTION_RULES}
 
 Translation section rules:
-- "{TRANSLATION_KEY}" prompts are short English clauses — a subject with a conjugated verb (e.g.
-  "He arrived"), or a subject with a conjugated verb plus one other word or short complement (e.g.
-  "We left the card", "He began to feel tired") — contain NO blank, and are unrelated to the
-  grammar points above. Never a longer, multi-clause sentence.
-- "{TRANSLATION_KEY}" answers are Spanish only, each a short clause translation matching the same
-  length as the prompt.
-- Each \"answer\" is a JSON array of non-empty strings (one or more).
+{TRANSLATION_SECTION_RULES}
 
 Fill in the following JSON exactly.
 Do not add, remove, or rename keys.
@@ -166,6 +175,57 @@ Output valid JSON only.
     return prompt
 
 
+def build_section_user_prompt(
+    themes: list[str], section: str, grammar_pools: list[str]
+) -> str:
+    """
+    Prompt for a single worksheet section (one grammar pool or translation).
+    The translation prompt lists the worksheet's grammar points, which its
+    rules say to stay clear of.
+    """
+    theme_block = ", ".join(themes)
+    if section == TRANSLATION_KEY:
+        item_count = TRANSLATION_ITEMS
+        grammar_points = "\n".join(f"- {pool}" for pool in grammar_pools)
+        instructions = f"""
+Grammar points for this worksheet (practised in the other sections):
+{grammar_points}
+
+Translation section — "{TRANSLATION_KEY}" ({TRANSLATION_ITEMS} exercises):
+- {TRANSLATION_GUIDANCE}
+
+Rules:
+{TRANSLATION_SECTION_RULES}
+""".strip()
+    else:
+        item_count = ITEMS_PER_POOL
+        instructions = f"""
+Grammar point — "{section}" ({ITEMS_PER_POOL} exercises) — {GRAMMAR_POOL_GUIDANCE[section]}
+
+Rules:
+{GRAMMAR_SECTION_RULES}
+""".strip()
+
+    prompt = f"""
+Themes:
+{theme_block}
+
+{instructions}
+
+Fill in the following JSON exactly.
+Do not add, remove, or rename keys.
+Do not add text outside the JSON.
+
+{{
+  {_schema_section(section, item_count)}
+}}
+
+Output valid JSON only.
+""".strip()
+
+    return prompt
+
+
 def build_payload(themes: list[str], grammar_pools: list[str]) -> list[dict]:
     logger.debug(
         "Building payload with themes: %s, grammar_pools: %s", themes, grammar_pools
@@ -180,6 +240,20 @@ def build_payload(themes: list[str], grammar_pools: list[str]) -> list[dict]:
     return payload
 
 
+def build_section_payload(
+    themes: list[str], section: str, grammar_pools: list[str]
+) -> list[dict]:
+    logger.debug("Building section payload for %s with themes: %s", section, themes)
+
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": build_section_user_prompt(themes, section, grammar_pools),
+        },
+    ]
+
+
 def build_custom_user_prompt(request_text: str) -> str:
     prompt = f"""
 Custom exercise request:
@@ -0,0 +1,221 @@
+"""Token-bucket rate limits shared by every worker calling an external provider.
+
+Each provider in ``settings.RATE_LIMITS`` has up to two buckets: requests
+per second and tokens per minute (LLM tokens for DeepSeek, messages for
+Mailgun). ``acquire`` takes from both at once and sleeps until the debt is
+paid back, so callers queue in arrival order instead of all firing and
+collecting 429s. A limit of 0 disables that bucket.
+
+A request larger than a bucket takes the whole bucket rather than running up
+debt it could never fit in. Callers with a deadline pass ``max_wait``: a take
+that would owe longer is not made and ``RateLimited`` is raised, so the job
+gives up and retries later instead of sleeping through its timeout.
+
+With the Redis cache configured the buckets live in Redis and are updated by
+one Lua script per call (using Redis' clock), so every web and RQ process
+shares them. Otherwise (tests, local runs) they are per process.
+"""
+
+import logging
+import threading
+import time
+
+import django_rq
+from django.conf import settings
+
+from worksheet.services import metrics
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ratelimit:"
+WAIT_BUCKETS_MS = (100, 1000, 10000)
+
+# Refill, take ``requested`` (going into debt if needed) and return how long
+# the caller must wait for the debt to be repaid, as a string (Lua numbers
+# would be truncated to integers). A wait over ``max_wait`` (when it is not
+# negative) is returned without taking anything.
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local max_wait = tonumber(ARGV[4])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+local updated = tonumber(redis.call('HGET', KEYS[1], 'updated'))
+if tokens == nil then
+    tokens = capacity
+    updated = now
+end
+tokens = math.min(capacity, tokens + (now - updated) * rate) - requested
+local wait = 0
+if tokens < 0 then
+    wait = -tokens / rate
+end
+if max_wait >= 0 and wait > max_wait then
+    return tostring(wait)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(wait)
+"""
+
+# Passed as max_wait for "no limit".
+_UNLIMITED = -1
+
+_local_buckets: dict[str, tuple[float, float]] = {}
+_local_lock = threading.Lock()
+_script = None
+
+
+class RateLimited(Exception):
+    """Taking now would mean waiting longer than the caller's ``max_wait``."""
+
+    def __init__(self, provider: str, wait: float):
+        super().__init__(f"{provider} rate limit needs a {wait:.1f}s wait")
+        self.provider = provider
+        self.wait = wait
+
+
+def wait_buckets() -> list[str]:
+    return (
+        ["none"]
+        + [f"le_{ms}ms" for ms in WAIT_BUCKETS_MS]
+        + [f"gt_{WAIT_BUCKETS_MS[-1]}ms", "rejected"]
+    )
+
+
+def _uses_redis() -> bool:
+    return settings.CACHES["default"]["BACKEND"].endswith("RedisCache")
+
+
+def _take_redis(
+    key: str, capacity: float, rate: float, requested: float, max_wait: float
+) -> float:
+    global _script
+    if _script is None:
+        _script = django_rq.get_connection("default").register_script(_TAKE_SCRIPT)
+    return float(_script(keys=[key], args=[capacity, rate, requested, max_wait]))
+
+
+def _take_local(
+    key: str, capacity: float, rate: float, requested: float, max_wait: float
+) -> float:
+    with _local_lock:
+        now = time.monotonic()
+        tokens, updated = _local_buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate) - requested
+        wait = 0.0 if tokens >= 0 else -tokens / rate
+        if max_wait < 0 or wait <= max_wait:
+            _local_buckets[key] = (tokens, now)
+    return wait
+
+
+def _buckets(provider: str, tokens: float):
+    """``(key, capacity, refill per second, requested)`` for each enabled bucket."""
+    limits = settings.RATE_LIMITS.get(provider, {})
+    per_second = limits.get("requests_per_second") or 0
+    per_minute = limits.get("tokens_per_minute") or 0
+    if per_second > 0:
+        yield f"{KEY_PREFIX}{provider}:requests", max(per_second, 1), per_second, 1
+    if per_minute > 0 and tokens:
+        # More than a full bucket could never be paid back in one go.
+        requested = min(tokens, per_minute)
+        yield f"{KEY_PREFIX}{provider}:tokens", per_minute, per_minute / 60, requested
+
+
+def take(provider: str, tokens: float = 0, max_wait: float | None = None) -> float:
+    """
+    Take one request and ``tokens`` now; seconds the caller owes in waiting.
+    With ``max_wait``, nothing is taken and ``RateLimited`` is raised if the
+    caller would owe longer.
+    """
+    take_bucket = _take_redis if _uses_redis() else _take_local
+    limit = _UNLIMITED if max_wait is None else max(0.0, max_wait)
+    wait = 0.0
+    taken = []
+    for bucket in _buckets(provider, tokens):
+        try:
+            owed = take_bucket(*bucket, limit)
+        except Exception:
+            # A limiter outage must not stop deliveries; fall back to no limit.
+            logger.warning("Rate limiter unavailable for %s", provider, exc_info=True)
+            continue
+        if limit != _UNLIMITED and owed > limit:
+            # Give back what the other bucket already took.
+            for key, capacity, rate, requested in taken:
+                _refund(take_bucket, provider, key, capacity, rate, requested)
+            raise RateLimited(provider, owed)
+        taken.append(bucket)
+        wait = max(wait, owed)
+    return wait
+
+
+def _refund(take_bucket, provider, key, capacity, rate, requested) -> None:
+    try:
+        take_bucket(key, capacity, rate, -requested, _UNLIMITED)
+    except Exception:
+        logger.warning("Rate limiter unavailable for %s", provider, exc_info=True)
+
+
+def is_limited(provider: str) -> bool:
+    limits = settings.RATE_LIMITS.get(provider, {})
+    return any((value or 0) > 0 for value in limits.values())
+
+
+def acquire(provider: str, tokens: float = 0, max_wait: float | None = None) -> float:
+    """
+    Block until ``provider`` allows one more request of ``tokens``; seconds
+    waited. Raises ``RateLimited`` instead of waiting longer than ``max_wait``.
+    """
+    if not is_limited(provider):
+        return 0.0
+    try:
+        wait = take(provider, tokens, max_wait=max_wait)
+    except RateLimited:
+        metrics.incr(f"rate_limit.{provider}.rejected")
+        raise
+    if wait > 0:
+        logger.debug("Rate limit: waiting %.2fs for %s", wait, provider)
+        time.sleep(wait)
+    _record_wait(provider, wait)
+    return wait
+
+
+def settle(provider: str, extra_tokens: float) -> None:
+    """Charge (or refund, if negative) tokens once the real usage is known."""
+    limits = settings.RATE_LIMITS.get(provider, {})
+    per_minute = limits.get("tokens_per_minute") or 0
+    if per_minute <= 0 or not extra_tokens:
+        return
+    extra_tokens = min(extra_tokens, per_minute)
+    take_bucket = _take_redis if _uses_redis() else _take_local
+    try:
+        take_bucket(
+            f"{KEY_PREFIX}{provider}:tokens",
+            per_minute,
+            per_minute / 60,
+            extra_tokens,
+            _UNLIMITED,
+        )
+    except Exception:
+        logger.warning("Rate limiter unavailable for %s", provider, exc_info=True)
+
+
+def _record_wait(provider: str, wait: float) -> None:
+    wait_ms = wait * 1000
+    if wait_ms <= 0:
+        bucket = "none"
+    else:
+        bucket = next(
+            (f"le_{ms}ms" for ms in WAIT_BUCKETS_MS if wait_ms <= ms),
+            f"gt_{WAIT_BUCKETS_MS[-1]}ms",
+        )
+    metrics.incr(f"rate_limit.{provider}.{bucket}")
+    if wait_ms > 0:
+        metrics.incr(f"rate_limit.{provider}.wait_ms", int(wait_ms))
+
+
+def reset_local_buckets() -> None:
+    with _local_lock:
+        _local_buckets.clear()
@@ -0,0 +1,25 @@
+"""Atomic allocation of rotation indices stored in ``Config`` rows.
+
+The row is locked with ``select_for_update`` for the read-modify-write, so
+concurrent workers never get the same index, and a batch can reserve a block
+of consecutive indices in one transaction.
+"""
+
+from django.db import transaction
+
+from worksheet.models import Config
+
+
+def reserve_indices(key: str, count: int = 1, modulo: int | None = None) -> int:
+    """
+    Reserve ``count`` consecutive indices under ``key`` and return the first.
+    The stored value advances by ``count`` (wrapped by ``modulo`` if given).
+    """
+    with transaction.atomic():
+        Config.objects.get_or_create(key=key, defaults={"value": "0"})
+        cfg = Config.objects.select_for_update().get(key=key)
+        start = int(cfg.value)
+        end = start + count
+        cfg.value = str(end % modulo if modulo else end)
+        cfg.save(update_fields=["value"])
+    return start
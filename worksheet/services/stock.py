@@ -0,0 +1,129 @@
+"""Ready pool of pre-generated worksheets for scheduled deliveries.
+
+Worksheets are not user-specific (themes and grammar pools come from the
+shared rotators), so they can be generated ahead of time. The stocking job
+fills the pool with enough validated worksheets to cover every delivery due
+within ``WORKSHEET_STOCK_HORIZON_DAYS``; delivery claims one and only falls
+back to live generation when the pool is empty.
+"""
+
+import hashlib
+import logging
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import User
+from worksheet.models import StockedWorksheet, Worksheet
+from worksheet.services.generate import (
+    generate_worksheet_content,
+    generate_worksheet_for,
+)
+from worksheet.services.grammar_rotator import reserve_grammar_pools
+from worksheet.services.latest_worksheet import invalidate_latest_worksheet
+from worksheet.services.outbox import add_to_outbox, delete_replaced_worksheets
+from worksheet.services.topic_rotator import reserve_topics
+from worksheet.services.worksheet_content import dump_content
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_INTERVAL_DAYS = 2
+
+
+def deliveries_due(today: date | None = None, horizon_days: int | None = None) -> int:
+    """Number of scheduled deliveries from today up to today + horizon_days."""
+    today = today or timezone.now().date()
+    if horizon_days is None:
+        horizon_days = settings.WORKSHEET_STOCK_HORIZON_DAYS
+    end = today + timedelta(days=horizon_days)
+
+    due = 0
+    next_deliveries = User.objects.filter(
+        active=True, next_delivery__isnull=False, next_delivery__lte=end
+    ).values_list("next_delivery", flat=True)
+    for next_delivery in next_deliveries:
+        first = max(next_delivery, today)
+        due += (end - first).days // DELIVERY_INTERVAL_DAYS + 1
+    return due
+
+
+def stock_worksheets(today: date | None = None, limit: int | None = None) -> int:
+    """
+    Generate worksheets until the ready pool covers the deliveries due within
+    the horizon (at most ``limit`` this run). Returns how many were added.
+    """
+    missing = deliveries_due(today) - StockedWorksheet.objects.count()
+    if limit is not None:
+        missing = min(missing, limit)
+    if missing <= 0:
+        logger.info("Worksheet stock already covers the delivery horizon")
+        return 0
+
+    logger.info("Stocking %s worksheet(s)", missing)
+    added = 0
+    # Reserve the whole run's rotation in one locked update, so concurrent
+    # workers can't be handed the same themes and pools.
+    rotations = zip(reserve_topics(missing), reserve_grammar_pools(missing))
+    for themes, grammar_pools in rotations:
+        parsed = generate_worksheet_content(themes, grammar_pools)
+        if parsed is None:
+            logger.warning("Stock generation failed for pools %s", grammar_pools)
+            continue
+
+        h = hashlib.sha256(dump_content(parsed).encode("utf-8")).hexdigest()
+        if (
+            Worksheet.objects.filter(content_hash=h).exists()
+            or StockedWorksheet.objects.filter(content_hash=h).exists()
+        ):
+            logger.warning("Duplicate stocked worksheet skipped")
+            continue
+
+        StockedWorksheet.objects.create(
+            content_hash=h, content=parsed, topics=grammar_pools, themes=themes
+        )
+        added += 1
+
+    logger.info("Stocked %s of %s worksheet(s)", added, missing)
+    return added
+
+
+def claim_stocked_worksheet(user, deliver=False) -> str | None:
+    """
+    Move the oldest stocked worksheet to ``user`` (replacing their previous
+    one, as live generation does). Returns its content, or None if the pool
+    is empty. With ``deliver`` its email is queued in the same transaction.
+    """
+    with transaction.atomic():
+        stocked = (
+            StockedWorksheet.objects.select_for_update(skip_locked=True)
+            .order_by("created_at", "id")
+            .first()
+        )
+        if stocked is None:
+            return None
+
+        stocked.delete()
+        delete_replaced_worksheets(user)
+        invalidate_latest_worksheet(user.id)
+        worksheet = Worksheet.objects.create(
+            user=user,
+            content_hash=stocked.content_hash,
+            content=stocked.content,
+            topics=stocked.topics,
+            themes=stocked.themes,
+        )
+        if deliver:
+            add_to_outbox(worksheet)
+
+    logger.info("Claimed stocked worksheet for user: %s", user.email)
+    return dump_content(stocked.content)
+
+
+def claim_or_generate_worksheet_for(user, deliver=False) -> str | None:
+    content = claim_stocked_worksheet(user, deliver=deliver)
+    if content is not None:
+        return content
+    logger.info("Worksheet stock empty; generating live for %s", user.email)
+    return generate_worksheet_for(user, deliver=deliver)
@@ -1,5 +1,5 @@
-from worksheet.models import Config
 from worksheet.services.prompts import THEME_POOLS
+from worksheet.services.rotation import reserve_indices
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,24 +10,16 @@ def get_and_increment_topics():
     Returns the theme list for this generation,
     and increments the index for next time.
     """
-    cfg, created = Config.objects.get_or_create(
-        key="topic_index", defaults={"value": "0"}
-    )
+    return reserve_topics(1)[0]
 
-    if created:
-        logger.info("Created new topic_index config, starting at 0")
-    else:
-        logger.debug(f"Retrieved existing topic_index: {cfg.value}")
 
-    index = int(cfg.value)
-    themes = THEME_POOLS[index % len(THEME_POOLS)]
-
-    logger.info(
-        f"Selected theme pool at index {index} (pool {index % len(THEME_POOLS)}): {themes}"
-    )
-
-    cfg.value = str(index + 1)
-    cfg.save()
-    logger.debug(f"Incremented topic_index to {cfg.value}")
+def reserve_topics(count):
+    """
+    Returns the theme lists for the next ``count`` worksheets, advancing the
+    index once for the whole block.
+    """
+    index = reserve_indices("topic_index", count)
+    selections = [THEME_POOLS[(index + n) % len(THEME_POOLS)] for n in range(count)]
 
-    return themes
+    logger.info(f"Selected theme pools from index {index}: {selections}")
+    return selections
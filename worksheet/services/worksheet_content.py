@@ -0,0 +1,117 @@
+"""Typed worksheet content: sections of exercises, parsed once and passed around.
+
+``Worksheet.content`` is stored as JSON, so reads already hand back a dict.
+``WorksheetContent.from_data`` turns that dict (or a legacy JSON string)
+into small ``__slots__`` objects a single time. Rendering and delivery then
+work from those objects instead of re-decoding the stored value at each step.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from worksheet.services.exercise_items import exercise_prompt_for_display
+
+
+def normalize_to_list(value):
+    """Convert string values to list by splitting on sentence patterns.
+
+    Handles cases where LLM returns a string instead of an array.
+    Supports multiple patterns:
+    - Pattern 1: '", "' for quoted list strings
+    - Pattern 2: '., ' for period-comma-space sentence boundaries
+    """
+    if isinstance(value, list):
+        return value
+    elif isinstance(value, str):
+        # Pattern 1: Split by '", "' (for quoted list strings)
+        if '", "' in value:
+            return [s.strip().strip('"').strip("'") for s in value.split('", "')]
+
+        # Pattern 2: Split by '., ' (period, comma, space - sentence boundaries)
+        if "., " in value:
+            parts = value.split("., ")
+            return [
+                s.strip() + ("." if i < len(parts) - 1 else "")
+                for i, s in enumerate(parts)
+            ]
+
+        return [value]
+    else:
+        return []
+
+
+def dump_content(content: Any) -> str:
+    """Canonical JSON text of stored content (what ``content_hash`` is taken over)."""
+    if isinstance(content, str):
+        return content
+    return json.dumps(content, ensure_ascii=False)
+
+
+class Exercise:
+    __slots__ = ("prompt", "answer")
+
+    def __init__(self, prompt: str, answer: list[str]):
+        self.prompt = prompt
+        self.answer = answer
+
+    @classmethod
+    def from_data(cls, item: Any) -> Exercise:
+        """From an exercise object; legacy string-only items have no answer."""
+        answer = item.get("answer") if isinstance(item, dict) else None
+        return cls(exercise_prompt_for_display(item), normalize_to_list(answer))
+
+    def to_data(self) -> dict[str, Any]:
+        return {"prompt": self.prompt, "answer": self.answer}
+
+
+class Section:
+    __slots__ = ("key", "exercises")
+
+    def __init__(self, key: str, exercises: list[Exercise]):
+        self.key = key
+        self.exercises = exercises
+
+    @property
+    def title(self) -> str:
+        return self.key.title()
+
+    @property
+    def prompts(self) -> list[str]:
+        return [exercise.prompt for exercise in self.exercises]
+
+
+class WorksheetContent:
+    __slots__ = ("sections",)
+
+    def __init__(self, sections: list[Section]):
+        self.sections = sections
+
+    @classmethod
+    def from_data(cls, content: Any) -> WorksheetContent | None:
+        """
+        Build from stored content (dict or JSON text). Returns None unless it
+        is a JSON object; an already built instance is returned unchanged.
+        """
+        if isinstance(content, cls):
+            return content
+        if isinstance(content, str):
+            try:
+                content = json.loads(content)
+            except json.JSONDecodeError:
+                return None
+        if not isinstance(content, dict):
+            return None
+        return cls(
+            [
+                Section(key, [Exercise.from_data(i) for i in normalize_to_list(value)])
+                for key, value in content.items()
+            ]
+        )
+
+    def to_data(self) -> dict[str, Any]:
+        return {
+            section.key: [exercise.to_data() for exercise in section.exercises]
+            for section in self.sections
+        }
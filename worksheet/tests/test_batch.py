@@ -0,0 +1,130 @@
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from worksheet.batch import (
+    enqueue_delivery_batch,
+    summarize_delivery_batch,
+    summarize_delivery_jobs,
+)
+from worksheet.jobs import generate_worksheet_job
+
+User = get_user_model()
+
+
+def _fake_queue():
+    queue = MagicMock()
+    queue.prepare_data.side_effect = lambda func, args, kwargs, **_: (
+        func,
+        args,
+        kwargs,
+    )
+    queue.enqueue_many.side_effect = lambda datas: [
+        MagicMock(id=f"user-job-{data[1][0]}") for data in datas
+    ]
+    queue.enqueue.side_effect = lambda func, *args, **kwargs: MagicMock(
+        id=f"{func.__name__}-{queue.enqueue.call_count}"
+    )
+    return queue
+
+
+def _finished(status=None, failed=False):
+    return MagicMock(
+        is_failed=failed,
+        is_finished=not failed,
+        return_value=MagicMock(return_value={"status": status} if status else None),
+    )
+
+
+class EnqueueDeliveryBatchTest(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.due = [
+            User.objects.create_user(
+                email=f"d{i}@example.com", next_delivery=self.today
+            )
+            for i in range(5)
+        ]
+        User.objects.create_user(
+            email="off@example.com", next_delivery=self.today, active=False
+        )
+
+    @patch("worksheet.batch.get_queue")
+    def test_shards_users_into_chunks_with_summary_jobs(self, mock_get_queue):
+        queue = mock_get_queue.return_value = _fake_queue()
+
+        enqueue_delivery_batch(chunk_size=2)
+
+        self.assertEqual(queue.enqueue_many.call_count, 3)
+        prepared = queue.prepare_data.call_args_list
+        self.assertEqual(
+            sorted(call.kwargs["args"][0] for call in prepared),
+            sorted(u.id for u in self.due),
+        )
+        self.assertTrue(
+            all(call.args[0] is generate_worksheet_job for call in prepared)
+        )
+        self.assertTrue(
+            all(call.kwargs["kwargs"] == {"from_stock": True} for call in prepared)
+        )
+        # Three chunk summaries plus the final summary, each waiting on its jobs.
+        enqueued = [call.args[0].__name__ for call in queue.enqueue.call_args_list]
+        self.assertEqual(
+            enqueued, ["summarize_delivery_jobs"] * 3 + ["summarize_delivery_batch"]
+        )
+        final_dependency = queue.enqueue.call_args_list[-1].kwargs["depends_on"]
+        self.assertEqual(len(final_dependency.dependencies), 3)
+        self.assertTrue(final_dependency.allow_failure)
+        self.assertFalse(
+            User.objects.filter(active=True, next_delivery=self.today).exists()
+        )
+        self.assertEqual(
+            User.objects.get(id=self.due[0].id).next_delivery,
+            self.today + timedelta(days=2),
+        )
+
+    @patch("worksheet.batch.get_queue")
+    def test_explicit_user_ids(self, mock_get_queue):
+        queue = mock_get_queue.return_value = _fake_queue()
+
+        enqueue_delivery_batch([self.due[0].id])
+
+        queue.enqueue_many.assert_called_once()
+        self.assertEqual(queue.prepare_data.call_args.kwargs["args"], (self.due[0].id,))
+        # Ad-hoc sends do not push the user's scheduled delivery back.
+        self.assertEqual(User.objects.get(id=self.due[0].id).next_delivery, self.today)
+
+
+@patch("worksheet.batch.get_queue")
+class SummarizeDeliveryTest(TestCase):
+    @patch("worksheet.batch.Job.fetch_many")
+    def test_counts_chunk_outcomes(self, mock_fetch, mock_get_queue):
+        mock_fetch.return_value = [
+            _finished("success"),
+            _finished("success"),
+            _finished("duplicate"),
+            _finished(failed=True),
+            None,
+        ]
+
+        summary = summarize_delivery_jobs(["a", "b", "c", "d", "e"])
+
+        self.assertEqual(
+            summary, {"success": 2, "duplicate": 1, "failed": 1, "unfinished": 1}
+        )
+
+    @patch("worksheet.batch.Job.fetch_many")
+    def test_adds_up_chunk_summaries(self, mock_fetch, mock_get_queue):
+        chunk = {"success": 2, "duplicate": 1, "failed": 0, "unfinished": 0}
+        mock_fetch.return_value = [
+            MagicMock(return_value=MagicMock(return_value=chunk)),
+            MagicMock(return_value=MagicMock(return_value=chunk)),
+        ]
+
+        self.assertEqual(
+            summarize_delivery_batch(["x", "y"]),
+            {"success": 4, "duplicate": 2, "failed": 0, "unfinished": 0},
+        )
@@ -0,0 +1,141 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from worksheet.services import custom_cache
+from worksheet.services.custom_cache import (
+    CustomGenerationInProgress,
+    custom_cache_key,
+    custom_cache_stats,
+    get_or_generate_custom_exercises,
+    normalize_request_text,
+)
+
+CONTENT = {"exercises": [{"prompt": "Ojalá ___ (venir).", "answer": ["venga"]}]}
+
+
+class NormalizeRequestTextTest(SimpleTestCase):
+    def test_ignores_case_spacing_and_surrounding_punctuation(self):
+        self.assertEqual(
+            normalize_request_text("  Subjuntivo   con OJALÁ! "),
+            "subjuntivo con ojalá",
+        )
+
+    def test_equivalent_requests_share_a_key(self):
+        self.assertEqual(
+            custom_cache_key("subjuntivo con ojalá"),
+            custom_cache_key("Subjuntivo con ojalá."),
+        )
+        self.assertNotEqual(
+            custom_cache_key("subjuntivo con ojalá"),
+            custom_cache_key("subjuntivo con aunque"),
+        )
+
+    def test_key_changes_with_prompt_version(self):
+        key = custom_cache_key("subjuntivo")
+        with patch.object(custom_cache, "custom_prompt_version", return_value="v2"):
+            self.assertNotEqual(custom_cache_key("subjuntivo"), key)
+
+
+class GetOrGenerateCustomExercisesTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    @patch("worksheet.services.custom_cache.generate_custom_exercises")
+    def test_second_equivalent_request_is_a_hit(self, mock_generate):
+        mock_generate.return_value = CONTENT
+
+        first = get_or_generate_custom_exercises("Subjuntivo con ojalá")
+        second = get_or_generate_custom_exercises("subjuntivo con ojalá.")
+
+        self.assertEqual(first, CONTENT)
+        self.assertEqual(second, CONTENT)
+        mock_generate.assert_called_once_with("Subjuntivo con ojalá")
+        stats = custom_cache_stats()
+        self.assertEqual(
+            (stats["custom_cache.miss"], stats["custom_cache.hit"]), (1, 1)
+        )
+
+    @patch("worksheet.services.custom_cache.generate_custom_exercises")
+    def test_failures_are_not_cached(self, mock_generate):
+        mock_generate.side_effect = [None, CONTENT]
+
+        self.assertIsNone(get_or_generate_custom_exercises("subjuntivo"))
+        self.assertEqual(get_or_generate_custom_exercises("subjuntivo"), CONTENT)
+        self.assertEqual(mock_generate.call_count, 2)
+
+    @override_settings(CUSTOM_EXERCISE_LOCK_TIMEOUT=5)
+    @patch.object(custom_cache, "WAIT_POLL_SECONDS", 0.01)
+    @patch("worksheet.services.custom_cache.generate_custom_exercises")
+    def test_concurrent_identical_requests_share_one_call(self, mock_generate):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_generate(request_text):
+            started.set()
+            release.wait(5)
+            return CONTENT
+
+        mock_generate.side_effect = slow_generate
+        results = []
+        leader = threading.Thread(
+            target=lambda: results.append(get_or_generate_custom_exercises("ojalá"))
+        )
+        leader.start()
+        started.wait(5)
+        followers = [
+            threading.Thread(
+                target=lambda: results.append(get_or_generate_custom_exercises("Ojalá"))
+            )
+            for _ in range(3)
+        ]
+        for follower in followers:
+            follower.start()
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        self.assertEqual(results, [CONTENT] * 4)
+        self.assertEqual(mock_generate.call_count, 1)
+        stats = custom_cache_stats()
+        self.assertEqual(stats["custom_cache.miss"], 1)
+        self.assertEqual(stats["custom_cache.hit"] + stats["custom_cache.coalesced"], 3)
+
+    @patch.object(custom_cache, "WAIT_POLL_SECONDS", 0.01)
+    @patch("worksheet.services.custom_cache.generate_custom_exercises")
+    def test_capped_wait_gives_up_without_generating(self, mock_generate):
+        cache.add(f"{custom_cache_key('ojalá')}:lock", "other")
+
+        with self.assertRaises(CustomGenerationInProgress):
+            get_or_generate_custom_exercises("ojalá", max_wait=0.05)
+
+        mock_generate.assert_not_called()
+
+
+REDIS_CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}}
+
+
+@override_settings(CACHES=REDIS_CACHES)
+@patch.object(custom_cache, "_release_script", None)
+@patch("worksheet.services.custom_cache.django_rq.get_connection")
+class RedisLockTest(SimpleTestCase):
+    def test_lock_is_taken_with_set_nx(self, mock_conn):
+        mock_conn.return_value.set.return_value = True
+
+        self.assertTrue(custom_cache._acquire("k:lock", "t1"))
+
+        mock_conn.return_value.set.assert_called_once_with(
+            "k:lock", "t1", nx=True, ex=600
+        )
+
+    def test_release_is_one_compare_and_delete(self, mock_conn):
+        script = MagicMock()
+        mock_conn.return_value.register_script.return_value = script
+
+        custom_cache._release("k:lock", "t1")
+
+        script.assert_called_once_with(keys=["k:lock"], args=["t1"])
+        mock_conn.return_value.get.assert_not_called()
+        mock_conn.return_value.delete.assert_not_called()
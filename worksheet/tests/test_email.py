@@ -4,12 +4,10 @@ from unittest.mock import patch, Mock
 import json
 import requests
 
-from worksheet.services.email import (
-    WORKSHEETS_URL,
-    format_worksheet_html,
-    normalize_to_list,
-    send_worksheet_email,
-)
+from worksheet.services import rate_limit
+from worksheet.services.email import send_worksheet_email, send_worksheet_emails
+from worksheet.services.email_render import WORKSHEETS_URL, render_worksheet_email
+from worksheet.services.worksheet_content import normalize_to_list
 from recipients.models import UserRecipient
 
 User = get_user_model()
@@ -68,8 +66,8 @@ class NormalizeToListTest(TestCase):
         self.assertEqual(result, [input_str])
 
 
-class FormatWorksheetHtmlTest(TestCase):
-    """Test format_worksheet_html function"""
+class RenderWorksheetHtmlTest(TestCase):
+    """Test the HTML body from render_worksheet_email"""
 
     def test_valid_json_string(self):
         """Test formatting valid JSON string"""
@@ -81,7 +79,7 @@ class FormatWorksheetHtmlTest(TestCase):
                 "connectors": ["sin embargo", "por lo tanto"],
             }
         )
-        result = format_worksheet_html(content)
+        result, _ = render_worksheet_email(content)
 
         self.assertIn("<html>", result)
         self.assertIn("Past Tenses", result)
@@ -101,7 +99,7 @@ class FormatWorksheetHtmlTest(TestCase):
             "future": ["Sentence 3"],
             "subjunctive": ["word"],
         }
-        result = format_worksheet_html(content)
+        result, _ = render_worksheet_email(content)
 
         self.assertIn("<html>", result)
         self.assertIn("Sentence 1", result)
@@ -112,7 +110,7 @@ class FormatWorksheetHtmlTest(TestCase):
     def test_missing_sections(self):
         """Sections not present in the JSON simply don't render."""
         content = {"past tenses": ["Only past tense"]}
-        result = format_worksheet_html(content)
+        result, _ = render_worksheet_email(content)
 
         self.assertIn("<html>", result)
         self.assertIn("Past Tenses", result)
@@ -128,7 +126,7 @@ class FormatWorksheetHtmlTest(TestCase):
             "future": "Single sentence., Another sentence.",
             "subjunctive": ["word"],
         }
-        result = format_worksheet_html(content)
+        result, _ = render_worksheet_email(content)
 
         self.assertIn("Sentence 1", result)
         self.assertIn("Sentence 2", result)
@@ -143,7 +141,7 @@ class FormatWorksheetHtmlTest(TestCase):
             "future": ["'quotes' & \"more quotes\""],
             "subjunctive": ["<b>bold</b>"],
         }
-        result = format_worksheet_html(content)
+        result, _ = render_worksheet_email(content)
 
         # Should escape HTML tags
         self.assertIn("&lt;script&gt;", result)
@@ -156,7 +154,7 @@ class FormatWorksheetHtmlTest(TestCase):
     def test_invalid_json_fallback(self):
         """Test fallback behavior for invalid JSON"""
         content = "This is not valid JSON at all"
-        result = format_worksheet_html(content)
+        result, _ = render_worksheet_email(content)
 
         # Should return fallback HTML with content in <pre> tag
         self.assertIn("<html>", result)
@@ -166,7 +164,7 @@ class FormatWorksheetHtmlTest(TestCase):
     def test_empty_content(self):
         """Test handling of empty content"""
         content = {}
-        result = format_worksheet_html(content)
+        result, _ = render_worksheet_email(content)
 
         # Should still generate valid HTML structure, with no sections
         self.assertIn("<html>", result)
@@ -175,7 +173,7 @@ class FormatWorksheetHtmlTest(TestCase):
     def test_malformed_json_string(self):
         """Test handling of malformed JSON string"""
         content = '{"past": [unclosed string}'
-        result = format_worksheet_html(content)
+        result, _ = render_worksheet_email(content)
 
         # Should fallback to plain text display
         self.assertIn("<html>", result)
@@ -197,7 +195,7 @@ class SendWorksheetEmailTest(TestCase):
         MAILGUN_BASE_URL="https://api.mailgun.net",
         DEFAULT_FROM_EMAIL="noreply@test.com",
     )
-    @patch("worksheet.services.email.requests.post")
+    @patch("worksheet.services.mailgun.requests.Session.post")
     def test_successful_email_send(self, mock_post):
         """Test successful email sending"""
         # Setup mock response
@@ -236,7 +234,7 @@ class SendWorksheetEmailTest(TestCase):
         MAILGUN_BASE_URL="https://api.mailgun.net",
         DEFAULT_FROM_EMAIL="noreply@test.com",
     )
-    @patch("worksheet.services.email.requests.post")
+    @patch("worksheet.services.mailgun.requests.Session.post")
     def test_email_with_additional_recipients(self, mock_post):
         """Test email sending includes additional recipients"""
         # Add additional recipients
@@ -311,7 +309,7 @@ class SendWorksheetEmailTest(TestCase):
         MAILGUN_BASE_URL="https://api.mailgun.net",
         DEFAULT_FROM_EMAIL="noreply@test.com",
     )
-    @patch("worksheet.services.email.requests.post")
+    @patch("worksheet.services.mailgun.requests.Session.post")
     def test_mailgun_api_failure(self, mock_post):
         """Test handling of Mailgun API failure"""
         mock_response = Mock()
@@ -343,7 +341,7 @@ class SendWorksheetEmailTest(TestCase):
         MAILGUN_BASE_URL="https://api.mailgun.net",
         DEFAULT_FROM_EMAIL="noreply@test.com",
     )
-    @patch("worksheet.services.email.requests.post")
+    @patch("worksheet.services.mailgun.requests.Session.post")
     def test_network_error_handling(self, mock_post):
         """Test handling of network/timeout errors"""
         mock_post.side_effect = requests.exceptions.Timeout("Connection timeout")
@@ -364,7 +362,7 @@ class SendWorksheetEmailTest(TestCase):
         MAILGUN_BASE_URL="https://api.mailgun.net",
         DEFAULT_FROM_EMAIL="noreply@test.com",
     )
-    @patch("worksheet.services.email.requests.post")
+    @patch("worksheet.services.mailgun.requests.Session.post")
     def test_plain_text_generation(self, mock_post):
         """Test that plain text version is generated correctly"""
         mock_response = Mock()
@@ -398,7 +396,7 @@ class SendWorksheetEmailTest(TestCase):
         MAILGUN_BASE_URL="https://api.mailgun.net",
         DEFAULT_FROM_EMAIL="noreply@test.com",
     )
-    @patch("worksheet.services.email.requests.post")
+    @patch("worksheet.services.mailgun.requests.Session.post")
     def test_json_string_content(self, mock_post):
         """Test handling of JSON string content"""
         mock_response = Mock()
@@ -427,7 +425,7 @@ class SendWorksheetEmailTest(TestCase):
         MAILGUN_BASE_URL="https://api.mailgun.net/",
         DEFAULT_FROM_EMAIL="noreply@test.com",
     )
-    @patch("worksheet.services.email.requests.post")
+    @patch("worksheet.services.mailgun.requests.Session.post")
     def test_url_construction_with_trailing_slash(self, mock_post):
         """Test URL construction handles trailing slash in base URL"""
         mock_response = Mock()
@@ -455,7 +453,7 @@ class SendWorksheetEmailTest(TestCase):
         MAILGUN_BASE_URL="https://api.mailgun.net",
         DEFAULT_FROM_EMAIL="noreply@test.com",
     )
-    @patch("worksheet.services.email.requests.post")
+    @patch("worksheet.services.mailgun.requests.Session.post")
     def test_invalid_content_fallback(self, mock_post):
         """Test handling of invalid content that can't be parsed"""
         mock_response = Mock()
@@ -475,3 +473,125 @@ class SendWorksheetEmailTest(TestCase):
             f"Your Spanish Worksheet\n\nDo the worksheets online: "
             f"{WORKSHEETS_URL}\n\nNot valid JSON at all",
         )
+
+
+@override_settings(
+    MAILGUN_API_KEY="test-api-key",
+    MAILGUN_DOMAIN="test.mailgun.org",
+    MAILGUN_BASE_URL="https://api.mailgun.net",
+    DEFAULT_FROM_EMAIL="noreply@test.com",
+)
+class SendWorksheetEmailsBatchTest(TestCase):
+    """Test Mailgun batch sending with recipient variables"""
+
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(email=f"batch{i}@example.com", password="x")
+            for i in range(3)
+        ]
+        UserRecipient.objects.create(user=self.users[0], email="friend@example.com")
+        self.content = {"past": ["Ayer ___ (ir) al parque."]}
+
+    def _ok(self):
+        response = Mock()
+        response.ok = True
+        return response
+
+    @patch("worksheet.services.mailgun.requests.Session.post")
+    def test_one_request_with_per_recipient_variables(self, mock_post):
+        mock_post.return_value = self._ok()
+
+        failed = send_worksheet_emails(
+            [(user, self.content, ["travel"]) for user in self.users]
+        )
+
+        self.assertEqual(failed, [])
+        mock_post.assert_called_once()
+        data = mock_post.call_args[1]["data"]
+        self.assertEqual(
+            data["to"],
+            ["batch0@example.com", "friend@example.com"]
+            + ["batch1@example.com", "batch2@example.com"],
+        )
+        self.assertEqual(data["html"], "%recipient.html%")
+        self.assertEqual(data["text"], "%recipient.text%")
+        variables = json.loads(data["recipient-variables"])
+        self.assertEqual(set(variables), set(data["to"]))
+        self.assertIn("travel", variables["batch1@example.com"]["html"])
+        self.assertIn(
+            "Ayer ___ (ir) al parque.", variables["batch2@example.com"]["text"]
+        )
+
+    @patch("worksheet.services.email.MAILGUN_BATCH_RECIPIENT_LIMIT", 2)
+    @patch("worksheet.services.mailgun.requests.Session.post")
+    def test_chunks_to_recipient_limit(self, mock_post):
+        mock_post.return_value = self._ok()
+
+        send_worksheet_emails([(user, self.content, None) for user in self.users])
+
+        batches = [call[1]["data"]["to"] for call in mock_post.call_args_list]
+        self.assertEqual(
+            batches,
+            [
+                ["batch0@example.com", "friend@example.com"],
+                ["batch1@example.com", "batch2@example.com"],
+            ],
+        )
+
+    @patch("worksheet.services.email.MAILGUN_BATCH_RECIPIENT_LIMIT", 2)
+    @patch("worksheet.services.mailgun.requests.Session.post")
+    def test_user_with_more_recipients_than_the_limit_is_split(self, mock_post):
+        mock_post.side_effect = [self._ok(), requests.exceptions.HTTPError("500")]
+        for i in range(2):
+            UserRecipient.objects.create(
+                user=self.users[0], email=f"friend{i}@example.com"
+            )
+
+        failed = send_worksheet_emails([(self.users[0], self.content, None)])
+
+        batches = [call[1]["data"]["to"] for call in mock_post.call_args_list]
+        self.assertEqual([len(batch) for batch in batches], [2, 2])
+        self.assertEqual(
+            sorted(batches[0] + batches[1]),
+            sorted(
+                ["batch0@example.com"] + [f"friend{i}@example.com" for i in ("", 0, 1)]
+            ),
+        )
+        # Part of the user's recipients failed, so the delivery is retried.
+        self.assertEqual(failed, [0])
+
+    @override_settings(
+        RATE_LIMITS={"mailgun": {"requests_per_second": 0, "tokens_per_minute": 2}}
+    )
+    @patch("worksheet.services.mailgun.requests.Session.post")
+    def test_batches_fit_the_messages_per_minute_limit(self, mock_post):
+        mock_post.return_value = self._ok()
+        rate_limit.reset_local_buckets()
+
+        failed = send_worksheet_emails(
+            [(user, self.content, None) for user in self.users]
+        )
+
+        # The first two-message batch empties the bucket; the next would wait
+        # a minute, past the retry budget, so its users are left to retry.
+        batches = [call[1]["data"]["to"] for call in mock_post.call_args_list]
+        self.assertEqual(batches, [["batch0@example.com", "friend@example.com"]])
+        self.assertEqual(failed, [1, 2])
+
+    @patch("worksheet.services.mailgun.requests.Session.post")
+    def test_shared_recipient_goes_to_a_separate_batch(self, mock_post):
+        mock_post.return_value = self._ok()
+        UserRecipient.objects.create(user=self.users[1], email="friend@example.com")
+
+        send_worksheet_emails([(user, self.content, None) for user in self.users[:2]])
+
+        self.assertEqual(mock_post.call_count, 2)
+
+    @override_settings(MAILGUN_MAX_RETRIES=0)
+    @patch("worksheet.services.mailgun.requests.Session.post")
+    def test_failed_batch_reports_its_deliveries(self, mock_post):
+        mock_post.side_effect = requests.exceptions.ConnectionError("down")
+
+        failed = send_worksheet_emails([(self.users[1], self.content, None)])
+
+        self.assertEqual(failed, [0])
@@ -0,0 +1,94 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from worksheet.services import email_render
+from worksheet.services.email_render import (
+    parse_sections,
+    render_html,
+    render_text,
+    render_worksheet_email,
+)
+
+CONTENT = {
+    "past tenses": [{"prompt": "Ayer ___ (ir) al parque.", "answer": ["fui"]}],
+    "translation": [{"prompt": "We <did> it & more", "answer": ["Lo hicimos"]}],
+}
+
+
+class ParseSectionsTest(SimpleTestCase):
+    def test_titles_and_display_prompts(self):
+        self.assertEqual(
+            parse_sections(CONTENT),
+            [
+                ("Past Tenses", ["Ayer ___ (ir) al parque."]),
+                ("Translation", ["We <did> it & more"]),
+            ],
+        )
+
+    def test_non_object_is_unusable(self):
+        self.assertIsNone(parse_sections("[1, 2]"))
+        self.assertIsNone(parse_sections("not json"))
+
+
+class RenderTest(SimpleTestCase):
+    def test_html_escapes_prompts_and_theme(self):
+        html = render_html(parse_sections(CONTENT), theme=["<b>Viajes</b>"])
+
+        self.assertIn("&lt;b&gt;Viajes&lt;/b&gt;", html)
+        self.assertIn("1. We &lt;did&gt; it &amp; more", html)
+        self.assertTrue(html.startswith("<html>"))
+        self.assertTrue(html.rstrip().endswith("</html>"))
+
+    def test_text_numbers_sections_in_order(self):
+        text = render_text(parse_sections(CONTENT))
+
+        self.assertIn("1. Past Tenses:\n   1. Ayer ___ (ir) al parque.", text)
+        self.assertIn("2. Translation:\n   1. We <did> it & more", text)
+
+    def test_fallback_shows_content_escaped(self):
+        html, text = render_worksheet_email("<oops>")
+
+        self.assertIn("<pre>&lt;oops&gt;</pre>", html)
+        self.assertTrue(text.endswith("<oops>"))
+
+
+class RenderCacheTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_resend_with_same_hash_skips_rendering(self):
+        first = render_worksheet_email(CONTENT, theme=["Viajes"], content_hash="abc")
+
+        with patch.object(email_render, "parse_sections") as mock_parse:
+            second = render_worksheet_email(
+                CONTENT, theme=["Viajes"], content_hash="abc"
+            )
+
+        mock_parse.assert_not_called()
+        self.assertEqual(first[1], second[1])
+        self.assertEqual(sorted(first[0].splitlines()), sorted(second[0].splitlines()))
+
+    def test_cached_render_is_still_shuffled(self):
+        render_worksheet_email(CONTENT, content_hash="abc")
+
+        with patch.object(email_render.random, "shuffle", lambda x: x.reverse()):
+            html, _ = render_worksheet_email(CONTENT, content_hash="abc")
+
+        self.assertLess(html.index("Translation"), html.index("Past Tenses"))
+
+    def test_theme_is_applied_to_a_cached_render(self):
+        render_worksheet_email(CONTENT, theme=["Viajes"], content_hash="abc")
+
+        html, _ = render_worksheet_email(CONTENT, theme=["Comida"], content_hash="abc")
+
+        self.assertIn("Comida", html)
+
+    def test_without_hash_nothing_is_cached(self):
+        render_worksheet_email(CONTENT)
+
+        with patch.object(email_render, "parse_sections", return_value=[]) as mock:
+            render_worksheet_email(CONTENT)
+
+        mock.assert_called_once()
@@ -8,9 +8,11 @@ from worksheet.services.exercise_items import (
     parse_worksheet_content,
     validate_custom_blank_prompts,
     validate_custom_exercises,
+    validate_exercise_item,
     validate_no_blank_prompts,
     validate_worksheet_blank_prompts,
     validate_worksheet_exercises,
+    worksheet_blank_prompt_errors,
 )
 
 
@@ -144,3 +146,37 @@ class ExerciseItemsTest(TestCase):
         self.assertFalse(validate_custom_blank_prompts(d))
         d["exercises"][0]["prompt"] = "Yo ___ (hacer) y ___ (decir)."
         self.assertFalse(validate_custom_blank_prompts(d))
+
+    def test_validate_exercise_item(self):
+        self.assertTrue(
+            validate_exercise_item({"prompt": "Yo ___", "answer": "x"}, True)
+        )
+        self.assertTrue(
+            validate_exercise_item({"prompt": "I went", "answer": ["Fui"]}, False)
+        )
+        self.assertFalse(
+            validate_exercise_item({"prompt": "Yo ___ ___", "answer": ["x"]}, True)
+        )
+        self.assertFalse(
+            validate_exercise_item({"prompt": "I ___ went", "answer": ["x"]}, False)
+        )
+        self.assertFalse(validate_exercise_item({"prompt": "Yo ___"}, True))
+        self.assertFalse(validate_exercise_item("Yo ___", True))
+
+    def test_worksheet_blank_prompt_errors(self):
+        d = {
+            "subjunctive": [
+                {"prompt": f"Yo ___ {i}", "answer": ["x"]} for i in range(5)
+            ],
+            "translation": [{"prompt": f"I go {i}", "answer": ["x"]} for i in range(5)],
+        }
+        blank, translation = frozenset({"subjunctive"}), frozenset({"translation"})
+        self.assertEqual(worksheet_blank_prompt_errors(d, blank, translation), {})
+
+        d["subjunctive"][1]["prompt"] = "no blank"
+        d["subjunctive"][3]["prompt"] = "two ___ ___"
+        d["translation"][0]["prompt"] = "I ___ go"
+        self.assertEqual(
+            worksheet_blank_prompt_errors(d, blank, translation),
+            {"subjunctive": [1, 3], "translation": [0]},
+        )
@@ -0,0 +1,88 @@
+import json
+import random
+
+import openai
+from django.test import SimpleTestCase, override_settings
+
+from worksheet.fake_llm import FakeLLMServer, drop_blank, fill_schema, malform
+from worksheet.services.generate import call_llm, generate_custom_exercises
+from worksheet.services.llm_client import close_llm_clients
+from worksheet.services.prompts import build_custom_payload
+
+
+class FakeLLMServerEndToEndTest(SimpleTestCase):
+    def _serve(self, **options):
+        server = FakeLLMServer(latency=0, tokens_per_second=1e6, **options)
+        base_url = server.start()
+        self.addCleanup(server.stop)
+        settings_override = override_settings(
+            DEEPSEEK_BASE_URL=base_url, DEEPSEEK_API_KEY="fake", LLM_STREAMING=True
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        close_llm_clients()
+        self.addCleanup(close_llm_clients)
+        return server
+
+    def test_valid_reply_passes_generation(self):
+        server = self._serve()
+
+        result = generate_custom_exercises("Subjuntivo con ojalá")
+
+        self.assertEqual(len(result["exercises"]), 8)
+        self.assertEqual(server.served["valid"], 1)
+
+    def test_missing_blank_reply_is_regenerated(self):
+        server = self._serve(missing_blank_rate=0.5, seed=3)
+
+        result = generate_custom_exercises("Subjuntivo con ojalá")
+
+        self.assertIsNotNone(result)
+        self.assertGreaterEqual(server.served["missing_blank"], 1)
+
+    def test_error_rate_returns_http_errors(self):
+        self._serve(error_rate=1.0, error_status=400)
+
+        with self.assertRaises(openai.BadRequestError):
+            call_llm(build_custom_payload("Subjuntivo con ojalá"))
+
+
+class FakeLLMServerPlanTest(SimpleTestCase):
+    def test_same_seed_gives_same_outcomes_and_latencies(self):
+        def plans(seed):
+            server = FakeLLMServer(
+                latency=0.5,
+                latency_distribution="lognormal",
+                malformed_rate=0.3,
+                missing_blank_rate=0.2,
+                error_rate=0.1,
+                seed=seed,
+            )
+            try:
+                return [server.plan()[:2] for _ in range(50)]
+            finally:
+                server.server_close()
+
+        first = plans(7)
+
+        self.assertEqual(first, plans(7))
+        self.assertEqual(
+            {outcome for outcome, _ in first},
+            {"valid", "malformed", "missing_blank", "error"},
+        )
+
+    def test_rejects_unknown_distribution(self):
+        with self.assertRaises(ValueError):
+            FakeLLMServer(latency_distribution="pareto")
+
+    def test_faulty_replies(self):
+        filled = fill_schema({"exercises": [{}] * 3})
+        text = json.dumps(filled, ensure_ascii=False)
+
+        broken = malform(text, random.Random(1))
+        missing = drop_blank(json.loads(text), random.Random(1))
+
+        with self.assertRaises(json.JSONDecodeError):
+            json.loads(broken)
+        prompts = [item["prompt"] for item in missing["exercises"]]
+        self.assertEqual(sum("___" not in prompt for prompt in prompts), 1)
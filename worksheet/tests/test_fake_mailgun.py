@@ -0,0 +1,85 @@
+import requests
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from recipients.models import UserRecipient
+from worksheet.fake_mailgun import FakeMailgunServer
+from worksheet.services.email import send_worksheet_email, send_worksheet_emails
+from worksheet.services.mailgun import close_mailgun_session
+
+User = get_user_model()
+
+CONTENT = {"past tenses": [{"prompt": "Ayer ___ (ir) al parque.", "answer": ["fui"]}]}
+
+
+class FakeMailgunEndToEndTest(TestCase):
+    def _serve(self, **options):
+        server = FakeMailgunServer(latency=0, **options)
+        base_url = server.start()
+        self.addCleanup(server.stop)
+        settings_override = override_settings(
+            MAILGUN_BASE_URL=base_url,
+            MAILGUN_API_KEY="fake",
+            MAILGUN_DOMAIN="mg.example.com",
+            MAILGUN_BACKOFF_BASE=0.01,
+            MAILGUN_BACKOFF_MAX=2.0,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        close_mailgun_session()
+        self.addCleanup(close_mailgun_session)
+        cache.clear()
+        return server
+
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(email=f"fm{i}@example.com") for i in range(2)
+        ]
+
+    def test_batch_send_records_one_message_per_recipient(self):
+        server = self._serve()
+        UserRecipient.objects.create(user=self.users[0], email="friend@example.com")
+
+        failed = send_worksheet_emails(
+            [(user, CONTENT, ["Viajes"]) for user in self.users]
+        )
+
+        self.assertEqual(failed, [])
+        self.assertEqual(server.requests, 1)
+        self.assertEqual(
+            sorted(m["to"] for m in server.messages),
+            ["fm0@example.com", "fm1@example.com", "friend@example.com"],
+        )
+        message = server.messages[0]
+        self.assertEqual(message["domain"], "mg.example.com")
+        self.assertIn("Ayer ___ (ir) al parque.", message["text"])
+        self.assertIn("Viajes", message["html"])
+
+    def test_throttled_request_is_retried(self):
+        server = self._serve(throttle_rate=0.5, retry_after=0, seed=1)
+
+        for user in self.users:
+            send_worksheet_email(user, CONTENT)
+
+        self.assertGreater(server.served["throttled"], 0)
+        self.assertEqual(len(server.messages), 2)
+
+    def test_quota_answers_429_with_retry_after(self):
+        server = self._serve(quota_per_minute=1)
+
+        failed = send_worksheet_emails([(user, CONTENT, None) for user in self.users])
+
+        # Retry-After is beyond MAILGUN_BACKOFF_MAX, so the batch is reported failed.
+        self.assertEqual(failed, [0, 1])
+        self.assertEqual(server.served["over_quota"], 1)
+        self.assertEqual(server.messages, [])
+
+    def test_unknown_path_and_missing_auth_are_rejected(self):
+        server = self._serve()
+
+        not_found = requests.post(f"{server.base_url}/v3/messages", auth=("api", "k"))
+        forbidden = requests.post(f"{server.base_url}/v3/mg.example.com/messages")
+
+        self.assertEqual(not_found.status_code, 404)
+        self.assertEqual(forbidden.status_code, 401)
@@ -1,15 +1,19 @@
 import json
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from unittest.mock import patch, MagicMock, Mock
 
 from worksheet.services.generate import (
+    LLMStreamAborted,
     extract_json_from_response,
     call_llm,
     generate_custom_exercises,
     generate_worksheet_for,
+    generate_worksheet_sections,
+    json_repair_stats,
 )
+from worksheet.services.grammar_pools import GRAMMAR_POOLS
 from worksheet.services.prompts import TRANSLATION_KEY
 from worksheet.models import Worksheet
 
@@ -48,6 +52,21 @@ _MIN_WORKSHEET = {
 }
 
 
+def _worksheet_for_pools(pools: list[str]):
+    data = {pool: _section(pool) for pool in pools}
+    data[TRANSLATION_KEY] = _translation_section()
+    return data
+
+
+def _stream_of(text: str, size: int = 16):
+    stream = MagicMock()
+    stream.__iter__.return_value = [
+        Mock(choices=[Mock(delta=Mock(content=text[i : i + size]))])  # noqa: E203
+        for i in range(0, len(text), size)
+    ]
+    return stream
+
+
 def _custom_exercises(prefix: str = "custom"):
     return {
         "exercises": [
@@ -112,16 +131,41 @@ class ExtractJsonFromResponseTest(TestCase):
         result = extract_json_from_response(content)
         self.assertIsNone(result)
 
+    def test_braces_and_escaped_quotes_inside_strings(self):
+        """Test braces and escaped quotes in strings do not end the object"""
+        obj = '{"prompt": "Dijo \\"}{\\" ___", "answer": ["}"]}'
+        content = f"Sure! {obj} Anything else?"
+        result = extract_json_from_response(content)
+        self.assertEqual(result, obj)
+
+    def test_skips_invalid_object_before_valid_one(self):
+        """Test a later valid object is found after an invalid one"""
+        content = 'Schema: {prompt, answer}\n```json\n{"key": "value"}\n```'
+        result = extract_json_from_response(content)
+        self.assertEqual(result, '{"key": "value"}')
+
+    def test_top_level_array_is_returned_as_is(self):
+        """Test any valid JSON reply is accepted; callers check its shape"""
+        content = '[{"key": "value"}]'
+        result = extract_json_from_response(content)
+        self.assertEqual(result, content)
+
+    def test_truncated_object_is_not_extracted(self):
+        """Test an unbalanced object is left to the repair step"""
+        content = '{"key": "value", "other": {"nested": 1}'
+        result = extract_json_from_response(content)
+        self.assertIsNone(result)
+
 
 class CallLLMTest(TestCase):
     """Test LLM API calls with mocked external service"""
 
-    @patch("worksheet.services.generate.OpenAI")
-    def test_successful_api_call(self, mock_openai):
+    @patch("worksheet.services.generate.get_llm_client")
+    def test_successful_api_call(self, mock_get_client):
         """Test successful API call returns content"""
         # Setup mock
         mock_client = MagicMock()
-        mock_openai.return_value = mock_client
+        mock_get_client.return_value = mock_client
 
         mock_response = Mock()
         mock_response.choices = [Mock()]
@@ -140,11 +184,11 @@ class CallLLMTest(TestCase):
             temperature=0.7,
         )
 
-    @patch("worksheet.services.generate.OpenAI")
-    def test_api_call_with_markdown_response(self, mock_openai):
+    @patch("worksheet.services.generate.get_llm_client")
+    def test_api_call_with_markdown_response(self, mock_get_client):
         """Test API call handles markdown-wrapped JSON"""
         mock_client = MagicMock()
-        mock_openai.return_value = mock_client
+        mock_get_client.return_value = mock_client
 
         mock_response = Mock()
         mock_response.choices = [Mock()]
@@ -157,11 +201,11 @@ class CallLLMTest(TestCase):
         # call_llm returns the API message body unchanged
         self.assertEqual(result, '```json\n{"result": "success"}\n```')
 
-    @patch("worksheet.services.generate.OpenAI")
-    def test_api_call_exception_handling(self, mock_openai):
+    @patch("worksheet.services.generate.get_llm_client")
+    def test_api_call_exception_handling(self, mock_get_client):
         """Test that API exceptions propagate correctly"""
         mock_client = MagicMock()
-        mock_openai.return_value = mock_client
+        mock_get_client.return_value = mock_client
         mock_client.chat.completions.create.side_effect = Exception(
             "API Error",
         )
@@ -174,6 +218,281 @@ class CallLLMTest(TestCase):
         self.assertIn("API Error", str(context.exception))
 
 
+@override_settings(LLM_STREAMING=True)
+class CallLLMStreamingTest(TestCase):
+    """call_llm with an item_check streams and validates exercises as they close"""
+
+    @patch("worksheet.services.generate.get_llm_client")
+    def test_streams_and_returns_full_text(self, mock_get_client):
+        text = json.dumps({"a": [{"prompt": "x ___", "answer": ["y"]}]})
+        stream = _stream_of(text)
+        mock_get_client.return_value.chat.completions.create.return_value = stream
+        seen = []
+
+        result = call_llm(
+            [{"role": "user", "content": "test"}],
+            item_check=lambda *args: seen.append(args) or True,
+        )
+
+        self.assertEqual(result, text)
+        self.assertEqual(seen, [("a", 0, {"prompt": "x ___", "answer": ["y"]})])
+        kwargs = mock_get_client.return_value.chat.completions.create.call_args[1]
+        self.assertTrue(kwargs["stream"])
+        stream.close.assert_called_once()
+
+    @patch("worksheet.services.generate.get_llm_client")
+    def test_cancels_stream_on_first_failed_item(self, mock_get_client):
+        text = json.dumps(
+            {
+                "a": [
+                    {"prompt": "ok ___", "answer": ["y"]},
+                    {"prompt": "no blank", "answer": ["y"]},
+                    {"prompt": "never read ___", "answer": ["y"]},
+                ]
+            }
+        )
+        stream = _stream_of(text, size=4)
+        mock_get_client.return_value.chat.completions.create.return_value = stream
+
+        with self.assertRaises(LLMStreamAborted) as ctx:
+            call_llm(
+                [{"role": "user", "content": "test"}],
+                item_check=lambda section, index, item: "___" in item["prompt"],
+            )
+
+        self.assertEqual((ctx.exception.section, ctx.exception.index), ("a", 1))
+        self.assertNotIn("never read", ctx.exception.partial)
+        stream.close.assert_called_once()
+
+    @override_settings(LLM_STREAMING=False)
+    @patch("worksheet.services.generate.get_llm_client")
+    def test_streaming_disabled_uses_single_response(self, mock_get_client):
+        create = mock_get_client.return_value.chat.completions.create
+        create.return_value.choices = [Mock()]
+        create.return_value.choices[0].message.content = "{}"
+
+        result = call_llm([{"role": "user", "content": "test"}], item_check=Mock())
+
+        self.assertEqual(result, "{}")
+        self.assertNotIn("stream", create.call_args[1])
+
+
+class GenerateWorksheetForStreamAbortTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="stream@example.com", password="testpass123"
+        )
+        self.pools = GRAMMAR_POOLS[:4]
+
+    @patch("worksheet.services.generate.call_llm")
+    def test_retries_after_mid_stream_abort(self, mock_call_llm):
+        good = json.dumps(_worksheet_for_pools(self.pools), ensure_ascii=False)
+        mock_call_llm.side_effect = [
+            LLMStreamAborted('{"past tenses": [', "past tenses", 0),
+            good,
+        ]
+
+        result = generate_worksheet_for(
+            self.user, themes=["bugs"], grammar_pools=self.pools
+        )
+
+        self.assertEqual(result, good)
+        retry_messages = mock_call_llm.call_args_list[1][0][0]
+        self.assertEqual(retry_messages[-2]["content"], '{"past tenses": [')
+        check = mock_call_llm.call_args_list[0][1]["item_check"]
+        self.assertTrue(check("past tenses", 0, {"prompt": "a ___", "answer": "x"}))
+        self.assertFalse(check("past tenses", 0, {"prompt": "a", "answer": "x"}))
+        self.assertFalse(check(TRANSLATION_KEY, 0, {"prompt": "a ___", "answer": "x"}))
+        self.assertFalse(check("unknown", 0, {"prompt": "a ___", "answer": "x"}))
+        self.assertFalse(check("past tenses", 5, {"prompt": "a ___", "answer": "x"}))
+
+    @patch("worksheet.services.generate.call_llm")
+    def test_gives_up_after_repeated_aborts(self, mock_call_llm):
+        mock_call_llm.side_effect = LLMStreamAborted("{", "past tenses", 0)
+
+        result = generate_worksheet_for(
+            self.user, themes=["bugs"], grammar_pools=self.pools
+        )
+
+        self.assertIsNone(result)
+        self.assertEqual(mock_call_llm.call_count, 3)
+        self.assertFalse(Worksheet.objects.exists())
+
+
+class GenerateWorksheetForSectionRepairTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="repair@example.com", password="testpass123"
+        )
+        self.pools = GRAMMAR_POOLS[:4]
+
+    @patch("worksheet.services.generate.call_llm")
+    def test_regenerates_only_failing_sections(self, mock_call_llm):
+        good = _worksheet_for_pools(self.pools)
+        bad = json.loads(json.dumps(good))
+        bad["subjunctive"][1]["prompt"] = "no blank here"
+        bad[TRANSLATION_KEY][0]["prompt"] = "Translate ___ this"
+        repair = {
+            "subjunctive": good["subjunctive"],
+            TRANSLATION_KEY: good[TRANSLATION_KEY],
+        }
+        mock_call_llm.side_effect = [
+            json.dumps(bad, ensure_ascii=False),
+            json.dumps(repair, ensure_ascii=False),
+        ]
+
+        result = generate_worksheet_for(
+            self.user, themes=["bugs"], grammar_pools=self.pools
+        )
+
+        self.assertEqual(result, json.dumps(good, ensure_ascii=False))
+        self.assertEqual(list(json.loads(result)), list(good))
+        retry_messages = mock_call_llm.call_args_list[1][0][0]
+        correction = retry_messages[-1]["content"]
+        self.assertIn('"subjunctive" item 2', correction)
+        self.assertIn('"translation" item 1', correction)
+        self.assertNotIn('"past tenses"', correction)
+        check = mock_call_llm.call_args_list[1][1]["item_check"]
+        self.assertTrue(check("past tenses", 0, {"prompt": "a", "answer": "x"}))
+        self.assertTrue(check("subjunctive", 0, {"prompt": "a ___", "answer": "x"}))
+        self.assertFalse(check("subjunctive", 0, {"prompt": "a", "answer": "x"}))
+        self.assertFalse(check("unknown", 0, {"prompt": "a ___", "answer": "x"}))
+
+    @override_settings(LLM_STREAMING=True)
+    @patch("worksheet.services.generate.get_llm_client")
+    @patch("worksheet.services.generate.call_llm")
+    def test_streamed_repair_reply_may_echo_the_whole_worksheet(
+        self, mock_call_llm, mock_get_client
+    ):
+        good = _worksheet_for_pools(self.pools)
+        bad = json.loads(json.dumps(good))
+        bad["subjunctive"][1]["prompt"] = "no blank here"
+        create = mock_get_client.return_value.chat.completions.create
+        create.return_value = _stream_of(json.dumps(good, ensure_ascii=False))
+        replies = iter([json.dumps(bad, ensure_ascii=False)])
+
+        def reply(messages, item_check=None):
+            # First reply as given; the repair reply is streamed for real.
+            return next(replies, None) or call_llm(messages, item_check=item_check)
+
+        mock_call_llm.side_effect = reply
+
+        result = generate_worksheet_for(
+            self.user, themes=["bugs"], grammar_pools=self.pools
+        )
+
+        self.assertEqual(json.loads(result), good)
+        self.assertEqual(create.call_count, 1)
+
+    @patch("worksheet.services.generate.call_llm")
+    def test_still_failing_section_is_retried_again(self, mock_call_llm):
+        good = _worksheet_for_pools(self.pools)
+        bad = json.loads(json.dumps(good))
+        bad["subjunctive"][1]["prompt"] = "no blank here"
+        mock_call_llm.side_effect = [
+            json.dumps(bad, ensure_ascii=False),
+            json.dumps({"subjunctive": bad["subjunctive"]}, ensure_ascii=False),
+            json.dumps({"subjunctive": good["subjunctive"]}, ensure_ascii=False),
+        ]
+
+        result = generate_worksheet_for(
+            self.user, themes=["bugs"], grammar_pools=self.pools
+        )
+
+        self.assertEqual(json.loads(result), good)
+        self.assertEqual(mock_call_llm.call_count, 3)
+
+    @patch("worksheet.services.generate.call_llm")
+    def test_repair_reply_missing_section_fails(self, mock_call_llm):
+        bad = _worksheet_for_pools(self.pools)
+        bad["subjunctive"][1]["prompt"] = "no blank here"
+        mock_call_llm.side_effect = [
+            json.dumps(bad, ensure_ascii=False),
+            json.dumps({"past tenses": bad["past tenses"]}, ensure_ascii=False),
+        ]
+
+        result = generate_worksheet_for(
+            self.user, themes=["bugs"], grammar_pools=self.pools
+        )
+
+        self.assertIsNone(result)
+        self.assertFalse(Worksheet.objects.exists())
+
+
+def _section_reply(messages, item_check=None):
+    """Fake call_llm: answer a per-section prompt with that section only."""
+    prompt = messages[1]["content"]
+    start, end = prompt.index("{"), prompt.rindex("}") + 1
+    section = next(iter(json.loads(prompt[start:end])))
+    items = _translation_section() if section == TRANSLATION_KEY else _section(section)
+    return json.dumps({section: items}, ensure_ascii=False)
+
+
+class GenerateWorksheetSectionsTest(TestCase):
+    def setUp(self):
+        self.pools = GRAMMAR_POOLS[:4]
+
+    @patch("worksheet.services.generate.call_llm")
+    def test_one_request_per_section_merged_in_order(self, mock_call_llm):
+        mock_call_llm.side_effect = _section_reply
+
+        result = generate_worksheet_sections(["bugs"], self.pools)
+
+        self.assertEqual(result, _worksheet_for_pools(self.pools))
+        self.assertEqual(list(result), self.pools + [TRANSLATION_KEY])
+        self.assertEqual(mock_call_llm.call_count, 5)
+
+    @patch("worksheet.services.generate.call_llm")
+    def test_retries_only_the_failing_section(self, mock_call_llm):
+        calls = {"subjunctive": 0}
+        corrections = []
+
+        def reply(messages, item_check=None):
+            text = _section_reply(messages[:2])
+            if '"subjunctive"' in messages[1]["content"]:
+                corrections.extend(m["content"] for m in messages[3:])
+                calls["subjunctive"] += 1
+                if calls["subjunctive"] == 1:
+                    return text.replace("___ (hacer)", "(hacer)", 1)
+            return text
+
+        mock_call_llm.side_effect = reply
+
+        result = generate_worksheet_sections(["bugs"], self.pools)
+
+        self.assertEqual(result, _worksheet_for_pools(self.pools))
+        self.assertEqual(calls["subjunctive"], 2)
+        self.assertEqual(mock_call_llm.call_count, 6)
+        (correction,) = corrections
+        self.assertIn('"subjunctive" item 1', correction)
+        self.assertIn('exactly one key, "subjunctive"', correction)
+
+    @patch("worksheet.services.generate.call_llm")
+    def test_returns_none_when_a_section_fails(self, mock_call_llm):
+        def reply(messages, item_check=None):
+            if '"translation"' in messages[1]["content"]:
+                return json.dumps({TRANSLATION_KEY: []})
+            return _section_reply(messages)
+
+        mock_call_llm.side_effect = reply
+
+        self.assertIsNone(generate_worksheet_sections(["bugs"], self.pools))
+
+    @override_settings(WORKSHEET_PARALLEL_SECTIONS=True)
+    @patch("worksheet.services.generate.call_llm")
+    def test_generate_worksheet_for_uses_parallel_mode_from_settings(
+        self, mock_call_llm
+    ):
+        mock_call_llm.side_effect = _section_reply
+        user = User.objects.create_user(email="par@example.com", password="x")
+
+        result = generate_worksheet_for(user, themes=["bugs"], grammar_pools=self.pools)
+
+        self.assertEqual(json.loads(result), _worksheet_for_pools(self.pools))
+        self.assertEqual(mock_call_llm.call_count, 5)
+        self.assertEqual(Worksheet.objects.get(user=user).content, json.loads(result))
+
+
 class GenerateWorksheetForTest(TestCase):
     """Test full worksheet generation workflow"""
 
@@ -206,7 +525,7 @@ class GenerateWorksheetForTest(TestCase):
         self.assertEqual(Worksheet.objects.filter(user=self.user).count(), 1)
 
         worksheet = Worksheet.objects.get(user=self.user)
-        self.assertEqual(worksheet.content, expected)
+        self.assertEqual(worksheet.content, payload)
         self.assertEqual(worksheet.topics, TEST_GRAMMAR_POOLS)
 
     @patch("worksheet.services.generate.call_llm")
@@ -260,7 +579,7 @@ class GenerateWorksheetForTest(TestCase):
 
         # Should be the new one
         worksheet = Worksheet.objects.get(user=self.user)
-        self.assertEqual(worksheet.content, second)
+        self.assertEqual(worksheet.content, json.loads(second))
         self.assertEqual(result, second)
 
     @patch("worksheet.services.generate.call_llm")
@@ -382,7 +701,7 @@ class GenerateWorksheetForTest(TestCase):
         self.assertEqual(mock_call_llm.call_count, 2)
         self.assertEqual(
             Worksheet.objects.get(user=self.user).content,
-            good,
+            json.loads(good),
         )
 
     @patch("worksheet.services.generate.call_llm")
@@ -408,7 +727,7 @@ class GenerateWorksheetForTest(TestCase):
         self.assertEqual(mock_call_llm.call_count, 2)
         self.assertEqual(
             Worksheet.objects.get(user=self.user).content,
-            good,
+            json.loads(good),
         )
 
     @patch("worksheet.services.generate.call_llm")
@@ -430,7 +749,7 @@ class GenerateWorksheetForTest(TestCase):
 
         expected = json.dumps(_MIN_WORKSHEET, ensure_ascii=False)
         self.assertEqual(result, expected)
-        stored = json.loads(Worksheet.objects.get(user=self.user).content)
+        stored = Worksheet.objects.get(user=self.user).content
         self.assertEqual(stored["past tenses"][0]["answer"], ["sol-past-0"])
 
 
@@ -458,6 +777,23 @@ class GenerateCustomExercisesTest(TestCase):
         self.assertEqual(result, payload)
         self.assertEqual(mock_call_llm.call_count, 2)
 
+    @patch("worksheet.services.generate.call_llm")
+    def test_custom_generation_repairs_json_locally(self, mock_call_llm):
+        payload = _custom_exercises()
+        text = json.dumps(payload, ensure_ascii=False)
+        # Trailing commas and a fence are fixed without a second LLM call.
+        mock_call_llm.return_value = (
+            "```json\n" + text.replace("]}", "],}").replace("}]", "},]") + "\n```"
+        )
+
+        before = json_repair_stats()["json.local_repair"]
+
+        result = generate_custom_exercises("Subjunctive tense about birthdays")
+
+        self.assertEqual(result, payload)
+        self.assertEqual(mock_call_llm.call_count, 1)
+        self.assertEqual(json_repair_stats()["json.local_repair"], before + 1)
+
     @patch("worksheet.services.generate.call_llm")
     def test_custom_generation_normalizes_string_answers(self, mock_call_llm):
         payload = _custom_exercises()
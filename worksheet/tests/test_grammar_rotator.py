@@ -5,7 +5,11 @@ from worksheet.services.grammar_pools import GRAMMAR_POOLS
 from worksheet.services.grammar_rotator import (
     POOLS_PER_WORKSHEET,
     get_and_increment_grammar_pools,
+    reserve_grammar_pools,
 )
+from worksheet.services.prompts import THEME_POOLS
+from worksheet.services.rotation import reserve_indices
+from worksheet.services.topic_rotator import get_and_increment_topics, reserve_topics
 
 
 class GrammarRotatorTest(TestCase):
@@ -53,3 +57,28 @@ class GrammarRotatorTest(TestCase):
             cfg.value,
             str((len(GRAMMAR_POOLS) - 1 + POOLS_PER_WORKSHEET) % len(GRAMMAR_POOLS)),
         )
+
+    def test_reserving_a_block_matches_consecutive_calls(self):
+        block = reserve_grammar_pools(3)
+        after_block = get_and_increment_grammar_pools()
+
+        Config.objects.filter(key="grammar_pool_index").update(value="0")
+        one_by_one = [get_and_increment_grammar_pools() for _ in range(4)]
+
+        self.assertEqual(block + [after_block], one_by_one)
+
+
+class TopicRotatorTest(TestCase):
+    def test_reserving_a_block_advances_once(self):
+        block = reserve_topics(2)
+
+        self.assertEqual(block, [THEME_POOLS[0], THEME_POOLS[1 % len(THEME_POOLS)]])
+        self.assertEqual(Config.objects.get(key="topic_index").value, "2")
+        self.assertEqual(get_and_increment_topics(), THEME_POOLS[2 % len(THEME_POOLS)])
+
+
+class ReserveIndicesTest(TestCase):
+    def test_returns_start_of_block_and_wraps_stored_value(self):
+        self.assertEqual(reserve_indices("k", 5, modulo=7), 0)
+        self.assertEqual(reserve_indices("k", 5, modulo=7), 5)
+        self.assertEqual(Config.objects.get(key="k").value, "3")
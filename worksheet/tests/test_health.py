@@ -0,0 +1,127 @@
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, override_settings
+from redis import Redis
+from rq import Queue
+
+from worksheet.services import health
+from worksheet.workers import HeartbeatWorker
+
+QUEUES = {"default": {}, "llm": {}, "email": {}}
+
+
+def _beat(*queues, age=0):
+    return json.dumps({"queues": list(queues), "at": time.time() - age})
+
+
+def _connection(entries, depth=2):
+    connection = MagicMock()
+    pipeline = connection.pipeline.return_value.__enter__.return_value
+    pipeline.execute.return_value = [entries] + [depth] * len(QUEUES)
+    return connection
+
+
+@override_settings(RQ_QUEUES=QUEUES, HEALTH_SNAPSHOT_TTL=5, HEALTH_WORKER_TIMEOUT=60)
+@patch("worksheet.services.health.django_rq.get_connection")
+class HealthTest(SimpleTestCase):
+    def setUp(self):
+        health.reset_snapshot()
+
+    def test_reports_each_queue(self, mock_conn):
+        mock_conn.return_value = _connection(
+            {b"w1": _beat("default", "llm"), b"w2": _beat("email")}
+        )
+
+        response = self.client.get("/health/ready/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["queues"],
+            {
+                "default": {"workers": 1, "queued": 2},
+                "llm": {"workers": 1, "queued": 2},
+                "email": {"workers": 1, "queued": 2},
+            },
+        )
+        self.assertEqual(response.json()["workers_total"], 2)
+
+    def test_unhealthy_when_a_queue_has_no_worker(self, mock_conn):
+        mock_conn.return_value = _connection({b"w1": _beat("default", "llm")})
+
+        response = self.client.get("/health/ready/")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["queues"]["email"]["workers"], 0)
+
+    def test_health_only_needs_a_default_worker(self, mock_conn):
+        mock_conn.return_value = _connection({b"w1": _beat("default")})
+
+        self.assertEqual(self.client.get("/health/").status_code, 200)
+        health.reset_snapshot()
+        mock_conn.return_value = _connection({b"w1": _beat("llm", "email")})
+        self.assertEqual(self.client.get("/health/").status_code, 503)
+
+    def test_stale_heartbeats_are_ignored_and_pruned(self, mock_conn):
+        connection = _connection(
+            {b"w1": _beat("default", "llm", "email"), b"dead": _beat("email", age=90)}
+        )
+        mock_conn.return_value = connection
+
+        response = self.client.get("/health/ready/")
+
+        self.assertEqual(response.json()["workers_total"], 1)
+        connection.hdel.assert_called_once_with(health.HEARTBEATS_KEY, b"dead")
+
+    def test_probes_within_the_ttl_reuse_the_snapshot(self, mock_conn):
+        mock_conn.return_value = _connection({b"w1": _beat(*QUEUES)})
+
+        for _ in range(5):
+            self.client.get("/health/ready/")
+
+        self.assertEqual(mock_conn.call_count, 1)
+
+    def test_redis_outage_is_not_ready(self, mock_conn):
+        mock_conn.side_effect = ConnectionError("down")
+
+        response = self.client.get("/health/ready/")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["redis"], "error")
+
+    def test_liveness_does_not_touch_redis(self, mock_conn):
+        response = self.client.get("/health/live/")
+
+        self.assertEqual(response.status_code, 200)
+        mock_conn.assert_not_called()
+
+
+@override_settings(HEALTH_WORKER_TIMEOUT=60)
+@patch("rq.worker.base.BaseWorker._set_ip_address")
+class HeartbeatWorkerTest(SimpleTestCase):
+    def _worker(self):
+        connection = Redis()
+        queues = [Queue(name, connection=connection) for name in ("default", "email")]
+        return HeartbeatWorker(queues, connection=connection, name="w1")
+
+    @patch("rq.worker.base.BaseWorker.heartbeat")
+    def test_heartbeat_is_mirrored_into_the_shared_hash(self, mock_beat, _):
+        worker = self._worker()
+        pipeline = MagicMock()
+
+        worker.heartbeat(pipeline=pipeline)
+
+        name, raw = pipeline.hset.call_args.args[1:]
+        self.assertEqual(name, "w1")
+        self.assertEqual(json.loads(raw)["queues"], ["default", "email"])
+        pipeline.expire.assert_called_once_with(health.HEARTBEATS_KEY, 120)
+
+    @patch("rq.worker.base.BaseWorker.register_death")
+    def test_death_removes_the_worker(self, mock_death, _):
+        worker = self._worker()
+
+        with patch.object(worker, "connection") as connection:
+            worker.register_death()
+
+        connection.hdel.assert_called_once_with(health.HEARTBEATS_KEY, "w1")
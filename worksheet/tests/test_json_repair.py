@@ -0,0 +1,71 @@
+import json
+
+from django.test import SimpleTestCase
+
+from worksheet.services.json_repair import repair_json_locally
+
+
+class RepairJsonLocallyTest(SimpleTestCase):
+    def assertRepairsTo(self, content, expected):
+        repaired = repair_json_locally(content)
+        self.assertIsNotNone(repaired)
+        self.assertEqual(json.loads(repaired), expected)
+
+    def test_strips_fences_prose_and_trailing_commas(self):
+        content = (
+            'Here you go:\n```json\n{"a": [{"prompt": "p ___", "answer": ["x"],},],}\n```'
+            "\nLet me know if you need more."
+        )
+
+        self.assertRepairsTo(content, {"a": [{"prompt": "p ___", "answer": ["x"]}]})
+
+    def test_truncated_reply_keeps_complete_items_only(self):
+        content = '{"a": [{"prompt": "p", "answer": ["x"]}, {"prompt": "q", "answ'
+
+        self.assertRepairsTo(content, {"a": [{"prompt": "p", "answer": ["x"]}]})
+
+    def test_truncated_reply_after_separator(self):
+        self.assertRepairsTo('{"a": [1, 2,', {"a": [1, 2]})
+
+    def test_smart_quote_delimiters_become_ascii(self):
+        content = "{“a”: [{“prompt”: “Ella ___ (ir).”, “answer”: [“fue”]}]}"
+
+        self.assertRepairsTo(
+            content, {"a": [{"prompt": "Ella ___ (ir).", "answer": ["fue"]}]}
+        )
+
+    def test_smart_quotes_inside_strings_are_kept(self):
+        content = '{"a": [{"prompt": "Dijo “hola” ___", "answer": ["x"]}]}'
+
+        self.assertRepairsTo(
+            content, {"a": [{"prompt": "Dijo “hola” ___", "answer": ["x"]}]}
+        )
+
+    def test_inserts_missing_commas_between_items(self):
+        content = '{"a": [{"prompt": "p", "answer": ["x" "y"]} {"prompt": "q", "answer": ["z"]}]}'
+
+        self.assertRepairsTo(
+            content,
+            {
+                "a": [
+                    {"prompt": "p", "answer": ["x", "y"]},
+                    {"prompt": "q", "answer": ["z"]},
+                ]
+            },
+        )
+
+    def test_escapes_raw_newline_inside_string(self):
+        content = '{"a": [{"prompt": "line one\nline two", "answer": ["x"]}]}'
+
+        self.assertRepairsTo(
+            content, {"a": [{"prompt": "line one\nline two", "answer": ["x"]}]}
+        )
+
+    def test_newline_closes_unterminated_string(self):
+        content = '{"a": [{"prompt": "p ___,\n"answer": ["x"]}]}'
+
+        self.assertRepairsTo(content, {"a": [{"prompt": "p ___", "answer": ["x"]}]})
+
+    def test_returns_none_without_json(self):
+        self.assertIsNone(repair_json_locally("Sorry, I cannot help with that."))
+        self.assertIsNone(repair_json_locally(None))
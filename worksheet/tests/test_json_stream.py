@@ -0,0 +1,61 @@
+import json
+
+from django.test import SimpleTestCase
+
+from worksheet.services.json_stream import ExerciseStreamParser
+from worksheet.tests.test_generate import _MIN_WORKSHEET
+
+
+def _feed_in_chunks(text: str, size: int):
+    parser = ExerciseStreamParser()
+    closed = []
+    for start in range(0, len(text), size):
+        closed.extend(parser.feed(text[start : start + size]))  # noqa: E203
+    return parser, closed
+
+
+class ExerciseStreamParserTest(SimpleTestCase):
+    def test_yields_every_item_with_section_and_index(self):
+        text = json.dumps(_MIN_WORKSHEET, ensure_ascii=False)
+
+        parser, closed = _feed_in_chunks(text, 7)
+
+        self.assertTrue(parser.done)
+        self.assertEqual(len(closed), 25)
+        self.assertEqual(
+            closed[0], ("past tenses", 0, _MIN_WORKSHEET["past tenses"][0])
+        )
+        self.assertEqual(closed[-1][:2], ("translation", 4))
+
+    def test_yields_item_as_soon_as_it_closes(self):
+        parser = ExerciseStreamParser()
+
+        self.assertEqual(parser.feed('{"a": [{"prompt": "x ___", "answer": ["y"]'), [])
+        closed = parser.feed("}, {")
+
+        self.assertEqual(closed, [("a", 0, {"prompt": "x ___", "answer": ["y"]})])
+
+    def test_ignores_braces_and_quotes_inside_strings(self):
+        text = '{"a": [{"prompt": "say \\"{hi}\\" ___", "answer": ["}"]}]}'
+
+        _, closed = _feed_in_chunks(text, 3)
+
+        self.assertEqual(
+            closed, [("a", 0, {"prompt": 'say "{hi}" ___', "answer": ["}"]})]
+        )
+
+    def test_skips_markdown_fence_before_object(self):
+        text = '```json\n{"a": [{"prompt": "p", "answer": ["x"]}]}\n```'
+
+        _, closed = _feed_in_chunks(text, 5)
+
+        self.assertEqual(closed, [("a", 0, {"prompt": "p", "answer": ["x"]})])
+
+    def test_malformed_item_is_not_reported(self):
+        parser = ExerciseStreamParser()
+
+        closed = parser.feed(
+            '{"a": [{"prompt": "p", "answer": ["x"],}, {"prompt": "q", "answer": ["y"]}]}'
+        )
+
+        self.assertEqual(closed, [("a", 1, {"prompt": "q", "answer": ["y"]})])
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from worksheet.models import StockedWorksheet, Worksheet
+from worksheet.services.latest_worksheet import (
+    get_latest_worksheet,
+    get_latest_worksheet_validators,
+    invalidate_latest_worksheet,
+)
+from worksheet.services.stock import claim_stocked_worksheet
+
+User = get_user_model()
+
+
+class LatestWorksheetCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="latest@example.com")
+
+    def test_miss_loads_and_caches_the_newest_worksheet(self):
+        Worksheet.objects.create(user=self.user, content_hash="a", content={"a": []})
+
+        with self.assertNumQueries(1):
+            first = get_latest_worksheet(self.user)
+        with self.assertNumQueries(0):
+            second = get_latest_worksheet(self.user)
+
+        self.assertEqual(first.content_hash, "a")
+        self.assertEqual(second.content_hash, "a")
+
+    def test_validators_are_cached_with_the_row(self):
+        worksheet = Worksheet.objects.create(
+            user=self.user, content_hash="v", content={"a": []}
+        )
+        get_latest_worksheet(self.user)
+
+        with self.assertNumQueries(0):
+            validators = get_latest_worksheet_validators(self.user)
+
+        self.assertEqual(validators, ("v", worksheet.created_at))
+
+    def test_missing_worksheet_is_cached_too(self):
+        self.assertIsNone(get_latest_worksheet(self.user))
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_latest_worksheet(self.user))
+
+    def test_invalidate_drops_the_cached_row(self):
+        self.assertIsNone(get_latest_worksheet(self.user))
+        Worksheet.objects.create(user=self.user, content_hash="b", content={})
+
+        invalidate_latest_worksheet(self.user.id)
+
+        self.assertEqual(get_latest_worksheet(self.user).content_hash, "b")
+
+    def test_claiming_a_worksheet_invalidates_the_cache(self):
+        self.assertIsNone(get_latest_worksheet(self.user))
+        StockedWorksheet.objects.create(content_hash="s", content={"s": []})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            claim_stocked_worksheet(self.user)
+
+        self.assertEqual(get_latest_worksheet(self.user).content_hash, "s")
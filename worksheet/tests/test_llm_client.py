@@ -0,0 +1,55 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from worksheet.services import llm_client
+from worksheet.services.llm_client import close_llm_clients, get_llm_client
+
+
+@override_settings(
+    DEEPSEEK_API_KEY="test-key",
+    LLM_TIMEOUT=42.0,
+    LLM_CONNECT_TIMEOUT=3.0,
+    LLM_MAX_CONNECTIONS=7,
+    LLM_MAX_KEEPALIVE_CONNECTIONS=4,
+    LLM_KEEPALIVE_EXPIRY=30.0,
+)
+class GetLLMClientTest(SimpleTestCase):
+    def setUp(self):
+        close_llm_clients()
+
+    def tearDown(self):
+        close_llm_clients()
+
+    def test_reuses_client_across_calls(self):
+        self.assertIs(get_llm_client(), get_llm_client())
+
+    def test_new_client_when_api_key_changes(self):
+        first = get_llm_client()
+        with self.settings(DEEPSEEK_API_KEY="other-key"):
+            second = get_llm_client()
+
+        self.assertIsNot(first, second)
+        self.assertEqual(second.api_key, "other-key")
+
+    def test_timeouts_come_from_settings(self):
+        client = get_llm_client()
+
+        self.assertEqual(client.timeout.read, 42.0)
+        self.assertEqual(client.timeout.connect, 3.0)
+
+    def test_rebuilds_client_in_forked_child(self):
+        parent = get_llm_client()
+
+        with patch("worksheet.services.llm_client.os.getpid", return_value=-1):
+            child = get_llm_client()
+
+        self.assertIsNot(parent, child)
+        self.assertIn(parent, llm_client._inherited)
+
+    def test_after_fork_hook_forgets_parent_clients(self):
+        parent = get_llm_client()
+
+        llm_client._forget_clients_after_fork()
+
+        self.assertIsNot(get_llm_client(), parent)
@@ -0,0 +1,167 @@
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+import requests
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+from django.utils.http import http_date
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from worksheet.services import mailgun, metrics
+
+URL = "https://api.mailgun.net/v3/test.mailgun.org/messages"
+
+
+def _response(status, headers=None):
+    response = Mock()
+    response.status_code = status
+    response.ok = status < 400
+    response.headers = headers or {}
+    return response
+
+
+@override_settings(
+    MAILGUN_API_KEY="key",
+    MAILGUN_MAX_RETRIES=3,
+    MAILGUN_BACKOFF_BASE=1.0,
+    MAILGUN_BACKOFF_MAX=30.0,
+)
+@patch("worksheet.services.mailgun.time.sleep")
+@patch("worksheet.services.mailgun.requests.Session.post")
+class MailgunPostTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_success_is_not_retried(self, mock_post, mock_sleep):
+        mock_post.return_value = _response(200)
+
+        response = mailgun.post(URL, {"to": ["a@example.com"]})
+
+        self.assertEqual(response.status_code, 200)
+        mock_post.assert_called_once()
+        self.assertEqual(mock_post.call_args[1]["auth"], ("api", "key"))
+        mock_sleep.assert_not_called()
+
+    def test_retries_throttled_call_and_waits_for_retry_after(
+        self, mock_post, mock_sleep
+    ):
+        mock_post.side_effect = [_response(429, {"Retry-After": "7"}), _response(200)]
+
+        response = mailgun.post(URL, {})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_post.call_count, 2)
+        # Jitter never shortens the wait Mailgun asked for.
+        self.assertGreaterEqual(mock_sleep.call_args[0][0], 7)
+
+    def test_returns_last_response_after_max_retries(self, mock_post, mock_sleep):
+        mock_post.return_value = _response(503)
+
+        response = mailgun.post(URL, {})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(mock_post.call_count, 4)
+        self.assertEqual(metrics.snapshot(["mailgun.gave_up"])["mailgun.gave_up"], 1)
+
+    def test_client_errors_are_not_retried(self, mock_post, mock_sleep):
+        mock_post.return_value = _response(400)
+
+        mailgun.post(URL, {})
+
+        mock_post.assert_called_once()
+
+    def test_retry_after_beyond_backoff_cap_is_not_waited_for(
+        self, mock_post, mock_sleep
+    ):
+        mock_post.return_value = _response(429, {"Retry-After": "3600"})
+
+        response = mailgun.post(URL, {})
+
+        self.assertEqual(response.status_code, 429)
+        mock_sleep.assert_not_called()
+
+    def test_connect_failures_are_retried_then_raised(self, mock_post, mock_sleep):
+        refused = MaxRetryError(None, URL, NewConnectionError(None, "refused"))
+        mock_post.side_effect = requests.exceptions.ConnectionError(refused)
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            mailgun.post(URL, {})
+
+        self.assertEqual(mock_post.call_count, 4)
+
+    def test_connect_timeout_is_retried(self, mock_post, mock_sleep):
+        mock_post.side_effect = [
+            requests.exceptions.ConnectTimeout("slow handshake"),
+            _response(200),
+        ]
+
+        self.assertEqual(mailgun.post(URL, {}).status_code, 200)
+        self.assertEqual(mock_post.call_count, 2)
+
+    def test_dropped_connection_after_sending_is_not_retried(
+        self, mock_post, mock_sleep
+    ):
+        # The request went out; Mailgun may have accepted it.
+        mock_post.side_effect = requests.exceptions.ConnectionError(
+            "Connection aborted: RemoteDisconnected"
+        )
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            mailgun.post(URL, {})
+
+        mock_post.assert_called_once()
+
+    @override_settings(MAILGUN_RETRY_BUDGET=5.0, MAILGUN_TIMEOUT=10.0)
+    def test_retries_stay_within_the_budget(self, mock_post, mock_sleep):
+        mock_post.return_value = _response(503)
+
+        response = mailgun.post(URL, {})
+
+        # Another 10s attempt would overrun the 5s budget.
+        self.assertEqual(response.status_code, 503)
+        mock_post.assert_called_once()
+        mock_sleep.assert_not_called()
+
+    def test_read_timeout_is_not_retried(self, mock_post, mock_sleep):
+        # Mailgun may already have accepted the message.
+        mock_post.side_effect = requests.exceptions.ReadTimeout("slow")
+
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            mailgun.post(URL, {})
+
+        mock_post.assert_called_once()
+
+    def test_records_status_and_latency_per_attempt(self, mock_post, mock_sleep):
+        mock_post.side_effect = [_response(502), _response(200)]
+
+        mailgun.post(URL, {})
+
+        statuses = metrics.snapshot(
+            [f"mailgun.status.{c}" for c in mailgun.STATUS_CLASSES]
+        )
+        self.assertEqual(statuses["mailgun.status.5xx"], 1)
+        self.assertEqual(statuses["mailgun.status.2xx"], 1)
+        latencies = metrics.snapshot(
+            [f"mailgun.latency.{b}" for b in mailgun.latency_buckets()]
+        )
+        self.assertEqual(sum(latencies.values()), 2)
+        self.assertEqual(metrics.snapshot(["mailgun.retried"])["mailgun.retried"], 1)
+
+
+class MailgunSessionTest(SimpleTestCase):
+    def tearDown(self):
+        mailgun.close_mailgun_session()
+
+    def test_session_is_shared(self):
+        self.assertIs(mailgun.get_mailgun_session(), mailgun.get_mailgun_session())
+
+    def test_retry_after_accepts_http_date(self):
+        when = timezone.now() + timedelta(seconds=60)
+        response = _response(429, {"Retry-After": http_date(when.timestamp())})
+
+        self.assertAlmostEqual(mailgun.retry_after_seconds(response), 60, delta=2)
+
+    @override_settings(MAILGUN_BACKOFF_BASE=1.0, MAILGUN_BACKOFF_MAX=5.0)
+    def test_backoff_is_capped(self):
+        self.assertTrue(all(0 <= mailgun.backoff_seconds(10) <= 5 for _ in range(50)))
@@ -0,0 +1,51 @@
+from unittest.mock import call, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from worksheet.services import metrics
+
+REDIS_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://localhost:6379/0",
+    }
+}
+
+
+class MetricsTest(SimpleTestCase):
+    def setUp(self):
+        metrics.reset(["a"])
+
+    def test_incr_creates_and_adds_to_a_counter(self):
+        self.assertEqual(metrics.incr("a"), 1)
+        self.assertEqual(metrics.incr("a", 4), 5)
+        self.assertEqual(metrics.snapshot(["a", "b"]), {"a": 5, "b": 0})
+
+    @override_settings(CACHES=REDIS_CACHES)
+    @patch("worksheet.services.metrics.django_rq.get_connection")
+    def test_redis_counters_are_one_incrby_on_the_cache_key(self, mock_conn):
+        connection = mock_conn.return_value
+        connection.incrby.return_value = 3
+
+        self.assertEqual(metrics.incr("a", 2), 3)
+
+        self.assertEqual(
+            connection.method_calls, [call.incrby(cache.make_key("metrics:a"), 2)]
+        )
+
+    @patch("worksheet.services.metrics.random.random")
+    def test_sample_writes_a_share_of_events_weighted_by_the_rate(self, mock_random):
+        mock_random.side_effect = [0.5, 0.05, 0.2]
+
+        for _ in range(3):
+            metrics.sample("a", rate=0.1)
+
+        self.assertEqual(metrics.snapshot(["a"]), {"a": 10})
+
+    @override_settings(METRICS_HIT_SAMPLE_RATE=1)
+    def test_full_sample_rate_counts_every_event(self):
+        for _ in range(3):
+            metrics.sample("a")
+
+        self.assertEqual(metrics.snapshot(["a"]), {"a": 3})
@@ -0,0 +1,162 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from worksheet.models import EmailOutbox, StockedWorksheet, Worksheet
+from worksheet.services.outbox import (
+    add_to_outbox,
+    claim_batch,
+    drain_outbox,
+    requeue_dead,
+)
+from worksheet.services.stock import claim_stocked_worksheet
+
+User = get_user_model()
+
+
+def _worksheet(user, suffix="1"):
+    return Worksheet.objects.create(
+        user=user, content_hash=f"h{user.id}-{suffix}", content={}, themes=["travel"]
+    )
+
+
+class OutboxWriteTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="out@example.com")
+
+    def test_delivered_claim_queues_email_with_worksheet(self):
+        StockedWorksheet.objects.create(content_hash="s", content={})
+
+        claim_stocked_worksheet(self.user, deliver=True)
+
+        row = EmailOutbox.objects.get()
+        self.assertEqual(row.worksheet.user, self.user)
+        self.assertEqual(row.status, EmailOutbox.PENDING)
+
+    def test_claim_without_delivery_queues_nothing(self):
+        StockedWorksheet.objects.create(content_hash="s", content={})
+
+        claim_stocked_worksheet(self.user)
+
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_replacing_a_worksheet_keeps_emails_still_owed(self):
+        add_to_outbox(_worksheet(self.user, "pending"))
+        dead = add_to_outbox(_worksheet(self.user, "dead"))
+        EmailOutbox.objects.filter(pk=dead.pk).update(status=EmailOutbox.DEAD)
+        sent = add_to_outbox(_worksheet(self.user, "sent"))
+        EmailOutbox.objects.filter(pk=sent.pk).update(status=EmailOutbox.SENT)
+        StockedWorksheet.objects.create(content_hash="s", content={})
+
+        claim_stocked_worksheet(self.user, deliver=True)
+
+        self.assertEqual(
+            set(EmailOutbox.objects.values_list("worksheet__content_hash", flat=True)),
+            {f"h{self.user.id}-pending", f"h{self.user.id}-dead", "s"},
+        )
+
+
+class ClaimBatchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="claim@example.com")
+        self.row = add_to_outbox(_worksheet(self.user))
+
+    def test_leased_rows_are_not_claimed_again(self):
+        self.assertEqual(claim_batch(10), [self.row])
+        self.assertEqual(claim_batch(10), [])
+
+    def test_expired_lease_is_claimable(self):
+        claim_batch(10)
+        EmailOutbox.objects.update(leased_until=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(claim_batch(10), [self.row])
+
+    def test_rows_waiting_for_retry_are_not_due(self):
+        EmailOutbox.objects.update(available_at=timezone.now() + timedelta(minutes=5))
+
+        self.assertEqual(claim_batch(10), [])
+
+
+@override_settings(OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_INTERVALS=[60])
+@patch("worksheet.services.outbox.send_worksheet_emails")
+class DrainOutboxTest(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(email=f"drain{i}@example.com") for i in range(2)
+        ]
+        for user in self.users:
+            add_to_outbox(_worksheet(user))
+
+    def test_sent_rows_are_marked_sent(self, mock_send):
+        mock_send.return_value = []
+
+        totals = drain_outbox(batch_size=1)
+
+        self.assertEqual(totals, {"sent": 2, "retrying": 0, "dead": 0})
+        self.assertEqual(mock_send.call_count, 2)
+        self.assertFalse(EmailOutbox.objects.exclude(status=EmailOutbox.SENT).exists())
+
+    def test_failed_rows_are_retried_later(self, mock_send):
+        failing_users = []
+
+        def send(deliveries):
+            failing_users.append(deliveries[0][0])
+            return [0]
+
+        mock_send.side_effect = send
+
+        totals = drain_outbox()
+
+        self.assertEqual(totals, {"sent": 1, "retrying": 1, "dead": 0})
+        failed = EmailOutbox.objects.get(worksheet__user=failing_users[0])
+        self.assertEqual(failed.status, EmailOutbox.PENDING)
+        self.assertEqual(failed.attempts, 1)
+        self.assertGreater(failed.available_at, timezone.now() + timedelta(seconds=50))
+        self.assertIsNone(failed.leased_until)
+
+    def test_failures_are_tracked_per_row_not_per_user(self, mock_send):
+        # After a regenerate before a drain, one user has two rows in a batch.
+        EmailOutbox.objects.all().delete()
+        worksheets = {}
+        for suffix in ("old", "new"):
+            worksheets[suffix] = _worksheet(self.users[0], suffix)
+            worksheets[suffix].themes = [suffix]
+            worksheets[suffix].save()
+            add_to_outbox(worksheets[suffix])
+        mock_send.side_effect = lambda deliveries: [
+            index
+            for index, (_, _, themes) in enumerate(deliveries)
+            if themes == ["new"]
+        ]
+
+        totals = drain_outbox()
+
+        self.assertEqual(totals, {"sent": 1, "retrying": 1, "dead": 0})
+        self.assertEqual(
+            EmailOutbox.objects.get(worksheet=worksheets["old"]).status,
+            EmailOutbox.SENT,
+        )
+        self.assertEqual(
+            EmailOutbox.objects.get(worksheet=worksheets["new"]).status,
+            EmailOutbox.PENDING,
+        )
+
+    def test_rows_are_dead_lettered_after_max_attempts(self, mock_send):
+        mock_send.side_effect = RuntimeError("Mailgun down")
+        EmailOutbox.objects.update(attempts=1)
+
+        totals = drain_outbox()
+
+        self.assertEqual(totals, {"sent": 0, "retrying": 0, "dead": 2})
+        row = EmailOutbox.objects.first()
+        self.assertEqual(row.status, EmailOutbox.DEAD)
+        self.assertIn("Mailgun down", row.last_error)
+
+        self.assertEqual(requeue_dead(EmailOutbox.objects.all()), 2)
+        self.assertEqual(
+            EmailOutbox.objects.filter(status=EmailOutbox.PENDING, attempts=0).count(),
+            2,
+        )
@@ -2,10 +2,15 @@ import json
 
 from django.test import SimpleTestCase
 
+from worksheet.services.grammar_pools import GRAMMAR_POOL_GUIDANCE
 from worksheet.services.prompts import (
+    ITEMS_PER_POOL,
+    TRANSLATION_GUIDANCE,
     TRANSLATION_ITEMS,
     TRANSLATION_KEY,
     build_payload,
+    build_section_payload,
+    build_section_user_prompt,
     build_user_prompt,
 )
 
@@ -48,3 +53,35 @@ class BuildPayloadTest(SimpleTestCase):
 
         self.assertEqual([m["role"] for m in payload], ["system", "user"])
         self.assertIn(TRANSLATION_KEY, payload[1]["content"])
+
+
+class BuildSectionUserPromptTest(SimpleTestCase):
+    def _schema(self, prompt):
+        start, end = prompt.index("{"), prompt.rindex("}") + 1
+        return json.loads(prompt[start:end])
+
+    def test_grammar_section_uses_pool_guidance_and_single_key_schema(self):
+        prompt = build_section_user_prompt(["bugs"], "por vs para", [])
+
+        self.assertIn(GRAMMAR_POOL_GUIDANCE["por vs para"], prompt)
+        self.assertNotIn(TRANSLATION_GUIDANCE, prompt)
+        schema = self._schema(prompt)
+        self.assertEqual(list(schema), ["por vs para"])
+        self.assertEqual(len(schema["por vs para"]), ITEMS_PER_POOL)
+
+    def test_translation_section_uses_translation_guidance(self):
+        prompt = build_section_user_prompt(
+            ["bugs"], TRANSLATION_KEY, ["subjunctive", "por vs para"]
+        )
+
+        self.assertIn(TRANSLATION_GUIDANCE, prompt)
+        self.assertIn("- subjunctive\n- por vs para", prompt)
+        schema = self._schema(prompt)
+        self.assertEqual(list(schema), [TRANSLATION_KEY])
+        self.assertEqual(len(schema[TRANSLATION_KEY]), TRANSLATION_ITEMS)
+
+    def test_payload_has_system_and_user_messages(self):
+        payload = build_section_payload(["bugs"], "subjunctive", [])
+
+        self.assertEqual([m["role"] for m in payload], ["system", "user"])
+        self.assertIn('"subjunctive"', payload[1]["content"])
@@ -0,0 +1,143 @@
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from worksheet.services import metrics, rate_limit
+from worksheet.services.generate import call_llm, estimate_llm_tokens
+
+LIMITS = {
+    "deepseek": {"requests_per_second": 2, "tokens_per_minute": 600},
+    "mailgun": {"requests_per_second": 0, "tokens_per_minute": 0},
+}
+
+
+@override_settings(RATE_LIMITS=LIMITS)
+@patch("worksheet.services.rate_limit.time.sleep")
+class TokenBucketTest(SimpleTestCase):
+    def setUp(self):
+        rate_limit.reset_local_buckets()
+        cache.clear()
+
+    def test_burst_within_limits_does_not_wait(self, mock_sleep):
+        self.assertEqual(rate_limit.acquire("deepseek", tokens=100), 0)
+        self.assertEqual(rate_limit.acquire("deepseek", tokens=100), 0)
+        mock_sleep.assert_not_called()
+
+    def test_request_bucket_makes_third_call_wait(self, mock_sleep):
+        rate_limit.acquire("deepseek")
+        rate_limit.acquire("deepseek")
+
+        wait = rate_limit.acquire("deepseek")
+
+        # 2 requests/s: the third request owes about half a second.
+        self.assertAlmostEqual(wait, 0.5, delta=0.05)
+        mock_sleep.assert_called_once()
+
+    def test_token_bucket_waits_for_refill(self, mock_sleep):
+        rate_limit.acquire("deepseek", tokens=600)
+
+        wait = rate_limit.acquire("deepseek", tokens=300)
+
+        # 300 tokens over a 600/min (10/s) budget.
+        self.assertAlmostEqual(wait, 30, delta=0.5)
+
+    def test_oversize_request_takes_the_whole_bucket(self, mock_sleep):
+        # 1000 tokens against 600/min would otherwise owe 40s.
+        self.assertEqual(rate_limit.acquire("deepseek", tokens=1000), 0)
+
+        self.assertAlmostEqual(rate_limit.take("deepseek", tokens=60), 6, delta=0.5)
+
+    def test_wait_over_max_wait_is_refused_without_taking(self, mock_sleep):
+        rate_limit.acquire("deepseek", tokens=600)
+
+        with self.assertRaises(rate_limit.RateLimited) as ctx:
+            rate_limit.acquire("deepseek", tokens=300, max_wait=5)
+
+        self.assertAlmostEqual(ctx.exception.wait, 30, delta=0.5)
+        mock_sleep.assert_not_called()
+        # Neither bucket was charged: a small take still fits.
+        self.assertAlmostEqual(rate_limit.take("deepseek", tokens=10), 1, delta=0.1)
+
+    def test_settle_refunds_overestimated_tokens(self, mock_sleep):
+        rate_limit.acquire("deepseek", tokens=600)
+        rate_limit.settle("deepseek", -600)
+
+        self.assertEqual(rate_limit.take("deepseek", tokens=500), 0)
+
+    def test_unlimited_provider_is_free(self, mock_sleep):
+        for _ in range(10):
+            self.assertEqual(rate_limit.acquire("mailgun", tokens=1000), 0)
+
+    def test_waits_are_recorded(self, mock_sleep):
+        for _ in range(3):
+            rate_limit.acquire("deepseek")
+
+        names = [f"rate_limit.deepseek.{b}" for b in rate_limit.wait_buckets()]
+        values = metrics.snapshot(names)
+        self.assertEqual(values["rate_limit.deepseek.none"], 2)
+        self.assertEqual(values["rate_limit.deepseek.le_1000ms"], 1)
+
+
+@override_settings(
+    RATE_LIMITS=LIMITS,
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}},
+)
+class RedisBucketTest(SimpleTestCase):
+    def tearDown(self):
+        rate_limit._script = None
+
+    @patch("worksheet.services.rate_limit.django_rq.get_connection")
+    def test_buckets_are_taken_through_one_script_call_each(self, mock_connection):
+        script = mock_connection.return_value.register_script.return_value
+        script.return_value = b"0.25"
+
+        self.assertEqual(rate_limit.take("deepseek", tokens=50), 0.25)
+
+        keys = [call.kwargs["keys"] for call in script.call_args_list]
+        self.assertEqual(
+            keys, [["ratelimit:deepseek:requests"], ["ratelimit:deepseek:tokens"]]
+        )
+        self.assertEqual(script.call_args.kwargs["args"], [600, 10, 50, -1])
+
+    @patch("worksheet.services.rate_limit.django_rq.get_connection")
+    def test_redis_outage_does_not_block_callers(self, mock_connection):
+        mock_connection.side_effect = ConnectionError("down")
+
+        self.assertEqual(rate_limit.take("deepseek", tokens=50), 0)
+
+
+@override_settings(RATE_LIMITS=LIMITS, LLM_OUTPUT_TOKENS_ESTIMATE=100)
+class CallLLMRateLimitTest(SimpleTestCase):
+    def test_estimate_counts_prompt_and_expected_reply(self):
+        self.assertEqual(estimate_llm_tokens([{"content": "x" * 400}]), 200)
+
+    @patch("worksheet.services.generate.rate_limit")
+    @patch("worksheet.services.generate.get_llm_client")
+    def test_call_llm_acquires_and_settles_real_usage(self, mock_client, mock_limit):
+        response = MagicMock()
+        response.choices[0].message.content = "{}"
+        response.usage.total_tokens = 150
+        mock_client.return_value.chat.completions.create.return_value = response
+
+        call_llm([{"role": "user", "content": "x" * 400}])
+
+        mock_limit.acquire.assert_called_once_with("deepseek", tokens=200)
+        mock_limit.settle.assert_called_once_with("deepseek", -50)
+
+    @patch("worksheet.services.generate.rate_limit")
+    @patch("worksheet.services.generate.get_llm_client")
+    def test_streamed_call_settles_from_the_usage_chunk(self, mock_client, mock_limit):
+        stream = MagicMock()
+        stream.__iter__.return_value = [
+            MagicMock(choices=[MagicMock(**{"delta.content": "{}"})]),
+            MagicMock(choices=[], usage=MagicMock(total_tokens=260)),
+        ]
+        mock_client.return_value.chat.completions.create.return_value = stream
+
+        with override_settings(LLM_STREAMING=True):
+            call_llm([{"role": "user", "content": "x" * 400}], lambda *_: True)
+
+        create_kwargs = mock_client.return_value.chat.completions.create.call_args[1]
+        self.assertEqual(create_kwargs["stream_options"], {"include_usage": True})
+        mock_limit.settle.assert_called_once_with("deepseek", 60)
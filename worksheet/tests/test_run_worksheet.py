@@ -0,0 +1,128 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+User = get_user_model()
+
+
+def _run(**options):
+    out = StringIO()
+    call_command("run_worksheet", stdout=out, **options)
+    return out.getvalue()
+
+
+@patch("worksheet.management.commands.run_worksheet.drain_outbox")
+@patch("worksheet.management.commands.run_worksheet.claim_or_generate_worksheet_for")
+class RunWorksheetTest(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.due = [
+            User.objects.create_user(
+                email=f"due{i}@example.com", next_delivery=self.today
+            )
+            for i in range(3)
+        ]
+        self.later = User.objects.create_user(
+            email="later@example.com", next_delivery=self.today + timedelta(days=1)
+        )
+
+    def test_delivers_due_users_and_advances_next_delivery(
+        self, mock_claim, mock_drain
+    ):
+        mock_claim.return_value = '{"a": []}'
+        mock_drain.return_value = {"sent": 3, "retrying": 0, "dead": 0}
+
+        output = _run(progress_every=2)
+
+        mock_drain.assert_called_once()
+        self.assertEqual(
+            [call.args[0].email for call in mock_claim.call_args_list],
+            [user.email for user in self.due],
+        )
+        self.assertTrue(
+            all(call.kwargs == {"deliver": True} for call in mock_claim.call_args_list)
+        )
+        self.assertIn("2 users processed", output)
+        self.assertIn(
+            "Done: 3 users (0 failed); emails: 3 sent, 0 retrying, 0 dead", output
+        )
+        for user in self.due:
+            user.refresh_from_db()
+            self.assertEqual(user.next_delivery, self.today + timedelta(days=2))
+        self.later.refresh_from_db()
+        self.assertEqual(self.later.next_delivery, self.today + timedelta(days=1))
+
+    @patch("worksheet.management.commands.run_worksheet.NEXT_DELIVERY_BATCH", 1)
+    def test_advancing_mid_run_skips_no_one(self, mock_claim, mock_drain):
+        mock_claim.return_value = '{"a": []}'
+        mock_drain.return_value = {"sent": 3, "retrying": 0, "dead": 0}
+
+        _run()
+
+        users = [call.args[0] for call in mock_claim.call_args_list]
+        self.assertEqual([u.email for u in users], [u.email for u in self.due])
+        # Delivery gets whole rows, not deferred ones.
+        self.assertTrue(all(not u.get_deferred_fields() for u in users))
+
+    def test_failure_does_not_stop_the_batch(self, mock_claim, mock_drain):
+        mock_claim.side_effect = ['{"a": []}', None, RuntimeError("boom")]
+        mock_drain.return_value = {"sent": 1, "retrying": 0, "dead": 0}
+
+        output = _run()
+
+        self.assertIn(
+            "Done: 3 users (1 failed); emails: 1 sent, 0 retrying, 0 dead", output
+        )
+
+    def test_failed_sends_are_left_to_the_outbox(self, mock_claim, mock_drain):
+        mock_claim.return_value = '{"a": []}'
+        mock_drain.return_value = {"sent": 2, "retrying": 1, "dead": 0}
+
+        output = _run()
+
+        self.assertIn(
+            "Done: 3 users (0 failed); emails: 2 sent, 1 retrying, 0 dead", output
+        )
+
+    def test_dead_emails_are_not_counted_as_failed_users(self, mock_claim, mock_drain):
+        mock_claim.return_value = '{"a": []}'
+        # Dead rows left over from earlier runs can outnumber today's users.
+        mock_drain.return_value = {"sent": 3, "retrying": 0, "dead": 5}
+
+        output = _run()
+
+        self.assertIn(
+            "Done: 3 users (0 failed); emails: 3 sent, 0 retrying, 5 dead", output
+        )
+
+    def test_nothing_prepared_skips_dispatch(self, mock_claim, mock_drain):
+        mock_claim.return_value = None
+
+        _run()
+
+        mock_drain.assert_not_called()
+
+
+@patch("worksheet.management.commands.run_worksheet.drain_outbox")
+@patch("worksheet.management.commands.run_worksheet.claim_or_generate_worksheet_for")
+class RunWorksheetConcurrencyTest(TransactionTestCase):
+    def test_concurrent_delivery_reaches_every_user(self, mock_claim, mock_drain):
+        today = timezone.now().date()
+        for i in range(10):
+            User.objects.create_user(email=f"c{i}@example.com", next_delivery=today)
+        mock_claim.return_value = '{"a": []}'
+        mock_drain.return_value = {"sent": 10, "retrying": 0, "dead": 0}
+
+        output = _run(concurrency=4)
+
+        self.assertIn("Done: 10 users (0 failed); emails: 10 sent", output)
+        self.assertEqual(
+            sorted(call.args[0].email for call in mock_claim.call_args_list),
+            sorted(f"c{i}@example.com" for i in range(10)),
+        )
+        self.assertFalse(User.objects.filter(next_delivery=today).exists())
@@ -0,0 +1,117 @@
+from datetime import date
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from worksheet.models import StockedWorksheet, Worksheet
+from worksheet.services.stock import (
+    claim_or_generate_worksheet_for,
+    claim_stocked_worksheet,
+    deliveries_due,
+    stock_worksheets,
+)
+from worksheet.tests.test_generate import _MIN_WORKSHEET
+
+User = get_user_model()
+
+TODAY = date(2026, 3, 10)
+
+
+def _stocked(suffix: str, themes=None) -> StockedWorksheet:
+    return StockedWorksheet.objects.create(
+        content_hash=f"hash-{suffix}",
+        content={"worksheet": suffix},
+        topics=["past tenses"],
+        themes=themes or ["travel"],
+    )
+
+
+class DeliveriesDueTest(TestCase):
+    def test_counts_repeat_deliveries_within_horizon(self):
+        User.objects.create_user(email="a@example.com", next_delivery=TODAY)
+        User.objects.create_user(email="b@example.com", next_delivery=date(2026, 3, 11))
+        User.objects.create_user(email="c@example.com", next_delivery=date(2026, 3, 20))
+        User.objects.create_user(
+            email="d@example.com", next_delivery=TODAY, active=False
+        )
+
+        # a: 10th, 12th, 14th; b: 11th, 13th; c is beyond the horizon.
+        self.assertEqual(deliveries_due(TODAY, horizon_days=4), 5)
+
+    def test_overdue_users_count_from_today(self):
+        User.objects.create_user(email="a@example.com", next_delivery=date(2026, 3, 1))
+
+        self.assertEqual(deliveries_due(TODAY, horizon_days=0), 1)
+
+
+@override_settings(WORKSHEET_STOCK_HORIZON_DAYS=0)
+class StockWorksheetsTest(TestCase):
+    def setUp(self):
+        for i in range(3):
+            User.objects.create_user(email=f"u{i}@example.com", next_delivery=TODAY)
+
+    @patch("worksheet.services.stock.generate_worksheet_content")
+    def test_fills_pool_up_to_deliveries_due(self, mock_generate):
+        mock_generate.side_effect = [{**_MIN_WORKSHEET, "run": [i]} for i in range(3)]
+        _stocked("existing")
+
+        added = stock_worksheets(TODAY)
+
+        self.assertEqual(added, 2)
+        self.assertEqual(StockedWorksheet.objects.count(), 3)
+        self.assertEqual(mock_generate.call_count, 2)
+
+    @patch("worksheet.services.stock.generate_worksheet_content")
+    def test_skips_failures_and_duplicates(self, mock_generate):
+        mock_generate.side_effect = [_MIN_WORKSHEET, None, _MIN_WORKSHEET]
+
+        added = stock_worksheets(TODAY)
+
+        self.assertEqual(added, 1)
+        self.assertEqual(StockedWorksheet.objects.count(), 1)
+
+    @patch("worksheet.services.stock.generate_worksheet_content")
+    def test_respects_limit(self, mock_generate):
+        mock_generate.return_value = _MIN_WORKSHEET
+
+        self.assertEqual(stock_worksheets(TODAY, limit=1), 1)
+        mock_generate.assert_called_once()
+
+
+class ClaimStockedWorksheetTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="claim@example.com")
+
+    def test_claims_oldest_and_replaces_previous_worksheet(self):
+        Worksheet.objects.create(user=self.user, content_hash="old", content={})
+        _stocked("first", themes=["food"])
+        _stocked("second")
+
+        content = claim_stocked_worksheet(self.user)
+
+        self.assertEqual(content, '{"worksheet": "first"}')
+        worksheet = Worksheet.objects.get(user=self.user)
+        self.assertEqual(worksheet.content_hash, "hash-first")
+        self.assertEqual(worksheet.themes, ["food"])
+        self.assertEqual(
+            list(StockedWorksheet.objects.values_list("content_hash", flat=True)),
+            ["hash-second"],
+        )
+
+    @patch("worksheet.services.stock.generate_worksheet_for")
+    def test_falls_back_to_live_generation_when_empty(self, mock_generate):
+        mock_generate.return_value = "live"
+
+        self.assertIsNone(claim_stocked_worksheet(self.user))
+        self.assertEqual(claim_or_generate_worksheet_for(self.user), "live")
+        mock_generate.assert_called_once_with(self.user, deliver=False)
+
+    @patch("worksheet.services.stock.generate_worksheet_for")
+    def test_stocked_worksheet_skips_live_generation(self, mock_generate):
+        _stocked("ready")
+
+        self.assertEqual(
+            claim_or_generate_worksheet_for(self.user), '{"worksheet": "ready"}'
+        )
+        mock_generate.assert_not_called()
@@ -1,14 +1,25 @@
 import hashlib
 import json
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
 from django.test import TestCase
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
+from worksheet.jobs import (
+    INTERACTIVE_JOB_TIMEOUT,
+    generate_custom_exercises_job,
+    generate_worksheet_job,
+    dispatch_outbox_job,
+    regenerate_worksheet_job,
+)
 from worksheet.models import Worksheet
+from worksheet.services.custom_cache import CustomGenerationInProgress
+from worksheet.services.latest_worksheet import invalidate_latest_worksheet
 from worksheet.tests.test_generate import TEST_GRAMMAR_POOLS, _MIN_WORKSHEET
 
 User = get_user_model()
@@ -23,6 +34,7 @@ class LatestWorksheetViewTest(TestCase):
         self.token = Token.objects.create(user=self.user)
         self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
         self.url = "/api/worksheet/"
+        cache.clear()
 
     def test_requires_auth(self):
         self.client.credentials()
@@ -38,7 +50,7 @@ class LatestWorksheetViewTest(TestCase):
         Worksheet.objects.create(
             user=self.user,
             content_hash=hashlib.sha256(content.encode("utf-8")).hexdigest(),
-            content=content,
+            content=_MIN_WORKSHEET,
             topics=TEST_GRAMMAR_POOLS,
             themes=["bugs"],
         )
@@ -52,6 +64,72 @@ class LatestWorksheetViewTest(TestCase):
         self.assertIsInstance(first["answer"], list)
         self.assertTrue(first["answer"][0].startswith("sol-"))
 
+    def test_repeat_get_is_served_from_cache(self):
+        Worksheet.objects.create(
+            user=self.user, content_hash="cached", content=_MIN_WORKSHEET
+        )
+        self.client.get(self.url)
+
+        # The token lookup is cached as well, so nothing hits the database.
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["content"], _MIN_WORKSHEET)
+
+    def _create(self, content_hash="etag-1"):
+        return Worksheet.objects.create(
+            user=self.user, content_hash=content_hash, content=_MIN_WORKSHEET
+        )
+
+    def test_response_carries_validators(self):
+        self._create()
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response["ETag"], '"etag-1"')
+        self.assertIn("Last-Modified", response)
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+
+    def test_matching_etag_gets_304_without_loading_content(self):
+        self._create()
+        self.client.get(self.url)
+
+        with patch("worksheet.views.get_latest_worksheet") as mock_latest:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH='"etag-1"')
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], '"etag-1"')
+        mock_latest.assert_not_called()
+
+    def test_stale_etag_gets_the_new_worksheet(self):
+        self._create()
+        self.client.get(self.url)
+        Worksheet.objects.all().delete()
+        worksheet = self._create("etag-2")
+        invalidate_latest_worksheet(worksheet.user_id)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='"etag-1"')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["ETag"], '"etag-2"')
+
+    def test_if_modified_since_gets_304(self):
+        self._create()
+        last_modified = self.client.get(self.url)["Last-Modified"]
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_500_when_stored_content_is_unreadable_legacy_text(self):
+        Worksheet.objects.create(user=self.user, content_hash="legacy", content="{bad")
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 
 class GenerateCustomWorksheetViewTest(TestCase):
     def setUp(self):
@@ -62,6 +140,7 @@ class GenerateCustomWorksheetViewTest(TestCase):
         self.token = Token.objects.create(user=self.user)
         self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
         self.url = "/api/worksheet/custom/"
+        cache.clear()
 
     def test_requires_auth(self):
         self.client.credentials()
@@ -84,7 +163,7 @@ class GenerateCustomWorksheetViewTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("request", response.data)
 
-    @patch("worksheet.views.generate_custom_exercises")
+    @patch("worksheet.services.custom_cache.generate_custom_exercises")
     def test_returns_custom_exercises_without_persisting(self, mock_generate):
         content = {
             "exercises": [
@@ -110,7 +189,7 @@ class GenerateCustomWorksheetViewTest(TestCase):
         self.assertEqual(Worksheet.objects.count(), 0)
         mock_generate.assert_called_once_with("Subjunctive tense about birthdays")
 
-    @patch("worksheet.views.generate_custom_exercises")
+    @patch("worksheet.services.custom_cache.generate_custom_exercises")
     def test_returns_502_when_generation_fails(self, mock_generate):
         mock_generate.return_value = None
 
@@ -122,3 +201,191 @@ class GenerateCustomWorksheetViewTest(TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_502_BAD_GATEWAY)
         self.assertEqual(response.data, {"error": "Custom worksheet generation failed"})
+
+    @patch("worksheet.views.get_queue")
+    @patch("worksheet.views.get_or_generate_custom_exercises")
+    def test_identical_request_in_flight_asks_the_caller_to_retry(
+        self, mock_get_or_generate, mock_get_queue
+    ):
+        mock_get_or_generate.side_effect = CustomGenerationInProgress("birthdays")
+
+        response = self.client.post(self.url, {"request": "birthdays"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            response["Retry-After"], str(settings.CUSTOM_EXERCISE_SYNC_WAIT)
+        )
+        mock_get_queue.assert_not_called()
+        _, kwargs = mock_get_or_generate.call_args
+        self.assertEqual(kwargs["max_wait"], settings.CUSTOM_EXERCISE_SYNC_WAIT)
+
+    @patch("worksheet.views.get_queue")
+    def test_async_mode_enqueues_job(self, mock_get_queue):
+        mock_enqueue = mock_get_queue.return_value.enqueue
+        mock_enqueue.return_value = MagicMock(id="job-1")
+
+        response = self.client.post(
+            self.url,
+            {"request": "Subjunctive tense about birthdays", "mode": "async"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["job_id"], "job-1")
+        self.assertEqual(response.data["status_url"], "/api/worksheet/jobs/job-1/")
+        args, kwargs = mock_enqueue.call_args
+        self.assertEqual(
+            args, (generate_custom_exercises_job, "Subjunctive tense about birthdays")
+        )
+        self.assertEqual(kwargs["meta"], {"user_id": self.user.id})
+        self.assertEqual(kwargs["job_timeout"], INTERACTIVE_JOB_TIMEOUT)
+        mock_get_queue.assert_called_once_with("interactive")
+
+
+class GenerateLLMContentViewAsyncTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="regen-api@example.com", password="testpass123"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.url = "/api/worksheet/regenerate/"
+
+    @patch("worksheet.views.generate_worksheet_for")
+    @patch("worksheet.views.get_queue")
+    def test_async_mode_returns_without_generating(self, mock_get_queue, mock_generate):
+        mock_enqueue = mock_get_queue.return_value.enqueue
+        mock_enqueue.return_value = MagicMock(id="job-2")
+
+        response = self.client.post(
+            self.url, {"themes": ["travel"], "mode": "async"}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["job_id"], "job-2")
+        mock_generate.assert_not_called()
+        args, _ = mock_enqueue.call_args
+        self.assertEqual(args, (regenerate_worksheet_job, self.user.id, ["travel"]))
+
+    def test_rejects_unknown_mode(self):
+        response = self.client.post(self.url, {"mode": "later"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class JobStatusViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="jobs-api@example.com", password="testpass123"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def _job(self, owner_id):
+        job = MagicMock(meta={"user_id": owner_id}, result={"status": "success"})
+        job.get_status.return_value = "finished"
+        job.is_failed = False
+        return job
+
+    @patch("worksheet.views.get_queue")
+    @patch("worksheet.views.Job.fetch")
+    def test_returns_result_to_owner(self, mock_fetch, mock_get_queue):
+        mock_fetch.return_value = self._job(self.user.id)
+
+        response = self.client.get("/api/worksheet/jobs/job-1/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "finished")
+        self.assertEqual(response.data["result"], {"status": "success"})
+
+    @patch("worksheet.views.get_queue")
+    @patch("worksheet.views.Job.fetch")
+    def test_hides_other_users_jobs(self, mock_fetch, mock_get_queue):
+        mock_fetch.return_value = self._job(self.user.id + 1)
+
+        response = self.client.get("/api/worksheet/jobs/job-1/")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class GenerationJobsTest(TestCase):
+    @patch("worksheet.jobs.get_or_generate_custom_exercises")
+    def test_custom_job_returns_content(self, mock_generate):
+        mock_generate.return_value = {"exercises": []}
+
+        result = generate_custom_exercises_job("subjuntivo")
+
+        self.assertEqual(
+            result,
+            {
+                "status": "success",
+                "request": "subjuntivo",
+                "content": {"exercises": []},
+            },
+        )
+
+    @patch("worksheet.jobs.generate_worksheet_for")
+    def test_regenerate_job_reports_failure(self, mock_generate):
+        user = User.objects.create_user(email="job@example.com", password="x")
+        mock_generate.return_value = None
+
+        result = regenerate_worksheet_job(user.id, ["travel"])
+
+        self.assertEqual(result, {"status": "failed"})
+        mock_generate.assert_called_once_with(user, themes=["travel"])
+
+
+class DeliveryJobsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="chain@example.com", password="x")
+        cache.clear()
+
+    @patch("worksheet.jobs.get_queue")
+    @patch("worksheet.jobs.generate_worksheet_for")
+    def test_generation_queues_email_and_nudges_dispatcher(
+        self, mock_generate, mock_get_queue
+    ):
+        mock_generate.return_value = "{}"
+
+        result = generate_worksheet_job(self.user.id)
+
+        self.assertEqual(result, {"status": "success"})
+        mock_generate.assert_called_once_with(self.user, deliver=True)
+        mock_get_queue.assert_called_once_with("email")
+        args, kwargs = mock_get_queue.return_value.enqueue.call_args
+        self.assertEqual(args, (dispatch_outbox_job,))
+        self.assertEqual(kwargs["job_timeout"], settings.OUTBOX_DISPATCH_TIMEOUT)
+        self.assertGreater(
+            settings.OUTBOX_LEASE_SECONDS, settings.OUTBOX_DISPATCH_TIMEOUT
+        )
+
+    @patch("worksheet.jobs.get_queue")
+    @patch("worksheet.jobs.generate_worksheet_for")
+    def test_waiting_dispatch_is_not_enqueued_twice(
+        self, mock_generate, mock_get_queue
+    ):
+        mock_generate.return_value = "{}"
+
+        generate_worksheet_job(self.user.id)
+        generate_worksheet_job(self.user.id)
+
+        mock_get_queue.return_value.enqueue.assert_called_once()
+
+    @patch("worksheet.jobs.get_queue")
+    @patch("worksheet.jobs.generate_worksheet_for")
+    def test_duplicate_sends_nothing(self, mock_generate, mock_get_queue):
+        mock_generate.return_value = None
+
+        self.assertEqual(generate_worksheet_job(self.user.id), {"status": "duplicate"})
+        mock_get_queue.assert_not_called()
+
+    @patch("worksheet.jobs.drain_outbox")
+    def test_dispatch_job_drains_outbox(self, mock_drain):
+        mock_drain.return_value = {"sent": 2, "retrying": 0, "dead": 0}
+
+        self.assertEqual(
+            dispatch_outbox_job(),
+            {"status": "success", "sent": 2, "retrying": 0, "dead": 0},
+        )
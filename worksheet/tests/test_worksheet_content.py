@@ -0,0 +1,55 @@
+import json
+
+from django.test import SimpleTestCase
+
+from worksheet.services.worksheet_content import (
+    Exercise,
+    WorksheetContent,
+    dump_content,
+)
+
+DATA = {
+    "past tenses": [{"prompt": "Ayer ___ (ir) al parque.", "answer": ["fui"]}],
+    "translation": [{"prompt": "We did it.", "answer": ["Lo hicimos."]}],
+}
+
+
+class WorksheetContentTest(SimpleTestCase):
+    def test_builds_sections_from_stored_dict(self):
+        worksheet = WorksheetContent.from_data(DATA)
+
+        self.assertEqual(
+            [s.title for s in worksheet.sections], ["Past Tenses", "Translation"]
+        )
+        exercise = worksheet.sections[0].exercises[0]
+        self.assertEqual(exercise.prompt, "Ayer ___ (ir) al parque.")
+        self.assertEqual(exercise.answer, ["fui"])
+
+    def test_accepts_legacy_json_text_and_round_trips(self):
+        worksheet = WorksheetContent.from_data(json.dumps(DATA))
+
+        self.assertEqual(worksheet.to_data(), DATA)
+
+    def test_existing_instance_is_not_rebuilt(self):
+        worksheet = WorksheetContent.from_data(DATA)
+
+        self.assertIs(WorksheetContent.from_data(worksheet), worksheet)
+
+    def test_non_objects_are_rejected(self):
+        self.assertIsNone(WorksheetContent.from_data("not json"))
+        self.assertIsNone(WorksheetContent.from_data([1, 2]))
+        self.assertIsNone(WorksheetContent.from_data(None))
+
+    def test_legacy_string_items_have_no_answer(self):
+        worksheet = WorksheetContent.from_data({"past": ["Ayer ___ (ir)."]})
+
+        self.assertEqual(worksheet.sections[0].prompts, ["Ayer ___ (ir)."])
+        self.assertEqual(worksheet.sections[0].exercises[0].answer, [])
+
+    def test_objects_use_slots(self):
+        with self.assertRaises(AttributeError):
+            Exercise("p", ["a"]).extra = 1
+
+    def test_dump_content_matches_the_hashed_text(self):
+        self.assertEqual(dump_content(DATA), json.dumps(DATA, ensure_ascii=False))
+        self.assertEqual(dump_content("raw text"), "raw text")
@@ -44,4 +44,10 @@ urlpatterns = [
         WorksheetJobStatusView.as_view(),
         name="delivery-status",
     ),
+    # Status and result of any generation job (async /custom/ and /regenerate/).
+    path(
+        "jobs/<str:job_id>/",
+        WorksheetJobStatusView.as_view(),
+        name="job-status",
+    ),
 ]
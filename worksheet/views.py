@@ -1,21 +1,36 @@
-from worksheet.jobs import generate_worksheet_job
+from django.conf import settings
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from worksheet.jobs import (
+    GENERATE_JOB_TIMEOUT,
+    INTERACTIVE_JOB_TIMEOUT,
+    generate_custom_exercises_job,
+    generate_worksheet_job,
+    regenerate_worksheet_job,
+)
 from worksheet.serializers import (
     GenerateCustomWorksheetRequestSerializer,
     GenerateCustomWorksheetResponseSerializer,
     GenerateLLMContentRequestSerializer,
     GenerateLLMContentResponseSerializer,
     GenerateWorksheetResponseSerializer,
+    GenerationJobResponseSerializer,
 )
-from django_rq import enqueue, get_queue
+from django_rq import get_queue
 from rq.job import Job
 from rq.exceptions import NoSuchJobError
-from worksheet.services.generate import (
-    generate_custom_exercises,
-    generate_worksheet_for,
+from worksheet.services.custom_cache import (
+    CustomGenerationInProgress,
+    get_or_generate_custom_exercises,
 )
+from worksheet.services.generate import generate_worksheet_for
 from worksheet.services.email import send_worksheet_email
-from worksheet.models import Worksheet
-from worksheet.services.exercise_items import parse_worksheet_content
+from worksheet.services.latest_worksheet import (
+    get_latest_worksheet,
+    get_latest_worksheet_validators,
+)
+from worksheet.services.worksheet_content import dump_content
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
@@ -25,6 +40,25 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _enqueue_generation(request, job_func, *args, message):
+    """Enqueue a generation job owned by the caller; return 202 with a poll URL."""
+    job = get_queue("interactive").enqueue(
+        job_func,
+        *args,
+        job_timeout=INTERACTIVE_JOB_TIMEOUT,
+        result_ttl=settings.JOB_RESULT_TTL,
+        meta={"user_id": request.user.id},
+    )
+    body = {
+        "message": message,
+        "job_id": job.id,
+        "status_url": reverse("job-status", args=[job.id]),
+    }
+    return Response(
+        GenerationJobResponseSerializer(body).data, status=status.HTTP_202_ACCEPTED
+    )
+
+
 class GenerateCustomWorksheetView(GenericAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = GenerateCustomWorksheetRequestSerializer
@@ -37,7 +71,25 @@ class GenerateCustomWorksheetView(GenericAPIView):
         serializer.is_valid(raise_exception=True)
 
         request_text = serializer.validated_data["request"]
-        content = generate_custom_exercises(request_text)
+        if serializer.validated_data["mode"] == "async":
+            return _enqueue_generation(
+                request,
+                generate_custom_exercises_job,
+                request_text,
+                message="Custom worksheet generation started",
+            )
+
+        try:
+            content = get_or_generate_custom_exercises(
+                request_text, max_wait=settings.CUSTOM_EXERCISE_SYNC_WAIT
+            )
+        except CustomGenerationInProgress:
+            # Do not hold a web worker; a retry is served the cached result.
+            return Response(
+                {"error": "An identical request is still generating"},
+                status=status.HTTP_409_CONFLICT,
+                headers={"Retry-After": str(settings.CUSTOM_EXERCISE_SYNC_WAIT)},
+            )
 
         if content is None:
             logger.warning(
@@ -66,6 +118,15 @@ class GenerateLLMContentView(GenericAPIView):
         themes = serializer.validated_data.get("themes", [])
         themes_arg = themes if themes else None
 
+        if serializer.validated_data["mode"] == "async":
+            return _enqueue_generation(
+                request,
+                regenerate_worksheet_job,
+                request.user.id,
+                themes_arg,
+                message="Worksheet generation started",
+            )
+
         content = generate_worksheet_for(request.user, themes=themes_arg)
 
         if content is None:
@@ -91,7 +152,9 @@ class GenerateAndSendWorksheetView(GenericAPIView):
     def post(self, request):
         logger.info(f"generate_worksheet called by user: {request.user.email}")
 
-        job = enqueue(generate_worksheet_job, request.user.id)
+        job = get_queue("interactive").enqueue(
+            generate_worksheet_job, request.user.id, job_timeout=GENERATE_JOB_TIMEOUT
+        )
 
         return Response(
             {
@@ -114,6 +177,13 @@ class WorksheetJobStatusView(GenericAPIView):
                 {"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
+        # Generation jobs carry their owner; results hold the user's content.
+        owner = job.meta.get("user_id")
+        if owner is not None and owner != request.user.id:
+            return Response(
+                {"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+
         return Response(
             {
                 "status": job.get_status(),
@@ -131,12 +201,7 @@ class GenerateWorksheetEmailView(GenericAPIView):
     def post(self, request):
         logger.info(f"send_worksheet_email called by user: {request.user.email}")
 
-        worksheet = (
-            Worksheet.objects.filter(user=request.user)
-            .order_by("-created_at")
-            .only("content", "themes")
-            .first()
-        )
+        worksheet = get_latest_worksheet(request.user)
 
         if not worksheet or not worksheet.content:
             logger.warning(
@@ -148,33 +213,64 @@ class GenerateWorksheetEmailView(GenericAPIView):
 
         try:
             themes = worksheet.themes if worksheet.themes else None
-            send_worksheet_email(request.user, worksheet.content, theme=themes)
+            send_worksheet_email(
+                request.user,
+                worksheet.content,
+                theme=themes,
+                content_hash=worksheet.content_hash,
+            )
         except Exception as e:
             logger.error(f"Failed to resend worksheet email: {e}")
             return Response(
                 {"error": "Failed to send email"}, status=status.HTTP_502_BAD_GATEWAY
             )
 
-        return Response({"content": worksheet.content})
+        return Response({"content": dump_content(worksheet.content)})
+
+
+def _validator_headers(content_hash, created_at) -> dict[str, str]:
+    return {
+        "ETag": quote_etag(content_hash),
+        "Last-Modified": http_date(int(created_at.timestamp())),
+        # Clients may keep the body but must revalidate before reusing it.
+        "Cache-Control": "private, no-cache",
+    }
 
 
 class LatestWorksheetView(GenericAPIView):
-    """Return the authenticated user's most recently saved worksheet (including answers)."""
+    """
+    Return the authenticated user's most recently saved worksheet (including answers).
+
+    The ETag is the worksheet's ``content_hash``. A matching If-None-Match
+    (or an If-Modified-Since no older than the worksheet) gets a 304 that is
+    answered from the cached validators, without loading the content.
+    """
 
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        worksheet = (
-            Worksheet.objects.filter(user=request.user).order_by("-created_at").first()
-        )
+        validators = get_latest_worksheet_validators(request.user)
+        if validators is not None:
+            content_hash, created_at = validators
+            not_modified = get_conditional_response(
+                request,
+                etag=quote_etag(content_hash),
+                last_modified=int(created_at.timestamp()),
+            )
+            if not_modified is not None:
+                for header, value in _validator_headers(*validators).items():
+                    not_modified[header] = value
+                return not_modified
+
+        worksheet = get_latest_worksheet(request.user)
         if not worksheet or not worksheet.content:
             return Response(
                 {"error": "No worksheet available"},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        parsed = parse_worksheet_content(worksheet.content)
-        if parsed is None:
+        # Decoded by the database driver; only legacy unreadable text is not a dict.
+        if not isinstance(worksheet.content, dict):
             logger.error(
                 "Stored worksheet %s for %s is not valid JSON",
                 worksheet.id,
@@ -191,6 +287,7 @@ class LatestWorksheetView(GenericAPIView):
                 "created_at": worksheet.created_at,
                 "themes": worksheet.themes,
                 "topics": worksheet.topics,
-                "content": parsed,
-            }
+                "content": worksheet.content,
+            },
+            headers=_validator_headers(worksheet.content_hash, worksheet.created_at),
         )
@@ -0,0 +1,26 @@
+"""RQ worker that also reports its heartbeats to the health snapshot."""
+
+from rq import Worker
+
+from worksheet.services.health import forget_worker, record_heartbeat
+
+
+class HeartbeatWorker(Worker):
+    """
+    ``rq.Worker`` whose heartbeats are mirrored into the shared health hash,
+    so health checks never have to enumerate workers. Selected for
+    ``rqworker`` and ``rqworker-pool`` through ``RQ["WORKER_CLASS"]``.
+    """
+
+    def register_birth(self):
+        super().register_birth()
+        record_heartbeat(self.connection, self.name, self.queue_names())
+
+    def heartbeat(self, timeout=None, pipeline=None):
+        super().heartbeat(timeout, pipeline=pipeline)
+        target = pipeline if pipeline is not None else self.connection
+        record_heartbeat(target, self.name, self.queue_names())
+
+    def register_death(self):
+        forget_worker(self.connection, self.name)
+        super().register_death()